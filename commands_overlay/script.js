@@ -1,5 +1,4 @@
 const API_URL = 'http://127.0.0.1:5000/api/v1/commands';
-const POLLING_INTERVAL_MS = 500;
 const FADE_OUT_DURATION_MS = 500;
 
 const container = document.getElementById('command-container');
@@ -9,56 +8,59 @@ const costsElement = document.getElementById('command-costs');
 let currentCommandId = null;
 let isVisible = false;
 
+// Einmaliger Abruf beim Laden, danach kommen Updates per Socket.IO
 async function pollActiveCommand() {
-    if (!container) return;
-
     try {
         const response = await fetch(API_URL + '?t=' + new Date().getTime());
         if (!response.ok) return;
+        renderCommand(await response.json());
+    } catch (error) {
+        console.error(error);
+    }
+}
 
-        const command = await response.json();
-
-        // --- NEUER BEFEHL ---
-        if (command && command.id && command.id !== currentCommandId) {
-            console.log("Command:", command.text);
-            currentCommandId = command.id;
-            isVisible = true;
+function renderCommand(command) {
+    if (!container) return;
 
-            textElement.textContent = command.text;
-            costsElement.textContent = `${command.costs} Whieties`;
+    // --- NEUER BEFEHL ---
+    if (command && command.id && command.id !== currentCommandId) {
+        console.log("Command:", command.text);
+        currentCommandId = command.id;
+        isVisible = true;
 
-            // SUPERFAN CHECK
-            if (command.is_superfan) {
-                container.classList.add('superfan');
-            } else {
-                container.classList.remove('superfan');
-            }
+        textElement.textContent = command.text;
+        costsElement.textContent = `${command.costs} Whieties`;
 
-            container.classList.remove('hide');
-            container.classList.add('show');
+        // SUPERFAN CHECK
+        if (command.is_superfan) {
+            container.classList.add('superfan');
+        } else {
+            container.classList.remove('superfan');
         }
-        // --- AUSBLENDEN ---
-        else if ((!command || !command.id) && isVisible) {
-            isVisible = false;
-            currentCommandId = null;
 
-            container.classList.remove('show');
-            container.classList.add('hide');
+        container.classList.remove('hide');
+        container.classList.add('show');
+    }
+    // --- AUSBLENDEN ---
+    else if ((!command || !command.id) && isVisible) {
+        isVisible = false;
+        currentCommandId = null;
 
-            setTimeout(() => {
-                if (!isVisible) {
-                     textElement.textContent = "";
-                     costsElement.textContent = "";
-                     // Reset style
-                     container.classList.remove('superfan');
-                }
-            }, FADE_OUT_DURATION_MS);
-        }
+        container.classList.remove('show');
+        container.classList.add('hide');
 
-    } catch (error) {
-        console.error(error);
+        setTimeout(() => {
+            if (!isVisible) {
+                 textElement.textContent = "";
+                 costsElement.textContent = "";
+                 // Reset style
+                 container.classList.remove('superfan');
+            }
+        }, FADE_OUT_DURATION_MS);
     }
 }
 
-pollActiveCommand();
-setInterval(pollActiveCommand, POLLING_INTERVAL_MS);
\ No newline at end of file
+const socket = io();
+socket.on('connect', () => socket.emit('subscribe', ['active_command']));
+socket.on('active_command', renderCommand);
+pollActiveCommand();
\ No newline at end of file
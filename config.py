@@ -64,6 +64,8 @@ APP_VERSION = "v2.13"
 LOG_FILE_SERVER = get_persistent_path('server.log')
 LOG_FILE_WISHES = get_persistent_path('wishes.log')
 LOG_FILE_TWITCH = get_persistent_path('twitch.log') # NEU
+LOG_FILE_TIKTOK = get_persistent_path('tiktok_live.log')
+LOG_FILE_TIMER = get_path('timer.log')  # Wie bisher neben den gebündelten Dateien
 
 BASE_HOST = '127.0.0.1'
 BASE_PORT = 5000
@@ -1,8 +1,121 @@
 import sqlite3
+import threading
+from contextlib import contextmanager
+from queue import LifoQueue, Empty
 from config import DATABASE_PATH
 
+# Maximale Anzahl gleichzeitig offener Verbindungen (Flask-Threads, Twitch, TikTok, GUI)
+POOL_SIZE = 4
+# Anzahl vorbereiteter Statements, die sqlite3 pro Verbindung cached
+STATEMENT_CACHE_SIZE = 128
+# Wartezeit (Sekunden), falls die DB gerade von einer anderen Verbindung gesperrt ist
+BUSY_TIMEOUT = 10.0
+
+
+class ConnectionPool:
+    """
+    Hält langlebige SQLite-Verbindungen (WAL, synchronous=NORMAL) und verteilt sie an Threads.
+    Verschachtelte Aufrufe im selben Thread bekommen dieselbe Verbindung.
+    """
+
+    def __init__(self, db_path, size=POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self._idle = LifoQueue()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._closed = False
+
+    def _create_connection(self):
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            pass
+        with self._lock:
+            if len(self._connections) < self.size:
+                conn = self._create_connection()
+                self._connections.append(conn)
+                return conn
+        return self._idle.get()
+
+    def _release(self, conn):
+        # Nicht committete Änderungen (z.B. nach Exceptions) verwerfen
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            self._discard(conn)
+        else:
+            self._idle.put(conn)
+
+    def _discard(self, conn):
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    @contextmanager
+    def connection(self):
+        """Leiht eine Verbindung aus und gibt sie danach automatisch zurück."""
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            # Bereits im selben Thread ausgeliehen (verschachtelter Aufruf)
+            yield held
+            return
+
+        conn = self._acquire()
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._release(conn)
+
+    def close_all(self):
+        """Schließt alle freien Verbindungen; ausgeliehene werden bei Rückgabe geschlossen."""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except Empty:
+                break
+            self._discard(conn)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool._closed:
+            _pool = ConnectionPool(DATABASE_PATH)
+        return _pool
+
+
 def get_db_connection():
-    """Stellt eine Verbindung zur Datenbank her und setzt row_factory auf sqlite3.Row."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
\ No newline at end of file
+    """
+    Gibt eine gepoolte Verbindung (row_factory = sqlite3.Row) als Context-Manager zurück:
+        with get_db_connection() as conn: ...
+    Commits bleiben Aufgabe des Aufrufers.
+    """
+    return get_pool().connection()
+
+
+def close_all_connections():
+    """Shutdown-Hook: Schließt alle Verbindungen des Pools."""
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
@@ -1,43 +1,52 @@
 import sqlite3
-from config import DATABASE_PATH
+from database.db_connector import get_db_connection
 from utils import server_log
 
 def setup_database():
     """Erstellt die notwendigen Tabellen für Wünsche und Währung."""
-    conn = None
     try:
-        # Verbindung herstellen
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
+        # Verbindung aus dem Pool (aktiviert WAL beim ersten Öffnen)
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
 
-        # 1. Tabelle: Killerwünsche (Existierende Tabelle)
-        # Wir nutzen IF NOT EXISTS, damit bestehende Daten bleiben
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS killer_wuensche (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                wunsch TEXT NOT NULL,
-                user_name TEXT NOT NULL,
-                datum TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+            # 1. Tabelle: Killerwünsche (Existierende Tabelle)
+            # Wir nutzen IF NOT EXISTS, damit bestehende Daten bleiben
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS killer_wuensche (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    wunsch TEXT NOT NULL,
+                    user_name TEXT NOT NULL,
+                    datum TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
 
-        # 2. Tabelle: Currency (Neue Tabelle für Währung)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS currency (
-                user_id TEXT PRIMARY KEY,
-                user_name TEXT,
-                amount INTEGER DEFAULT 0,
-                last_seen DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+            # 1b. Migration: Normalisierter User-Name (lower-case) + Index für !place
+            columns = [row[1] for row in cursor.execute("PRAGMA table_info(killer_wuensche)")]
+            if "user_key" not in columns:
+                cursor.execute("ALTER TABLE killer_wuensche ADD COLUMN user_key TEXT")
+            # Python-lower() statt SQL-lower(), damit auch Umlaute/Unicode korrekt normalisiert werden
+            rows = cursor.execute("SELECT id, user_name FROM killer_wuensche WHERE user_key IS NULL").fetchall()
+            if rows:
+                cursor.executemany("UPDATE killer_wuensche SET user_key = ? WHERE id = ?",
+                                   [(row[1].lower(), row[0]) for row in rows])
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_wuensche_user_key ON killer_wuensche (user_key, id)")
+            # 1c. Index für die Queue-Reihenfolge (Keyset-Paging im Overlay, kein Sortieren pro Abfrage)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_wuensche_datum ON killer_wuensche (datum, id)")
 
-        conn.commit()
+            # 2. Tabelle: Currency (Neue Tabelle für Währung)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS currency (
+                    user_id TEXT PRIMARY KEY,
+                    user_name TEXT,
+                    amount INTEGER DEFAULT 0,
+                    last_seen DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            conn.commit()
         server_log.info("Datenbank und Tabellen (Wishes & Currency) erfolgreich geprüft.")
 
     except sqlite3.Error as e:
         server_log.error(f"Fehler bei der Datenbank-Initialisierung: {e}")
         # Wir raisen den Fehler, damit main.py das merkt und nicht weitermacht
         raise e
-    finally:
-        if conn:
-            conn.close()
\ No newline at end of file
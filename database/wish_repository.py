@@ -1,72 +1,76 @@
 from .db_connector import get_db_connection
+from utils import wishes_log
 
 
 class WishRepository:
     """Isoliert den direkten Datenbankzugriff für Killerwünsche."""
 
-    def get_wishes(self, offset, limit=2):
-        """Ruft eine begrenzte Anzahl von Wünschen mit Offset ab."""
-        conn = get_db_connection()
-        c = conn.cursor()
-        c.execute("SELECT wunsch, user_name FROM killer_wuensche ORDER BY datum ASC LIMIT ? OFFSET ?",
-                  (limit, offset))
-        wuensche = [dict(row) for row in c.fetchall()]
-        conn.close()
-        return wuensche
-
-    def count_total_wishes(self):
-        """Zählt die Gesamtzahl der Wünsche."""
-        conn = get_db_connection()
-        c = conn.cursor()
-        c.execute("SELECT COUNT(*) FROM killer_wuensche")
-        total = c.fetchone()[0]
-        conn.close()
-        return total
+    def get_wishes(self, limit=2, after=None):
+        """
+        Ruft eine Seite von Wünschen in Queue-Reihenfolge (datum, id) ab.
+        'after' ist der Cursor (datum, id) des letzten Eintrags der vorherigen Seite;
+        None liefert den Kopf der Queue. Keyset-Paging über idx_wuensche_datum statt OFFSET.
+        """
+        with get_db_connection() as conn:
+            c = conn.cursor()
+            if after is None:
+                c.execute("SELECT id, datum, wunsch, user_name FROM killer_wuensche "
+                          "ORDER BY datum ASC, id ASC LIMIT ?", (limit,))
+            else:
+                c.execute("SELECT id, datum, wunsch, user_name FROM killer_wuensche "
+                          "WHERE (datum, id) > (?, ?) ORDER BY datum ASC, id ASC LIMIT ?",
+                          (after[0], after[1], limit))
+            return [dict(row) for row in c.fetchall()]
 
     def add_wish(self, wunsch, user_name):
         """Fügt einen neuen Wunsch in die Datenbank ein."""
-        conn = get_db_connection()
-        c = conn.cursor()
-        c.execute("INSERT INTO killer_wuensche (wunsch, user_name) VALUES (?, ?)", (wunsch, user_name))
-        conn.commit()
-        conn.close()
+        with get_db_connection() as conn:
+            c = conn.cursor()
+            c.execute("INSERT INTO killer_wuensche (wunsch, user_name, user_key) VALUES (?, ?, ?)",
+                      (wunsch, user_name, user_name.lower()))
+            conn.commit()
 
     def delete_all_wishes(self):
         """Löscht alle Wünsche aus der Datenbank."""
-        conn = get_db_connection()
-        c = conn.cursor()
-        c.execute("DELETE FROM killer_wuensche")
-        conn.commit()
-        conn.close()
+        with get_db_connection() as conn:
+            c = conn.cursor()
+            c.execute("DELETE FROM killer_wuensche")
+            conn.commit()
 
     def delete_oldest_wish(self):
         """Löscht den ältesten Wunsch (den mit der niedrigsten ID) aus der Datenbank."""
-        conn = get_db_connection()
-        c = conn.cursor()
-        try:
-            # Finde die niedrigste ID
-            c.execute("SELECT MIN(id) FROM killer_wuensche")
-            result = c.fetchone()
-            if result and result[0] is not None:
-                oldest_id = result[0]
-                # Lösche den Eintrag mit dieser ID
-                c.execute("DELETE FROM killer_wuensche WHERE id = ?", (oldest_id,))
-                conn.commit()
-                wishes_log.info(f"Ältester Wunsch mit ID {oldest_id} gelöscht.")  # Optional: Loggen
-            else:
-                # Optional: Loggen, wenn keine Wünsche vorhanden sind
-                wishes_log.info("Keine Wünsche zum Löschen vorhanden.")
-        except Exception as e:
-            wishes_log.error(f"Fehler beim Löschen des ältesten Wunsches: {e}")  # Logge Fehler
-            conn.rollback()  # Mache Änderungen rückgängig bei Fehler
-        finally:
-            conn.close()
+        with get_db_connection() as conn:
+            c = conn.cursor()
+            try:
+                # Finde die niedrigste ID
+                c.execute("SELECT MIN(id) FROM killer_wuensche")
+                result = c.fetchone()
+                if result and result[0] is not None:
+                    oldest_id = result[0]
+                    # Lösche den Eintrag mit dieser ID
+                    c.execute("DELETE FROM killer_wuensche WHERE id = ?", (oldest_id,))
+                    conn.commit()
+                    wishes_log.info(f"Ältester Wunsch mit ID {oldest_id} gelöscht.")  # Optional: Loggen
+                else:
+                    # Optional: Loggen, wenn keine Wünsche vorhanden sind
+                    wishes_log.info("Keine Wünsche zum Löschen vorhanden.")
+            except Exception as e:
+                wishes_log.error(f"Fehler beim Löschen des ältesten Wunsches: {e}")  # Logge Fehler
+                conn.rollback()  # Mache Änderungen rückgängig bei Fehler
 
-    def get_all_user_names(self):
-        """Gibt eine Liste aller User-Namen in der Reihenfolge ihrer Wünsche (ID/Datum) zurück."""
-        conn = get_db_connection()
-        c = conn.cursor()
-        c.execute("SELECT user_name FROM killer_wuensche ORDER BY id ASC")
-        users = [row['user_name'] for row in c.fetchall()]
-        conn.close()
-        return users
\ No newline at end of file
+    def get_user_place(self, user_name):
+        """
+        Ermittelt den Platz des ersten Wunsches eines Users (case-insensitive).
+        Gibt (platz, original_name) zurück oder None, falls der User keinen Wunsch hat.
+        """
+        with get_db_connection() as conn:
+            c = conn.cursor()
+            # Index-Lookup über (user_key, id) statt alle Namen zu laden
+            c.execute("SELECT id, user_name FROM killer_wuensche WHERE user_key = ? ORDER BY id ASC LIMIT 1",
+                      (user_name.lower(),))
+            row = c.fetchone()
+            if row is None:
+                return None
+            # Rang = Anzahl Wünsche bis einschließlich dieser ID (Range über den Primärschlüssel)
+            c.execute("SELECT COUNT(*) FROM killer_wuensche WHERE id <= ?", (row['id'],))
+            return c.fetchone()[0], row['user_name']
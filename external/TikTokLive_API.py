@@ -1,8 +1,8 @@
 import threading
 import time
 import asyncio
-import logging
 import json
+import copy
 import datetime
 from typing import Optional, Callable, List, Dict
 
@@ -15,20 +15,23 @@ from TikTokLive.events import (
 from TikTokLive.events.custom_events import SuperFanEvent
 from TikTokLive.client.web.web_settings import WebDefaults
 
+from external.event_dispatcher import EventDispatcher, OverflowPolicy
+from external.like_leaderboard import LikeLeaderboard, LikeDeltaLog
+from utils import setup_logging
+
 # Standard Fallback Key (falls der User keinen eingibt)
 DEFAULT_EULER_KEY = "euler_ODBmYTc0ZWZjMmU0NmIyNzU4YjM3MmI4YzUwYmMxZWYwNjllNmVhZjI1MjBiN2ViMjE1YzRh"
 
 SAVE_INTERVAL = 30
 JSON_FILENAME = "like_daten.json"
-LOG_FILENAME = "tiktok_live.log"
+LIKE_LOG_FILENAME = "like_deltas.jsonl"
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S',
-    handlers=[logging.FileHandler(LOG_FILENAME, encoding='utf-8'), logging.StreamHandler()]
-)
-server_log = logging.getLogger("TikTokAPI")
+# Event-Verteilung an die Listener (Subathon, Like-Challenge, ...)
+DISPATCH_WORKERS = 4
+LISTENER_QUEUE_SIZE = 500
+
+# Datei (tiktok_live.log), Konsole und Rate-Limit kommen aus utils.configure_logging
+server_log = setup_logging("TikTokAPI")
 
 
 class TikTokLive_API:
@@ -36,13 +39,20 @@ class TikTokLive_API:
         self.unique_id = unique_id
         self.client: Optional[TikTokLiveClient] = None
         self.current_likes = 0
-        self.user_likes: Dict[str, int] = {}
+        # Likes pro User + Top-K (kompakt, Speichern nur als Delta)
+        self.leaderboard = LikeLeaderboard()
+        self.delta_log = LikeDeltaLog(LIKE_LOG_FILENAME)
+        self._saved_total = None
         self.is_connected = False
         self.running = False
         self.api_thread = None
         self.timer_thread = None
         self._lock = threading.Lock()
+        # Serialisiert save_data_to_file (Timer, add_likes, Shutdown): Delta-Log und JSON in Reihenfolge
+        self._save_lock = threading.Lock()
         self.listeners: List[Callable[[any], None]] = []
+        self.dispatcher = EventDispatcher(workers=DISPATCH_WORKERS, max_queue=LISTENER_QUEUE_SIZE,
+                                          policy=OverflowPolicy.COALESCE, name="TikTokDispatch")
 
         # --- KEY SETZEN ---
         # Nutze den übergebenen Key, sonst den Default-Key
@@ -55,22 +65,52 @@ class TikTokLive_API:
         key_masked = final_key[:10] + "..." if final_key else "None"
         server_log.info(f"🔑 Nutze Euler-Key: {key_masked}")
 
-    def add_listener(self, callback: Callable[[any], None]):
+    def add_listener(self, callback: Callable[[any], None], max_queue: int = LISTENER_QUEUE_SIZE,
+                     policy: str = OverflowPolicy.COALESCE):
+        """
+        Registriert einen Listener mit eigener, begrenzter Queue.
+        Standard: Läuft die Queue voll, werden aufeinanderfolgende LikeEvents zusammengefasst,
+        Likes und Kommentare verdrängen das älteste Like/Kommentar (gezählt in get_listener_stats).
+        Gifts, Follows, Subs usw. werden nie verworfen, sondern notfalls über max_queue hinaus
+        eingereiht ('overflow', mit Warnung im Log). Die Handler laufen im asyncio-Loop von
+        TikTokLive und dürfen deshalb nie auf eine Queue warten.
+        """
         self.listeners.append(callback)
+        self.dispatcher.add_listener(callback, max_queue=max_queue, policy=policy,
+                                     coalesce_fn=self._coalesce_like_events,
+                                     fallback=OverflowPolicy.DROP_OLDEST,
+                                     keep_fn=self._is_important_event)
+
+    @staticmethod
+    def _is_important_event(event) -> bool:
+        """Alles außer Likes und Kommentaren darf bei voller Queue nicht verloren gehen."""
+        return not isinstance(event, (LikeEvent, CommentEvent))
+
+    @staticmethod
+    def _coalesce_like_events(old, new):
+        """Fasst zwei LikeEvents zusammen (Differenzen addieren, neueste Totals behalten)."""
+        if not isinstance(old, LikeEvent) or not isinstance(new, LikeEvent):
+            return None
+        # Kopie, da dasselbe Event-Objekt auch in den Queues anderer Listener liegt
+        merged = copy.copy(new)
+        merged.calculated_diff = getattr(old, 'calculated_diff', old.count) + getattr(new, 'calculated_diff', new.count)
+        return merged
 
     def _notify_listeners(self, event):
-        def _run_callback(cb, evt):
-            try:
-                cb(evt)
-            except Exception as e:
-                server_log.error(f"Fehler im Event-Listener: {e}")
+        self.dispatcher.dispatch(event)
 
-        for callback in self.listeners:
-            threading.Thread(target=_run_callback, args=(callback, event), daemon=True).start()
+    def get_listener_stats(self) -> dict:
+        """Queue-Tiefe, verworfene und zusammengefasste Events pro Listener."""
+        return self.dispatcher.get_stats()
 
     def start(self):
         if self.running: return
         self.running = True
+        self.dispatcher.start()
+        try:
+            self.delta_log.start_session(self.unique_id)
+        except Exception as e:
+            server_log.error(f"Like-Log konnte nicht angelegt werden: {e}")
         self.api_thread = threading.Thread(target=self._run_connection_loop, daemon=True, name="TikTokConnectionLoop")
         self.api_thread.start()
         self.timer_thread = threading.Thread(target=self._run_save_timer, daemon=True, name="TikTokSaveTimer")
@@ -81,6 +121,7 @@ class TikTokLive_API:
         server_log.info("🛑 Stoppe System...")
         self.running = False
         self.save_data_to_file()
+        self.dispatcher.stop()
         if self.client:
             try:
                 loop = getattr(self.client, '_asyncio_loop', None) or asyncio.get_event_loop()
@@ -92,19 +133,35 @@ class TikTokLive_API:
                 pass
 
     def save_data_to_file(self):
-        try:
-            with self._lock:
-                data = {
-                    "timestamp": str(datetime.datetime.now()),
-                    "streamer": self.unique_id,
-                    "total_room_likes": self.current_likes,
-                    "user_leaderboard": self.user_likes
-                }
-            with open(JSON_FILENAME, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=4)
-            server_log.info(f"💾 [TIMER] Gespeichert. Likes: {self.current_likes}")
-        except Exception as e:
-            server_log.error(f"Speicherfehler: {e}")
+        """Hängt die seit dem letzten Speichern geänderten User an das Delta-Log und schreibt eine kleine Übersicht."""
+        with self._save_lock:
+            try:
+                with self._lock:
+                    total = self.current_likes
+                    delta = self.leaderboard.take_delta()
+                    snapshot = self.leaderboard.snapshot() if self.delta_log.needs_compaction() else None
+                    top = self.leaderboard.top(self.leaderboard.top_k)
+                    data = {
+                        "timestamp": str(datetime.datetime.now()),
+                        "streamer": self.unique_id,
+                        "total_room_likes": total,
+                        # Bisheriges Format (user_id -> Likes), aber nur noch für die Top-K statt für alle User
+                        "user_leaderboard": {entry["user_id"]: entry["likes"] for entry in top},
+                        "user_count": len(self.leaderboard),
+                        "top_likers": top[:10]
+                    }
+
+                if snapshot is not None:
+                    self.delta_log.compact(self.unique_id, total, snapshot)
+                elif delta or total != self._saved_total:
+                    self.delta_log.append(total, delta)
+                self._saved_total = total
+
+                with open(JSON_FILENAME, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=4, ensure_ascii=False)
+                server_log.info(f"💾 [TIMER] Gespeichert. Likes: {total} ({len(delta)} User geändert)")
+            except Exception as e:
+                server_log.error(f"Speicherfehler: {e}")
 
     def _run_save_timer(self):
         while self.running:
@@ -179,12 +236,12 @@ class TikTokLive_API:
             event.calculated_diff = diff
 
             # User-Statistik (optional, bleibt meist auf dem Klick-Count basierend sinnvoll)
-            uid = event.user.unique_id
-            if uid not in self.user_likes: self.user_likes[uid] = 0
-            self.user_likes[uid] += event.count
+            user = event.user
+            nickname = getattr(user, "nick_name", None) or getattr(user, "nickname", None)
+            user_total = self.leaderboard.add(user.unique_id, event.count, nickname)
 
             event.custom_room_total = self.current_likes
-            event.custom_user_total = self.user_likes[uid]
+            event.custom_user_total = user_total
 
         self._notify_listeners(event)
 
@@ -279,7 +336,7 @@ class TikTokLive_API:
 
     async def on_comment(self, event: CommentEvent):
         self._notify_listeners(event)
-        from services.service_provider import wish_service_instance, subathon_service_instance
+        from services.service_provider import wish_service_instance
         try:
             d = event.user_info
             name = getattr(d, "nick_name", None) or getattr(d, "nickname", None) or getattr(d, "unique_id", "Unknown")
@@ -292,4 +349,14 @@ class TikTokLive_API:
             server_log.error(f"Comment Error: {e}")
 
     def get_current_likes(self) -> int:
-        with self._lock: return self.current_likes
\ No newline at end of file
+        with self._lock: return self.current_likes
+
+    def get_leaderboard(self, limit: int = 10) -> list:
+        """Top-Liker (aus der laufend gepflegten Top-K Liste)."""
+        with self._lock: return self.leaderboard.top(limit)
+
+    def add_likes(self, amount: int) -> int:
+        """Erhöht den Like-Stand manuell (Test-Likes). Gibt das neue Total zurück."""
+        with self._lock:
+            self.current_likes += amount
+            return self.current_likes
\ No newline at end of file
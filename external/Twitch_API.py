@@ -1,17 +1,10 @@
 import threading
 import asyncio
-import logging
 from twitchio.ext import commands
-from config import LOG_FILE_TWITCH
+from utils import setup_logging
 
-# Logging einrichten
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] [TWITCH] %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S',
-    handlers=[logging.FileHandler(LOG_FILE_TWITCH, encoding='utf-8'), logging.StreamHandler()]
-)
-twitch_log = logging.getLogger("TwitchAPI")
+# Logging einrichten (Datei twitch.log + Konsole, siehe utils.configure_logging)
+twitch_log = setup_logging("TwitchAPI")
 
 
 class TwitchBot(commands.Bot):
@@ -143,21 +136,24 @@ class Twitch_API_Wrapper:
 
     def notify_message(self, username):
         try:
-            from services.service_provider import subathon_service_instance
-            subathon_service_instance.on_twitch_message(username)
+            from services.event_bus import EventType
+            from services.service_provider import event_bus_instance
+            event_bus_instance.publish(EventType.TWITCH_MESSAGE, "twitch", username)
         except:
             pass
 
     def notify_bits(self, username, amount):
         try:
-            from services.service_provider import subathon_service_instance
-            subathon_service_instance.on_twitch_bits(username, amount)
+            from services.event_bus import EventType
+            from services.service_provider import event_bus_instance
+            event_bus_instance.publish(EventType.TWITCH_BITS, "twitch", username, amount)
         except:
             pass
 
     def notify_sub(self, username, is_gift):
         try:
-            from services.service_provider import subathon_service_instance
-            subathon_service_instance.on_twitch_sub(username, is_gift)
+            from services.event_bus import EventType
+            from services.service_provider import event_bus_instance
+            event_bus_instance.publish(EventType.TWITCH_SUB, "twitch", username, 1, {"is_gift": is_gift})
         except:
             pass
\ No newline at end of file
@@ -0,0 +1,234 @@
+import threading
+import time
+import logging
+from collections import deque
+from typing import Callable, Dict, Any
+
+logger = logging.getLogger("ChatOutbox")
+
+# Twitch Limits: Nachrichten pro 30 Sekunden (normaler User / Moderator bzw. Broadcaster)
+RATE_WINDOW = 30.0
+RATE_LIMITS = {False: 20, True: 100}
+# Burst-Größe des Buckets. burst + Nachfüllrate * 30s == Limit, d.h. das Limit hält in jedem 30s-Fenster.
+BURST_SIZES = {False: 5, True: 20}
+
+MAX_QUEUE = 50          # pro Priorität
+THANKS_MAX_AGE = 30.0   # Danke-Nachrichten, die länger warten, sind nicht mehr relevant
+MAX_SEND_ATTEMPTS = 3   # Fehlgeschlagene Nachrichten werden so oft versucht, dann verworfen
+RETRY_DELAY = 1.0       # Pause nach einem fehlgeschlagenen Senden (Sekunden)
+
+
+def _bucket_params(is_moderator):
+    """(Burst, Nachfüllrate pro Sekunde) für das jeweilige Limit."""
+    burst = BURST_SIZES[is_moderator]
+    return burst, (RATE_LIMITS[is_moderator] - burst) / RATE_WINDOW
+
+
+class Priority:
+    REPLY = 0   # Antworten auf Chat-Commands (!score, !send, !spin, ...)
+    THANKS = 1  # Danke für Bits/Subs/Gift-Bombs
+
+    ALL = (REPLY, THANKS)
+
+
+class TokenBucket:
+    """Klassischer Token-Bucket. Nicht thread-safe (der Aufrufer hält seinen Lock)."""
+    __slots__ = ("capacity", "rate", "tokens", "_stamp", "_clock")
+
+    def __init__(self, capacity, rate, clock=time.monotonic):
+        self._clock = clock
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self.tokens = float(capacity)
+        self._stamp = clock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def reconfigure(self, capacity, rate):
+        self._refill()
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+        self.tokens = min(self.tokens, self.capacity)
+
+    def wait_time(self):
+        """Sekunden, bis ein Token verfügbar ist (0 = sofort)."""
+        self._refill()
+        if self.tokens >= 1.0:
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1.0
+
+    def refund(self):
+        """Gibt ein Token zurück (Nachricht wurde doch nicht gesendet)."""
+        self.tokens = min(self.capacity, self.tokens + 1.0)
+
+
+class _Outgoing:
+    __slots__ = ("text", "key", "priority", "enqueued", "attempts")
+
+    def __init__(self, text, key, priority, enqueued):
+        self.text = text
+        self.key = key
+        self.priority = priority
+        self.enqueued = enqueued
+        self.attempts = 0
+
+
+class ChatOutbox:
+    """
+    Ausgehende Chat-Nachrichten über einen eigenen Thread mit Token-Bucket.
+
+    - Antworten auf Commands haben Vorrang vor Danke-Nachrichten.
+    - Nachrichten mit gleichem Key (Standard: gleicher Text), die noch warten, werden
+      zusammengeführt: Die neue ersetzt den Text der wartenden, behält aber deren Platz.
+    - Bei voller Queue fliegt die älteste Nachricht der Priorität raus, veraltete
+      Danke-Nachrichten werden verworfen.
+    """
+
+    def __init__(self, send_func: Callable[[str], bool], is_moderator=False, name="ChatOutbox"):
+        self._send = send_func
+        self.name = name
+        self._cond = threading.Condition()
+        self._queues = {p: deque() for p in Priority.ALL}
+        self._pending: Dict[str, _Outgoing] = {}
+        self.is_moderator = bool(is_moderator)
+        self._bucket = TokenBucket(*_bucket_params(self.is_moderator))
+        self._running = False
+        self._thread = None
+
+        self.sent = 0
+        self.merged = 0
+        self.dropped_full = 0
+        self.dropped_stale = 0
+        self.dropped_offline = 0
+        self._latency_total = 0.0
+        self.latency_max = 0.0
+
+    def set_moderator(self, is_moderator):
+        """Moderatoren/Broadcaster dürfen deutlich mehr Nachrichten senden."""
+        is_moderator = bool(is_moderator)
+        with self._cond:
+            if is_moderator == self.is_moderator:
+                return
+            self.is_moderator = is_moderator
+            self._bucket.reconfigure(*_bucket_params(is_moderator))
+            self._cond.notify()
+
+    # --- LIFECYCLE ---
+    def start(self):
+        with self._cond:
+            if self._running: return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, daemon=True, name=self.name)
+            self._thread.start()
+
+    def stop(self):
+        """Beendet den Thread. Noch wartende Nachrichten werden verworfen."""
+        with self._cond:
+            self._running = False
+            for queue in self._queues.values():
+                self.dropped_offline += len(queue)
+                queue.clear()
+            self._pending.clear()
+            self._cond.notify_all()
+
+    # --- PRODUZENT ---
+    def enqueue(self, text, priority=Priority.REPLY, key=None) -> bool:
+        """Reiht eine Nachricht ein. Gibt False zurück, falls sie mit einer wartenden zusammengeführt wurde."""
+        key = key or text
+        with self._cond:
+            waiting = self._pending.get(key)
+            if waiting is not None:
+                waiting.text = text
+                self.merged += 1
+                return False
+
+            queue = self._queues[priority]
+            if len(queue) >= MAX_QUEUE:
+                oldest = queue.popleft()
+                self._pending.pop(oldest.key, None)
+                self.dropped_full += 1
+
+            item = _Outgoing(text, key, priority, time.monotonic())
+            queue.append(item)
+            self._pending[key] = item
+            self._cond.notify()
+            return True
+
+    # --- WORKER ---
+    def _next_locked(self, now):
+        for priority in Priority.ALL:
+            queue = self._queues[priority]
+            while queue:
+                item = queue[0]
+                if priority == Priority.THANKS and now - item.enqueued > THANKS_MAX_AGE:
+                    queue.popleft()
+                    self._pending.pop(item.key, None)
+                    self.dropped_stale += 1
+                    continue
+                return queue
+        return None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if not self._running or threading.current_thread() is not self._thread:
+                        return  # Gestoppt oder zwischenzeitlich neu gestartet
+                    queue = self._next_locked(time.monotonic())
+                    if queue is None:
+                        self._cond.wait()
+                        continue
+                    wait = self._bucket.wait_time()
+                    if wait > 0:
+                        self._cond.wait(timeout=wait)
+                        continue
+                    item = queue.popleft()
+                    self._pending.pop(item.key, None)
+                    self._bucket.take()
+                    break
+
+            try:
+                ok = self._send(item.text)
+            except Exception as e:
+                logger.error(f"Fehler beim Senden: {e}")
+                ok = False
+
+            latency = time.monotonic() - item.enqueued
+            with self._cond:
+                if ok:
+                    self.sent += 1
+                    self._latency_total += latency
+                    self.latency_max = max(self.latency_max, latency)
+                    continue
+                # Nicht gesendet: Token zurück, Nachricht wieder vorne einreihen (max. MAX_SEND_ATTEMPTS)
+                self._bucket.refund()
+                item.attempts += 1
+                if item.attempts >= MAX_SEND_ATTEMPTS or not self._running or item.key in self._pending:
+                    # Aufgegeben, gestoppt oder inzwischen durch eine neuere Nachricht mit gleichem Key ersetzt
+                    self.dropped_offline += 1
+                    continue
+                self._queues[item.priority].appendleft(item)
+                self._pending[item.key] = item
+                self._cond.wait(timeout=RETRY_DELAY)
+
+    # --- METRIKEN ---
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "moderator": self.is_moderator,
+                "queued": {"reply": len(self._queues[Priority.REPLY]),
+                           "thanks": len(self._queues[Priority.THANKS])},
+                "tokens": round(self._bucket.tokens, 2),
+                "sent": self.sent,
+                "merged": self.merged,
+                "dropped": {"full": self.dropped_full, "stale": self.dropped_stale,
+                            "offline": self.dropped_offline},
+                "latency_avg": round(self._latency_total / self.sent, 3) if self.sent else 0.0,
+                "latency_max": round(self.latency_max, 3)
+            }
@@ -0,0 +1,299 @@
+import threading
+import logging
+from collections import deque
+from typing import Callable, Optional, List, Dict, Any
+
+logger = logging.getLogger("EventDispatcher")
+
+# Platzhalter: Listener übernimmt das block_timeout des Dispatchers
+_DEFAULT_TIMEOUT = object()
+
+
+class OverflowPolicy:
+    """Verhalten, wenn die Queue eines Listeners voll ist."""
+    BLOCK = "block"              # Produzent wartet (max. block_timeout, None = unbegrenzt), danach wird verworfen
+    DROP_OLDEST = "drop_oldest"  # Ältestes Event fliegt raus
+    COALESCE = "coalesce"        # Neues Event wird mit dem letzten zusammengeführt (sonst: 'fallback')
+    # Unabhängig von der Policy: Events, für die keep_fn True liefert, werden nie verworfen
+    # (siehe EventDispatcher.add_listener).
+
+    ALL = (BLOCK, DROP_OLDEST, COALESCE)
+
+
+class _ListenerQueue:
+    """Interne, begrenzte Queue eines einzelnen Listeners inkl. Zähler."""
+    __slots__ = ("callback", "name", "events", "max_size", "policy", "fallback", "coalesce_fn", "filter_fn",
+                 "block_timeout", "keep_fn", "kept",
+                 "scheduled", "not_full", "processed", "dropped", "coalesced", "overflow", "errors", "max_depth")
+
+    def __init__(self, callback, name, max_size, policy, coalesce_fn, lock, filter_fn=None,
+                 fallback=OverflowPolicy.BLOCK, block_timeout=1.0, keep_fn=None):
+        self.callback = callback
+        self.name = name
+        self.events = deque()
+        self.max_size = max_size
+        self.policy = policy
+        self.fallback = fallback  # Für nicht kombinierbare Events bei COALESCE (BLOCK oder DROP_OLDEST)
+        self.coalesce_fn = coalesce_fn
+        self.filter_fn = filter_fn  # Event -> bool; False = landet gar nicht erst in der Queue
+        self.block_timeout = block_timeout  # Wartezeit bei BLOCK, None = verlustfrei (wartet bis Platz ist)
+        self.keep_fn = keep_fn  # Event -> bool; True = nie verwerfen, nie warten (notfalls über max_size)
+        self.kept = 0  # Anzahl geschützter Events in 'events'
+        self.scheduled = False  # Liegt gerade in der Ready-Queue oder wird bearbeitet
+        self.not_full = threading.Condition(lock)
+
+        self.processed = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.overflow = 0  # Wichtige Events, die über max_size hinaus eingereiht wurden
+        self.errors = 0
+        self.max_depth = 0
+
+
+class EventDispatcher:
+    """
+    Verteilt Events mit einem festen Worker-Pool an registrierte Listener.
+
+    Jeder Listener hat eine eigene, begrenzte Queue. Ein Listener wird immer nur
+    von einem Worker gleichzeitig bearbeitet, dadurch bleibt die Reihenfolge der
+    Events pro Listener erhalten.
+    """
+
+    def __init__(self, workers=4, max_queue=1000, policy=OverflowPolicy.BLOCK,
+                 block_timeout=1.0, name="EventDispatcher"):
+        if policy not in OverflowPolicy.ALL:
+            raise ValueError(f"Unbekannte Overflow-Policy: {policy}")
+        self.name = name
+        self.worker_count = max(1, int(workers))
+        self.default_max_queue = max(1, int(max_queue))
+        self.default_policy = policy
+        self.block_timeout = block_timeout
+
+        self._lock = threading.Lock()
+        self._work_available = threading.Condition(self._lock)
+        self._ready: deque = deque()
+        self._listeners: List[_ListenerQueue] = []
+        self._workers: List[threading.Thread] = []
+        self._running = False
+        self._generation = 0
+
+    # --- LISTENER VERWALTUNG ---
+    def add_listener(self, callback: Callable[[Any], None], max_queue: Optional[int] = None,
+                     policy: Optional[str] = None, coalesce_fn: Optional[Callable] = None, name: str = None,
+                     filter_fn: Optional[Callable[[Any], bool]] = None, fallback: str = OverflowPolicy.BLOCK,
+                     block_timeout=_DEFAULT_TIMEOUT, keep_fn: Optional[Callable[[Any], bool]] = None):
+        """
+        Registriert einen Listener.
+        :param max_queue: Maximale Anzahl wartender Events für diesen Listener.
+        :param policy: OverflowPolicy.BLOCK / DROP_OLDEST / COALESCE.
+        :param coalesce_fn: (alt, neu) -> zusammengeführtes Event oder None, falls nicht kombinierbar.
+        :param filter_fn: event -> bool. Nur Events mit True werden für diesen Listener eingereiht.
+        :param fallback: Bei COALESCE das Verhalten für nicht kombinierbare Events (BLOCK / DROP_OLDEST).
+                         Produzenten, die nie warten dürfen (z.B. asyncio-Loop), nehmen DROP_OLDEST.
+        :param block_timeout: Wartezeit bei BLOCK für diesen Listener (Standard: die des Dispatchers).
+                              None = der Produzent wartet, bis Platz ist; nichts wird verworfen.
+        :param keep_fn: event -> bool. Wichtige Events (z.B. Gifts, Subs, Bits) mit True werden bei voller
+                        Queue weder verworfen noch blockieren sie den Produzenten: DROP_OLDEST verdrängt nur
+                        unwichtige Events, notfalls wird über max_size hinaus eingereiht ('overflow').
+        """
+        policy = policy or self.default_policy
+        if policy not in OverflowPolicy.ALL:
+            raise ValueError(f"Unbekannte Overflow-Policy: {policy}")
+        if fallback not in (OverflowPolicy.BLOCK, OverflowPolicy.DROP_OLDEST):
+            raise ValueError(f"Ungültiger Fallback für COALESCE: {fallback}")
+        size = max(1, int(max_queue or self.default_max_queue))
+        label = name or getattr(callback, "__qualname__", repr(callback))
+
+        with self._lock:
+            if block_timeout is _DEFAULT_TIMEOUT:
+                block_timeout = self.block_timeout
+            lq = _ListenerQueue(callback, label, size, policy, coalesce_fn, self._lock, filter_fn, fallback,
+                                block_timeout, keep_fn)
+            self._listeners.append(lq)
+        return lq
+
+    def remove_listener(self, callback):
+        with self._lock:
+            self._listeners = [lq for lq in self._listeners if lq.callback != callback]
+
+    # --- LIFECYCLE ---
+    def start(self):
+        with self._lock:
+            if self._running: return
+            self._running = True
+            self._generation += 1
+            self._workers = []
+            for i in range(self.worker_count):
+                t = threading.Thread(target=self._worker_loop, args=(self._generation,), daemon=True,
+                                     name=f"{self.name}-{i + 1}")
+                self._workers.append(t)
+                t.start()
+
+    def stop(self):
+        """Beendet die Worker. Noch wartende Events werden verworfen."""
+        with self._lock:
+            self._running = False
+            for lq in self._listeners:
+                lq.dropped += len(lq.events)
+                lq.events.clear()
+                lq.kept = 0
+                lq.scheduled = False
+                lq.not_full.notify_all()
+            self._ready.clear()
+            self._work_available.notify_all()
+
+    # --- PRODUZENT ---
+    def dispatch(self, event):
+        """
+        Legt das Event in die Queue jedes Listeners (nicht blockierend, außer bei Policy BLOCK).
+        Vor start() bzw. nach stop() wird das Event verworfen und gezählt, ein gestoppter
+        Dispatcher startet nicht heimlich wieder.
+        """
+        with self._lock:
+            if not self._running:
+                for lq in self._listeners:
+                    if lq.filter_fn is None or lq.filter_fn(event):
+                        lq.dropped += 1
+                return
+            for lq in list(self._listeners):
+                self._enqueue(lq, event)
+
+    def _enqueue(self, lq: _ListenerQueue, event):
+        # Lock wird vom Aufrufer gehalten
+        if lq.filter_fn is not None and not lq.filter_fn(event):
+            return
+        keep = lq.keep_fn is not None and lq.keep_fn(event)
+        if len(lq.events) >= lq.max_size:
+            policy = lq.policy
+            if policy == OverflowPolicy.COALESCE:
+                if self._try_coalesce(lq, event):
+                    return
+                policy = lq.fallback
+
+            if policy == OverflowPolicy.DROP_OLDEST:
+                if not self._drop_oldest(lq):
+                    # Queue besteht nur aus wichtigen Events
+                    if not keep:
+                        lq.dropped += 1
+                        return
+                    self._overflow(lq, event)
+
+            elif keep:
+                self._overflow(lq, event)
+
+            else:
+                # BLOCK
+                lq.not_full.wait_for(lambda: len(lq.events) < lq.max_size or not self._running,
+                                     timeout=lq.block_timeout)
+                if len(lq.events) >= lq.max_size or not self._running:
+                    lq.dropped += 1
+                    if self._running:
+                        logger.warning(f"Queue von {lq.name} voll ({lq.max_size}), Event verworfen: {event!r}")
+                    return
+
+        lq.events.append(event)
+        if keep:
+            lq.kept += 1
+        if len(lq.events) > lq.max_depth:
+            lq.max_depth = len(lq.events)
+
+        if not lq.scheduled:
+            lq.scheduled = True
+            self._ready.append(lq)
+            self._work_available.notify()
+
+    def _drop_oldest(self, lq: _ListenerQueue):
+        """Verwirft das älteste Event, das nicht per keep_fn geschützt ist. False, falls es keines gibt."""
+        if lq.keep_fn is None:
+            lq.events.popleft()
+        elif lq.kept >= min(len(lq.events), lq.max_size):
+            # Nur noch (bzw. schon max_size) geschützte Events: nicht weiter durchsuchen
+            return False
+        else:
+            for i, queued in enumerate(lq.events):
+                if not lq.keep_fn(queued):
+                    del lq.events[i]
+                    break
+        lq.dropped += 1
+        return True
+
+    def _overflow(self, lq: _ListenerQueue, event):
+        """Wichtiges Event über max_size hinaus einreihen (Warnung beim ersten und jedem 1000. Überlauf)."""
+        lq.overflow += 1
+        if lq.overflow % 1000 == 1:
+            logger.warning(f"Queue von {lq.name} voll ({lq.max_size}), wichtiges Event trotzdem eingereiht "
+                           f"(Überlauf bisher: {lq.overflow}): {event!r}")
+
+    def _try_coalesce(self, lq: _ListenerQueue, event):
+        if not lq.coalesce_fn or not lq.events:
+            return False
+        try:
+            merged = lq.coalesce_fn(lq.events[-1], event)
+        except Exception as e:
+            logger.error(f"Fehler beim Zusammenführen für {lq.name}: {e}")
+            return False
+        if merged is None:
+            return False
+        if lq.keep_fn is not None:
+            lq.kept += lq.keep_fn(merged) - lq.keep_fn(lq.events[-1])
+        lq.events[-1] = merged
+        lq.coalesced += 1
+        return True
+
+    # --- WORKER ---
+    def _worker_loop(self, generation):
+        while True:
+            with self._lock:
+                while self._running and generation == self._generation and not self._ready:
+                    self._work_available.wait()
+                if not self._running or generation != self._generation:
+                    return
+                lq = self._ready.popleft()
+                if not lq.events:
+                    lq.scheduled = False
+                    continue
+                event = lq.events.popleft()
+                if lq.keep_fn is not None and lq.keep_fn(event):
+                    lq.kept -= 1
+                lq.not_full.notify()
+
+            try:
+                lq.callback(event)
+            except Exception as e:
+                lq.errors += 1
+                logger.error(f"Fehler im Event-Listener {lq.name}: {e}")
+
+            with self._lock:
+                lq.processed += 1
+                if generation != self._generation:
+                    return  # Dispatcher wurde zwischenzeitlich neu gestartet
+                # Ein Event pro Durchlauf, dann hinten anstellen (Fairness zwischen Listenern)
+                if lq.events and self._running:
+                    self._ready.append(lq)
+                    self._work_available.notify()
+                else:
+                    lq.scheduled = False
+
+    # --- METRIKEN ---
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue-Tiefe und Zähler pro Listener."""
+        with self._lock:
+            listeners = [{
+                "name": lq.name,
+                "policy": lq.policy,
+                "queue_depth": len(lq.events),
+                "max_queue": lq.max_size,
+                "max_depth": lq.max_depth,
+                "processed": lq.processed,
+                "dropped": lq.dropped,
+                "coalesced": lq.coalesced,
+                "overflow": lq.overflow,
+                "errors": lq.errors
+            } for lq in self._listeners]
+            return {
+                "workers": self.worker_count,
+                "running": self._running,
+                "queue_depth": sum(l["queue_depth"] for l in listeners),
+                "dropped": sum(l["dropped"] for l in listeners),
+                "listeners": listeners
+            }
@@ -0,0 +1,163 @@
+import re
+from typing import Dict, List, Optional
+
+# IRCv3 Tag-Escaping: \: -> ;   \s -> Leerzeichen   \\ -> \   \r, \n
+_TAG_ESCAPES = {":": ";", "s": " ", "\\": "\\", "r": "\r", "n": "\n"}
+_TAG_ESCAPE_RE = re.compile(r"\\(.?)")
+
+
+def _unescape_tag(value: str) -> str:
+    if "\\" not in value:
+        return value
+    return _TAG_ESCAPE_RE.sub(lambda m: _TAG_ESCAPES.get(m.group(1), m.group(1)), value)
+
+
+class IrcMessage:
+    """
+    Eine geparste IRC-Zeile: @tags :prefix COMMAND param1 param2 :trailing
+
+    Tags werden nicht vorab zerlegt: tag() sucht den einzelnen Key direkt im Roh-String
+    und entschlüsselt nur diesen Wert. Die meisten Zeilen (JOIN, PING, Zahlen-Codes)
+    brauchen gar keine Tags, Handler lesen meist nur zwei oder drei davon.
+    """
+    __slots__ = ("raw_tags", "_tags", "prefix", "command", "params", "trailing")
+
+    def __init__(self, raw_tags, prefix, command, params, trailing):
+        self.raw_tags: Optional[str] = raw_tags
+        self._tags: Optional[Dict[str, str]] = None
+        self.prefix: Optional[str] = prefix
+        self.command: str = command
+        self.params: List[str] = params
+        self.trailing: Optional[str] = trailing
+
+    def tag(self, key: str, default=None):
+        """Wert eines einzelnen Tags (entschlüsselt), ohne alle Tags zu zerlegen."""
+        raw = self.raw_tags
+        if not raw:
+            return default
+        needle = key + "="
+        if raw.startswith(needle):
+            start = len(needle)
+        else:
+            idx = raw.find(";" + needle)
+            if idx < 0:
+                # Tag ohne Wert ("key" statt "key=") zählt laut IRCv3 als leerer String
+                bare = raw == key or raw.startswith(key + ";") or raw.endswith(";" + key) or f";{key};" in raw
+                return "" if bare else default
+            start = idx + 1 + len(needle)
+        end = raw.find(";", start)
+        return _unescape_tag(raw[start:] if end < 0 else raw[start:end])
+
+    def has_tag(self, key: str) -> bool:
+        return self.tag(key) is not None
+
+    @property
+    def tags(self) -> Dict[str, str]:
+        """Alle Tags als Dict (wird beim ersten Zugriff aufgebaut)."""
+        tags = self._tags
+        if tags is None:
+            tags = {}
+            if self.raw_tags:
+                for item in self.raw_tags.split(";"):
+                    key, _, value = item.partition("=")
+                    if key:
+                        tags[key] = _unescape_tag(value)
+            self._tags = tags
+        return tags
+
+    @property
+    def nick(self) -> Optional[str]:
+        if not self.prefix:
+            return None
+        return self.prefix.partition("!")[0]
+
+    @property
+    def channel(self) -> Optional[str]:
+        if self.params and self.params[0].startswith("#"):
+            return self.params[0][1:]
+        return None
+
+    def __repr__(self):
+        return f"IrcMessage({self.command} {self.params} trailing={self.trailing!r})"
+
+
+def parse_line(line: str) -> Optional[IrcMessage]:
+    """Zerlegt eine IRC-Zeile in einem Durchlauf. Gibt None für leere/kaputte Zeilen zurück."""
+    pos = 0
+    raw_tags = None
+    if line.startswith("@"):
+        end = line.find(" ")
+        if end < 0:
+            return None
+        raw_tags = line[1:end]
+        pos = end + 1
+
+    prefix = None
+    if line.startswith(":", pos):
+        end = line.find(" ", pos)
+        if end < 0:
+            return None
+        prefix = line[pos + 1:end]
+        pos = end + 1
+
+    trailing = None
+    end = line.find(" :", pos)
+    if end >= 0:
+        trailing = line[end + 2:]
+        params = line[pos:end].split()
+    else:
+        params = line[pos:].split()
+
+    if not params:
+        return None
+    return IrcMessage(raw_tags, prefix, params[0], params[1:], trailing)
+
+
+if __name__ == "__main__":
+    # Micro-Benchmark: python -m external.irc_parser
+    # Vergleicht den alten split-basierten Parser mit parse_line über mitgeschnittenen Twitch-Traffic.
+    import timeit
+
+    SAMPLE_TRAFFIC = [
+        "@badge-info=;badges=broadcaster/1;color=#9146FF;display-name=StreamForge;emotes=;first-msg=0;flags=;id=1a2b3c4d-0000-4e5f-8a9b-0c1d2e3f4a5b;mod=0;returning-chatter=0;room-id=123456789;subscriber=0;tmi-sent-ts=1767493830283;turbo=0;user-id=123456789;user-type= :streamforge!streamforge@streamforge.tmi.twitch.tv PRIVMSG #streamforge :!score",
+        "@badge-info=subscriber/14;badges=subscriber/12,sub-gifter/50;color=#1E90FF;display-name=Zuschauer_42;emotes=;first-msg=0;flags=;id=5f6e7d8c-1111-4a2b-9c3d-4e5f6a7b8c9d;mod=0;returning-chatter=0;room-id=123456789;subscriber=1;tmi-sent-ts=1767493831550;turbo=0;user-id=987654321;user-type= :zuschauer_42!zuschauer_42@zuschauer_42.tmi.twitch.tv PRIVMSG #streamforge :Wie läuft's heute? 🎉 PRIVMSG im Text",
+        "@badge-info=;badges=bits/1000;bits=500;color=;display-name=BitSpender;emotes=;flags=;id=9a8b7c6d-2222-4e5f-8a9b-1c2d3e4f5a6b;mod=0;room-id=123456789;subscriber=0;tmi-sent-ts=1767493832001;turbo=0;user-id=555;user-type= :bitspender!bitspender@bitspender.tmi.twitch.tv PRIVMSG #streamforge :Cheer500 Viel Glück!",
+        "@badge-info=subscriber/3;badges=subscriber/3;color=#FF4500;display-name=Neuling;emotes=;flags=;id=abcd;login=neuling;mod=0;msg-id=resub;msg-param-cumulative-months=3;msg-param-sub-plan=1000;msg-param-sub-plan-name=Channel\\sSubscription\\s(streamforge);room-id=123456789;subscriber=1;system-msg=Neuling\\ssubscribed\\sat\\sTier\\s1.;tmi-sent-ts=1767493833000;user-id=777;user-type= :tmi.twitch.tv USERNOTICE #streamforge :Drei Monate!",
+        "@badge-info=;badges=;color=;display-name=Gifter;emotes=;flags=;id=efgh;login=gifter;mod=0;msg-id=submysterygift;msg-param-mass-gift-count=20;msg-param-origin-id=6c\\s2b\\s1a;msg-param-sub-plan=1000;room-id=123456789;subscriber=0;system-msg=Gifter\\sis\\sgifting\\s20\\sTier\\s1\\sSubs!;tmi-sent-ts=1767493834000;user-id=888;user-type= :tmi.twitch.tv USERNOTICE #streamforge",
+        "@badge-info=;badges=moderator/1;color=;display-name=StreamForge;emote-sets=0;mod=1;subscriber=0;user-type=mod :tmi.twitch.tv USERSTATE #streamforge",
+        ":zuschauer_7!zuschauer_7@zuschauer_7.tmi.twitch.tv JOIN #streamforge",
+        ":tmi.twitch.tv 001 streamforge :Welcome, GLHF!",
+        "PING :tmi.twitch.tv",
+    ]
+
+    def legacy_parse(line):
+        tags = {}
+        if line.startswith("@"):
+            parts = line.split(" ", 1)
+            tag_str = parts[0][1:]
+            line = parts[1]
+            for item in tag_str.split(";"):
+                if "=" in item:
+                    k, v = item.split("=", 1)
+                    tags[k] = v
+        command = None
+        if "PRIVMSG" in line:
+            command = line.split("PRIVMSG", 1)[1].split(":", 1)[1].strip().split(" ")[0].lower()
+        return tags, command
+
+    def new_parse(line):
+        msg = parse_line(line)
+        if msg.command == "PRIVMSG":
+            msg.tag("display-name")
+            msg.tag("bits")
+            msg.trailing.split(" ", 1)[0].lower()
+        elif msg.command == "USERNOTICE":
+            msg.tag("msg-id")
+            msg.tag("display-name")
+        return msg
+
+    for label, func in (("legacy split", legacy_parse), ("parse_line", new_parse)):
+        runs = 20000
+        total = timeit.timeit(lambda: [func(l) for l in SAMPLE_TRAFFIC], number=runs)
+        per_line = total / (runs * len(SAMPLE_TRAFFIC)) * 1e6
+        print(f"{label:>14}: {per_line:.2f} µs/Zeile")
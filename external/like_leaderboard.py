@@ -0,0 +1,137 @@
+import json
+import os
+import sys
+import time
+from array import array
+from typing import Dict, List, Optional
+
+# Anzahl der Plätze, die laufend sortiert gehalten werden
+TOP_K = 50
+# Nach so vielen Delta-Zeilen wird das Log zu einem einzigen Snapshot zusammengefasst
+COMPACT_AFTER_LINES = 500
+
+
+class LikeLeaderboard:
+    """
+    Like-Zähler pro User mit laufend gepflegter Top-K Liste.
+
+    - User-IDs werden einmal auf einen Index abgebildet (interned), die Zähler liegen
+      kompakt in einem array statt in einem Dict aus Python-Ints.
+    - Die Top-K Liste wird bei jedem Like inkrementell nachsortiert (Zähler steigen nur),
+      eine Abfrage kostet daher nichts.
+    - Protokolliert werden nur die seit dem letzten Mal geänderten User (Delta-Log, JSON Lines).
+
+    Nicht thread-safe: Der Aufrufer (TikTokLive_API) hält seinen Lock.
+    """
+
+    def __init__(self, top_k=TOP_K):
+        self.top_k = top_k
+        self._index: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._names: List[str] = []
+        self._counts = array("q")
+        self._top: List[int] = []  # Indizes, absteigend nach Zähler
+        self._dirty = set()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, user_id: str, amount: int, nickname: Optional[str] = None) -> int:
+        """Zählt Likes für einen User. Gibt seinen neuen Stand zurück."""
+        idx = self._index.get(user_id)
+        if idx is None:
+            user_id = sys.intern(user_id)
+            idx = len(self._ids)
+            self._index[user_id] = idx
+            self._ids.append(user_id)
+            self._names.append(nickname or user_id)
+            self._counts.append(0)
+        elif nickname:
+            self._names[idx] = nickname
+
+        count = self._counts[idx] + amount
+        self._counts[idx] = count
+        self._dirty.add(idx)
+        self._update_top(idx, count)
+        return count
+
+    def get(self, user_id: str) -> int:
+        idx = self._index.get(user_id)
+        return self._counts[idx] if idx is not None else 0
+
+    def _update_top(self, idx, count):
+        top = self._top
+        counts = self._counts
+        if idx in top:
+            pos = top.index(idx)
+        elif len(top) < self.top_k:
+            top.append(idx)
+            pos = len(top) - 1
+        elif count > counts[top[-1]]:
+            top[-1] = idx
+            pos = len(top) - 1
+        else:
+            return
+        # Nach oben wandern lassen, bis die Reihenfolge wieder stimmt
+        while pos > 0 and counts[top[pos - 1]] < count:
+            top[pos] = top[pos - 1]
+            pos -= 1
+        top[pos] = idx
+
+    def top(self, limit=10):
+        return [{"rank": rank, "user_id": self._ids[idx], "nickname": self._names[idx],
+                 "likes": self._counts[idx]}
+                for rank, idx in enumerate(self._top[:max(0, limit)], start=1)]
+
+    def take_delta(self) -> Dict[str, int]:
+        """Geänderte User seit dem letzten Aufruf (absolute Stände, dadurch beim Einlesen idempotent)."""
+        dirty = self._dirty
+        self._dirty = set()
+        return {self._ids[idx]: self._counts[idx] for idx in dirty}
+
+    def snapshot(self) -> Dict[str, int]:
+        return {uid: self._counts[idx] for uid, idx in self._index.items()}
+
+
+class LikeDeltaLog:
+    """
+    Protokoll (JSON Lines) des Like-Stands der laufenden Verbindung, kein dauerhafter Speicher.
+
+    Wie vorher der Like-Zähler beginnt es bei jedem Verbindungsstart neu (start_session
+    überschreibt die Datei), beim Start wird nichts daraus wiederhergestellt.
+    Erste Zeile: Session-Header. Danach pro Speichern eine Zeile mit Room-Total und den
+    absoluten Ständen der geänderten User. Wird das Log zu lang, wird es durch eine
+    einzelne Snapshot-Zeile ersetzt.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lines = 0
+
+    def start_session(self, streamer):
+        self._write_lines([{"session": time.time(), "streamer": streamer}], mode="w")
+        self._lines = 0
+
+    def append(self, total_likes, delta: Dict[str, int]):
+        self._write_lines([{"ts": round(time.time(), 3), "total": total_likes, "users": delta}], mode="a")
+        self._lines += 1
+
+    def needs_compaction(self):
+        return self._lines >= COMPACT_AFTER_LINES
+
+    def compact(self, streamer, total_likes, snapshot: Dict[str, int]):
+        """Ersetzt das Log atomar durch Header + eine Zeile mit allen Ständen."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in ({"session": time.time(), "streamer": streamer},
+                          {"ts": round(time.time(), 3), "total": total_likes, "users": snapshot}):
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._lines = 1
+
+    def _write_lines(self, entries, mode):
+        with open(self.path, mode, encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
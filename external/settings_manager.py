@@ -1,23 +1,79 @@
 import json
 import os
 import sys
+import time
+import atexit
 import logging
+import tempfile
+import threading
+import weakref
+from collections.abc import Mapping
+from types import MappingProxyType
 
 # Logger konfigurieren
 logger = logging.getLogger("SettingsManager")
 
+# Wie oft (in Sekunden) höchstens per stat() geprüft wird, ob die Datei extern geändert wurde
+CHANGE_CHECK_INTERVAL = 1.0
+
+# Alle Manager mit Write-Behind, damit beim Beenden nichts verloren geht
+_write_behind_managers = weakref.WeakSet()
+
+
+def _freeze(value):
+    """Wandelt dicts/Listen rekursiv in unveränderliche Gegenstücke um."""
+    if isinstance(value, Mapping):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value):
+    """Erzeugt aus einem Snapshot wieder eine normale, veränderbare Kopie."""
+    if isinstance(value, Mapping):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+
+def flush_all():
+    """Schreibt alle noch ausstehenden Write-Behind Änderungen sofort auf die Platte."""
+    for manager in list(_write_behind_managers):
+        manager.flush()
+
+
+atexit.register(flush_all)
+
 
 class SettingsManager:
-    def __init__(self, file_path, default_settings=None):
+    def __init__(self, file_path, default_settings=None, write_delay=None):
         """
         Initialisiert den SettingsManager.
         :param file_path: Relativer Pfad zur JSON-Datei (z.B. 'twitch_settings.json' oder 'like_overlay/settings.json').
         :param default_settings: (Optional) Standardwerte.
+        :param write_delay: (Optional) Write-Behind in Sekunden. Mehrere Speichervorgänge innerhalb
+                            dieses Fensters werden zu einem einzigen Schreibvorgang zusammengefasst.
         """
         self.default_settings = default_settings if default_settings else {}
         # Pfad sofort beim Start korrekt auflösen (Exe vs. Dev Umgebung)
         self.file_path = self._resolve_path(file_path)
 
+        # In-Memory Cache (unveränderlicher Snapshot + Datei-Stempel zur Änderungserkennung)
+        self._lock = threading.RLock()
+        self._snapshot = None
+        self._file_stamp = None
+        self._last_check = 0.0
+
+        # Write-Behind
+        self.write_delay = write_delay
+        self._dirty = False
+        self._flush_timer = None
+        self._base = None  # Stand vor den noch nicht geschriebenen Änderungen (für den Konflikt-Merge)
+        if write_delay:
+            _write_behind_managers.add(self)
+
     def _resolve_path(self, path):
         """
         Entscheidet, wo die Datei liegt:
@@ -50,12 +106,48 @@ class SettingsManager:
             # Entwickler-Modus (keine EXE)
             return os.path.abspath(path)
 
+    def _read_stamp(self):
+        """(mtime, Größe) der Datei oder None, falls sie nicht existiert."""
+        try:
+            st = os.stat(self.file_path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def get_snapshot(self):
+        """
+        Gibt die Einstellungen als unveränderlichen Snapshot aus dem Speicher zurück.
+        Die Datei wird höchstens alle CHANGE_CHECK_INTERVAL Sekunden per stat() geprüft
+        und nur bei Änderung (mtime/Größe) neu eingelesen.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._last_check < CHANGE_CHECK_INTERVAL:
+            return snapshot
+
+        with self._lock:
+            # Solange ungespeicherte Änderungen anstehen, ist der Cache maßgeblich
+            if self._snapshot is None or (not self._dirty and self._read_stamp() != self._file_stamp):
+                self._snapshot = _freeze(self._read_from_disk())
+                self._file_stamp = self._read_stamp()
+            self._last_check = time.monotonic()
+            return self._snapshot
+
     def load_settings(self):
-        """Lädt die Einstellungen. Erstellt Datei neu bei Fehler/Fehlen."""
+        """Lädt die Einstellungen als veränderbare Kopie (aus dem Cache)."""
+        return _thaw(self.get_snapshot())
+
+    def invalidate(self):
+        """Verwirft den Cache, der nächste Zugriff liest die Datei neu."""
+        with self._lock:
+            self._snapshot = None
+            self._file_stamp = None
+
+    def _read_from_disk(self):
+        """Liest die Datei. Erstellt sie neu bei Fehler/Fehlen."""
         # 1. Existenz prüfen (Pfad ist bereits aufgelöst)
         if not os.path.exists(self.file_path):
             logger.warning(f"Datei nicht gefunden: {self.file_path}. Erstelle neu...")
-            self.save_settings(self.default_settings)
+            self._write_to_disk(self.default_settings)
             return self.default_settings
 
         # 2. Laden
@@ -67,18 +159,104 @@ class SettingsManager:
                 return data
         except (FileNotFoundError, json.JSONDecodeError) as e:
             logger.error(f"Fehler beim Laden von {self.file_path} ({e}). Reset.")
-            self.save_settings(self.default_settings)
+            self._write_to_disk(self.default_settings)
             return self.default_settings
 
     def save_settings(self, settings):
-        """Speichert die Einstellungen."""
+        """
+        Speichert die Einstellungen (Cache wird sofort aktualisiert).
+        Mit write_delay wird das Schreiben verzögert und gebündelt, sonst sofort geschrieben.
+        """
+        with self._lock:
+            previous = self._snapshot
+            self._snapshot = _freeze(settings)
+            self._last_check = time.monotonic()
+
+            if not self.write_delay:
+                self._write_to_disk(self._snapshot)
+                self._file_stamp = self._read_stamp()
+                return
+
+            if not self._dirty:
+                self._base = previous if previous is not None else MappingProxyType({})
+            self._dirty = True
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.write_delay, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self):
+        """Schreibt ausstehende Änderungen sofort (z.B. beim Beenden der App)."""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._dirty:
+                return
+            self._dirty = False
+            # Wurde die Datei im Write-Behind-Fenster von außen geändert, nicht einfach überschreiben
+            if self._read_stamp() != self._file_stamp:
+                self._snapshot = self._merge_external(self._snapshot)
+            self._base = None
+            self._write_to_disk(self._snapshot)
+            self._file_stamp = self._read_stamp()
+
+    def _merge_external(self, snapshot):
+        """
+        Führt eine extern geänderte Datei mit den eigenen, noch ungeschriebenen Änderungen zusammen.
+        Basis ist der Dateiinhalt; nur die Top-Level-Keys, die seit dem letzten Schreiben lokal
+        geändert wurden, werden darüber gelegt. Beide Seiten geändert -> lokal gewinnt (Warnung).
+        """
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                external = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"{self.file_path} wurde extern geändert, ist aber nicht lesbar ({e}). Schreibe eigenen Stand.")
+            return snapshot
+        if not isinstance(external, dict):
+            return snapshot
+
+        base = self._base if self._base is not None else MappingProxyType({})
+        merged = dict(_freeze(external))
+        conflicts = []
+        for key in set(snapshot) | set(base):
+            if snapshot.get(key) == base.get(key):
+                continue  # Lokal unverändert -> externer Stand bleibt
+            if key in merged and merged[key] != base.get(key) and merged[key] != snapshot.get(key):
+                conflicts.append(key)
+            if key in snapshot:
+                merged[key] = snapshot[key]
+            else:
+                merged.pop(key, None)
+
+        if conflicts:
+            logger.warning(f"Konflikt in {self.file_path}: extern und lokal geändert ({', '.join(sorted(map(str, conflicts)))}). "
+                           f"Lokale Werte werden übernommen.")
+        else:
+            logger.info(f"{self.file_path} wurde extern geändert, Änderungen zusammengeführt.")
+        return MappingProxyType(merged)
+
+    def _write_to_disk(self, settings):
+        """Atomares Schreiben: Temp-Datei im selben Ordner, danach umbenennen."""
+        tmp_path = None
         try:
             # Ordnerstruktur sicherstellen (wichtig für Unterordner wie 'like_overlay')
             directory = os.path.dirname(self.file_path)
             if directory and not os.path.exists(directory):
                 os.makedirs(directory, exist_ok=True)
 
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                json.dump(settings, f, indent=4)
+            fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=directory or None)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(_thaw(settings), f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.file_path)
+            tmp_path = None
         except Exception as e:
-            logger.error(f"Konnte Einstellungen nicht speichern in {self.file_path}: {e}")
\ No newline at end of file
+            logger.error(f"Konnte Einstellungen nicht speichern in {self.file_path}: {e}")
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
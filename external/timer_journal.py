@@ -0,0 +1,186 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger("TimerJournal")
+
+# Group-Commit: Gepufferte Einträge werden spätestens nach FLUSH_INTERVAL Sekunden
+# gemeinsam geschrieben und mit einem einzigen fsync gesichert.
+FLUSH_INTERVAL = 0.5
+# So oft wird bei laufendem Timer ein Snapshot geschrieben (begrenzt, wie viel Countdown
+# nach einem Absturz fehlen kann)
+SNAPSHOT_INTERVAL = 30.0
+# Ab so vielen Einträgen nach dem letzten Snapshot wird die Datei auf einen Snapshot verkürzt
+COMPACT_AFTER_LINES = 2000
+
+
+class TimerJournal:
+    """
+    Append-only Journal (JSON Lines) für die Restzeit des Subathon-Timers.
+
+    Zeilen:
+    - Snapshot: {"snap": Restzeit, "r": Rate, "m": monotone Zeit, "t": Wall-Clock}
+    - Änderung: {"e": "add"|"set"|"rate", "d": Delta bzw. neuer Wert, "c": Ursache,
+                 "r": Rate danach, "m": monotone Zeit}
+
+    record() hängt nur an eine deque an (kein I/O im Event-Hotpath). Ein Hintergrund-Thread
+    schreibt die gesammelten Zeilen gebündelt (Group-Commit, ein fsync pro Batch) und legt
+    regelmäßig Snapshots ab. Beim Start liefert replay() die Restzeit aus dem letzten
+    Snapshot plus den Einträgen danach.
+    """
+
+    def __init__(self, path, snapshot_func, state_lock):
+        """
+        :param snapshot_func: () -> (Restzeit, Rate) des Timers
+        :param state_lock: Lock, unter dem der Timer seine Änderungen per record() meldet.
+                           Snapshots werden unter demselben Lock in den Puffer gelegt, damit
+                           ihre Reihenfolge zu den Änderungen passt.
+        """
+        self.path = path
+        self.snapshot_func = snapshot_func
+        self._state_lock = state_lock
+        self._buffer = deque()
+        self._io_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._lines_since_snapshot = 0
+        self._last_snapshot = 0.0
+        self._thread = None
+        self._running = False
+
+    # --- SCHREIBEN ---
+    def record(self, event, delta, rate, cause=""):
+        """Merkt eine Änderung vor (Hotpath: nur ein append, Aufrufer hält state_lock)."""
+        self._buffer.append({"e": event, "d": round(delta, 3), "c": cause, "r": rate,
+                             "m": round(time.monotonic(), 3)})
+
+    def start(self):
+        """Beginnt eine neue Sitzung mit einem Snapshot und startet den Schreib-Thread."""
+        if self._thread is not None:
+            return
+        self.write_snapshot(compact=True)
+        self._running = True
+        self._thread = threading.Thread(target=self._flush_loop, daemon=True, name="TimerJournal")
+        self._thread.start()
+        atexit.register(self.shutdown)
+
+    def _flush_loop(self):
+        while self._running:
+            self._wakeup.wait(FLUSH_INTERVAL)
+            self._wakeup.clear()
+            if time.monotonic() - self._last_snapshot >= SNAPSHOT_INTERVAL:
+                compact = self._lines_since_snapshot >= COMPACT_AFTER_LINES
+                # Bei stehendem Timer reicht der letzte Eintrag, nur laufende Zeit braucht Snapshots
+                if compact or self.snapshot_func()[1] > 0:
+                    self.write_snapshot(compact=compact)
+                    continue
+            self.flush()
+
+    def write_snapshot(self, compact=False):
+        """Legt einen Snapshot in den Puffer und schreibt. compact: Datei beginnt danach mit diesem Snapshot."""
+        with self._state_lock:
+            remaining, rate = self.snapshot_func()
+            self._buffer.append({"snap": round(remaining, 3), "r": rate, "m": round(time.monotonic(), 3),
+                                 "t": round(time.time(), 3)})
+        self.flush(compact)
+
+    def flush(self, compact=False):
+        """Schreibt alle gepufferten Einträge mit einem einzigen fsync."""
+        with self._io_lock:
+            entries = []
+            while self._buffer:
+                entries.append(self._buffer.popleft())
+            if not entries:
+                return
+            last_snap = max((i for i, e in enumerate(entries) if "snap" in e), default=None)
+            if compact and last_snap is not None:
+                entries = entries[last_snap:]
+            data = "".join(json.dumps(e, ensure_ascii=False, separators=(",", ":")) + "\n" for e in entries)
+            try:
+                if compact and last_snap is not None:
+                    # Atomar ersetzen: alte Einträge vor dem Snapshot werden nicht mehr gebraucht
+                    tmp_path = self.path + ".tmp"
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        f.write(data)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp_path, self.path)
+                else:
+                    self._append(data)
+            except OSError as e:
+                # Nichts verlieren: Einträge in Reihenfolge wieder vorne in den Puffer, nächster Versuch
+                # beim nächsten Flush (ein späterer Snapshot überdeckt die Lücke dann nicht)
+                self._buffer.extendleft(reversed(entries))
+                logger.error(f"Timer-Journal konnte nicht geschrieben werden ({len(entries)} Einträge behalten): {e}")
+                return
+            if last_snap is not None:
+                self._lines_since_snapshot = len(entries) - 1 - (0 if compact else last_snap)
+                self._last_snapshot = time.monotonic()
+            else:
+                self._lines_since_snapshot += len(entries)
+
+    def _append(self, data):
+        """Hängt an und fsynct. Schlägt das fehl, wird eine halb geschriebene Zeile wieder abgeschnitten."""
+        with open(self.path, "a", encoding="utf-8") as f:
+            start = f.tell()
+            try:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            except OSError:
+                try:
+                    f.truncate(start)
+                except OSError:
+                    pass
+                raise
+
+    def shutdown(self):
+        """Shutdown-Hook: Schreibt den Rest und einen letzten Snapshot."""
+        if not self._running:
+            return
+        self._running = False
+        self._wakeup.set()
+        self.write_snapshot()
+
+    # --- WIEDERHERSTELLEN ---
+    @staticmethod
+    def replay(path):
+        """
+        Restzeit zum Zeitpunkt des letzten Eintrags (oder None, wenn es kein Journal gibt).
+        Startet beim letzten Snapshot und wendet die Änderungen danach in Reihenfolge an;
+        der Countdown zwischen zwei Einträgen wird über Rate und monotone Zeit berechnet.
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return None
+
+        start = None
+        for i in range(len(lines) - 1, -1, -1):
+            if lines[i].startswith('{"snap"'):
+                start = i
+                break
+        if start is None:
+            return None
+
+        value = rate = last = None
+        for line in lines[start:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break  # Abgebrochene letzte Zeile (Absturz beim Schreiben)
+            if "snap" in entry:
+                value, rate, last = float(entry["snap"]), float(entry["r"]), entry["m"]
+                continue
+            value = max(0.0, value - rate * (entry["m"] - last))
+            last = entry["m"]
+            if entry["e"] == "add":
+                value = max(0.0, value + entry["d"])
+            elif entry["e"] == "set":
+                value = max(0.0, float(entry["d"]))
+            rate = float(entry["r"])
+        return value
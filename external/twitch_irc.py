@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import random
+import threading
+from typing import Callable, List, Optional
+
+logger = logging.getLogger("TwitchIRC")
+
+TWITCH_IRC_HOST = "irc.chat.twitch.tv"
+TWITCH_IRC_PORT = 6667
+
+READ_SIZE = 4096
+MAX_LINE_LENGTH = 64 * 1024  # Schutz gegen kaputte Gegenstellen ohne Zeilenende
+CONNECT_TIMEOUT = 10.0
+# Twitch sendet ca. alle 5 Minuten ein PING. Kommt länger gar nichts, gilt die Verbindung als tot.
+READ_TIMEOUT = 6 * 60.0
+
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """Exponentielles Backoff mit "Full Jitter": zufällig zwischen 0 und min(cap, base * 2^attempt)."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class LineFramer:
+    """
+    Zerlegt den Byte-Strom in IRC-Zeilen (getrennt durch CRLF).
+
+    Es wird auf Byte-Ebene geschnitten und erst die vollständige Zeile dekodiert,
+    dadurch gehen UTF-8 Zeichen, die über zwei recv()-Blöcke verteilt sind, nicht kaputt.
+    """
+    __slots__ = ("_buffer",)
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[str]:
+        buf = self._buffer
+        buf.extend(data)
+        lines = []
+        start = 0
+        while True:
+            end = buf.find(b"\r\n", start)
+            if end < 0:
+                break
+            if end > start:
+                lines.append(buf[start:end].decode("utf-8", errors="replace"))
+            start = end + 2
+        if start:
+            del buf[:start]
+        if len(buf) > MAX_LINE_LENGTH:
+            logger.warning(f"IRC Zeile ohne Ende ({len(buf)} Bytes) verworfen.")
+            buf.clear()
+        return lines
+
+
+class TwitchIrcClient:
+    """
+    Asyncio-Verbindung zum Twitch Chat in einem eigenen Thread.
+
+    Der Lese-Pfad beantwortet nur PINGs und reicht jede Zeile an 'on_line' weiter.
+    'on_line' muss sofort zurückkehren (z.B. EventDispatcher.dispatch), damit langsame
+    Handler (DB, Sounds) nie das Lesen vom Socket aufhalten.
+    """
+
+    def __init__(self, username: str, oauth_token: str, channel: str, on_line: Callable[[str], None],
+                 host: str = TWITCH_IRC_HOST, port: int = TWITCH_IRC_PORT):
+        self.username = username
+        self.oauth_token = oauth_token
+        self.channel = channel
+        self.on_line = on_line
+        self.host = host
+        self.port = port
+
+        self.connected = False
+        self.reconnects = 0
+        self._running = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # --- LIFECYCLE ---
+    def start(self):
+        if self._running: return
+        self._running = True
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, daemon=True, name="TwitchIRC")
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(self._shutdown)
+            except RuntimeError:
+                pass  # Loop wurde gerade beendet
+
+    def _shutdown(self):
+        if self._stop_event is not None:
+            self._stop_event.set()
+        self._close_writer()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._main())
+        finally:
+            self._loop.close()
+            self.connected = False
+
+    # --- SENDEN (thread-safe) ---
+    def send(self, line: str) -> bool:
+        """Schickt eine Roh-Zeile (ohne CRLF). Gibt False zurück, wenn gerade keine Verbindung besteht."""
+        loop = self._loop
+        if not self.connected or loop is None or loop.is_closed():
+            return False
+        try:
+            loop.call_soon_threadsafe(self._write, line)
+            return True
+        except RuntimeError:
+            return False
+
+    def _write(self, line: str):
+        writer = self._writer
+        if writer is None or writer.is_closing():
+            return
+        writer.write(line.encode("utf-8") + b"\r\n")
+
+    def _close_writer(self):
+        writer = self._writer
+        self._writer = None
+        if writer is not None and not writer.is_closing():
+            writer.close()
+
+    # --- VERBINDUNG ---
+    async def _main(self):
+        self._stop_event = asyncio.Event()
+        attempt = 0
+        while self._running:
+            try:
+                if await self._session():
+                    attempt = 0  # Login war erfolgreich -> Backoff zurücksetzen
+            except asyncio.TimeoutError:
+                logger.warning("Twitch IRC: Zeitüberschreitung, Verbindung wird neu aufgebaut.")
+            except (OSError, ConnectionError) as e:
+                logger.warning(f"Twitch IRC Verbindungsfehler: {e}")
+            except Exception as e:
+                logger.error(f"Twitch IRC Fehler: {e}")
+            finally:
+                self.connected = False
+                self._close_writer()
+
+            if not self._running:
+                break
+            delay = backoff_delay(attempt)
+            attempt += 1
+            self.reconnects += 1
+            logger.info(f"Twitch IRC: Neuer Versuch in {delay:.1f}s")
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _session(self) -> bool:
+        """Eine Verbindung vom Connect bis zum Abbruch. Gibt True zurück, falls der Login geklappt hat."""
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port),
+                                                timeout=CONNECT_TIMEOUT)
+        self._writer = writer
+        writer.write((f"PASS {self.oauth_token}\r\n"
+                      f"NICK {self.username}\r\n"
+                      "CAP REQ :twitch.tv/tags twitch.tv/commands twitch.tv/membership\r\n"
+                      f"JOIN #{self.channel}\r\n").encode("utf-8"))
+        await writer.drain()
+
+        framer = LineFramer()
+        logged_in = False
+        while self._running:
+            data = await asyncio.wait_for(reader.read(READ_SIZE), timeout=READ_TIMEOUT)
+            if not data:
+                break
+            for line in framer.feed(data):
+                if line.startswith("PING"):
+                    payload = line.split(" ", 1)[1] if " " in line else ":tmi.twitch.tv"
+                    self._write(f"PONG {payload}")
+                    continue
+                if not logged_in and line.startswith(":tmi.twitch.tv 001 "):
+                    logged_in = True
+                    self.connected = True
+                    logger.info(f"Twitch IRC verbunden als {self.username}")
+                try:
+                    self.on_line(line)
+                except Exception as e:
+                    logger.error(f"Twitch IRC Weitergabe Fehler: {e}")
+        return logged_in
@@ -22,18 +22,38 @@ async function loadOptions() {
 }
 loadOptions();
 
-// 2. Polling
-async function pollAPI() {
-    try {
-        const response = await fetch('/api/v1/events/gambler/next');
-        if (!response.ok) return;
-        const data = await response.json();
-        if (Object.keys(data).length > 0 && data.chamber) {
-            animationQueue.push(data);
-        }
-    } catch (e) { }
+// 2. Gambit-Ergebnisse kommen per Socket.IO (kein Polling mehr)
+// Jedes Ergebnis hat eine fortlaufende ID -> nach einem Reconnect werden verpasste nachgeholt.
+// Die IDs beginnen bei jedem App-Start neu, die 'epoch' verrät einen Neustart.
+let lastEventId = null;
+let lastEpoch = null;
+
+function syncEpoch(epoch) {
+    if (!epoch || epoch === lastEpoch) return;
+    // App wurde neu gestartet: alte ID gilt nicht mehr (beim ersten Laden bleibt sie null)
+    if (lastEpoch !== null) lastEventId = 0;
+    lastEpoch = epoch;
 }
 
+function handleGambitEvent(data) {
+    if (!data || !data.chamber) return;
+    syncEpoch(data.epoch);
+    if (lastEventId !== null && data.id <= lastEventId) return; // schon gesehen
+    lastEventId = data.id;
+    animationQueue.push(data);
+}
+
+const socket = io();
+socket.on('connect', () => {
+    socket.emit('replay_events', { topic: 'gambit_event', after: lastEventId, epoch: lastEpoch }, (resp) => {
+        if (!resp) return;
+        syncEpoch(resp.epoch);
+        if (lastEventId === null) lastEventId = resp.last_id;
+        (resp.events || []).forEach(handleGambitEvent);
+    });
+});
+socket.on('gambit_event', handleGambitEvent);
+
 function checkQueue() {
     if (!isAnimating && animationQueue.length > 0) {
         const nextEvent = animationQueue.shift();
@@ -87,5 +107,4 @@ function playAnimation(data) {
     }, 8000);
 }
 
-setInterval(pollAPI, 1000);
 setInterval(checkQueue, 200);
\ No newline at end of file
@@ -10,19 +10,25 @@ let displayedPercent = 0;
 let roadSpeed = 3;       // Geschwindigkeit der Straße
 let scaleFactor = 1.0;   // Originalgröße
 
-// --- API Polling ---
+// --- API: Einmal laden, danach Push-Updates per Socket.IO ---
+function applyData(data) {
+    if (data && !data.error) {
+        // ANPASSUNG: Keys passend zum Python-Backend (current_likes, goal)
+        currentLikes = data.current_likes || 0;
+        currentGoal = data.goal || 1;
+    }
+}
+
 async function fetchData() {
     try {
         const response = await fetch(API_URL);
-        const data = await response.json();
-        if (!data.error) {
-            // ANPASSUNG: Keys passend zum Python-Backend (current_likes, goal)
-            currentLikes = data.current_likes || 0;
-            currentGoal = data.goal || 1;
-        }
+        applyData(await response.json());
     } catch (e) { console.error("API Error", e); }
 }
-setInterval(fetchData, 1000);
+
+const socket = io();
+socket.on('connect', () => socket.emit('subscribe', ['like_progress']));
+socket.on('like_progress', applyData);
 fetchData();
 
 // --- LOGGING ---
@@ -3,49 +3,72 @@ Startpunkt der Anwendung StreamForge.
 """
 import sys
 import os
-import time
+import threading
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 if current_dir not in sys.path:
     sys.path.insert(0, current_dir)
 
-from database.db_setup import setup_database
-from presentation.gui_app import StreamForgeGUI
-from utils import server_log
+from utils import server_log, configure_logging, StartupProfiler
 from config import DATABASE_PATH
-from services.service_provider import like_service_instance, twitch_service_instance
 
-if __name__ == '__main__':
-    print("\n\n=== STREAMFORGE STARTUP ===")
 
-    # 1. Datenbank
-    try:
-        setup_database()
-        server_log.info(f"Datenbankpfad: {DATABASE_PATH}")
-    except Exception as e:
-        server_log.error(f"DB Fehler: {e}")
-        sys.exit(1)
+def start_connections(profiler):
+    """Autostart von TikTok und Twitch. Läuft im Hintergrund, nachdem das Fenster schon steht."""
+    from services import service_provider
 
-    # 2. TikTok Verbindung (Autostart)
+    # 3. Kern-Services (Event-Bus und seine Abonnenten) vor allen Event-Quellen
+    with profiler.phase("Kern-Services"):
+        service_provider.start_core_services()
+
+    # 4. TikTok Verbindung (Autostart)
     print(">>> Prüfe TikTok Verbindung...")
-    try:
-        like_service_instance.start_tiktok_connection()
-    except Exception as e:
-        server_log.error(f"FATAL: Konnte TikTok Service nicht starten: {e}")
+    with profiler.phase("TikTok Autostart"):
+        try:
+            service_provider.like_service_instance.start_tiktok_connection()
+        except Exception as e:
+            server_log.error(f"FATAL: Konnte TikTok Service nicht starten: {e}")
 
-    # 3. Twitch Verbindung (Autostart)
+    # 5. Twitch Verbindung (Autostart)
     print(">>> Prüfe Twitch Verbindung...")
-    try:
-        # Hier nutzen wir jetzt die neue Auto-Start Logik des Services
-        twitch_service_instance.try_auto_start()
-    except Exception as e:
-        print(f"Twitch Autostart Fehler: {e}")
+    with profiler.phase("Twitch Autostart"):
+        try:
+            # Hier nutzen wir jetzt die neue Auto-Start Logik des Services
+            service_provider.twitch_service_instance.try_auto_start()
+        except Exception as e:
+            print(f"Twitch Autostart Fehler: {e}")
 
-    # 4. GUI
+    profiler.report(service_provider.get_build_times())
+
+
+if __name__ == '__main__':
+    configure_logging()
+    profiler = StartupProfiler()
+    print("\n\n=== STREAMFORGE STARTUP ===")
+
+    # 1. Datenbank
+    with profiler.phase("Datenbank"):
+        try:
+            from database.db_setup import setup_database
+            setup_database()
+            server_log.info(f"Datenbankpfad: {DATABASE_PATH}")
+        except Exception as e:
+            server_log.error(f"DB Fehler: {e}")
+            sys.exit(1)
+
+    # 2. GUI (Services, Flask und Verbindungen werden erst danach geladen)
     try:
         print(">>> Starte GUI...")
-        app = StreamForgeGUI()
+        with profiler.phase("GUI aufbauen"):
+            from presentation.gui_app import StreamForgeGUI
+            app = StreamForgeGUI()
+
+        def on_gui_visible():
+            profiler.mark("GUI sichtbar")
+            threading.Thread(target=start_connections, args=(profiler,), daemon=True, name="Autostart").start()
+
+        app.root.after(0, on_gui_visible)
         app.start()
     except Exception as e:
         server_log.error(f"GUI Fehler: {e}")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
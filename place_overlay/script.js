@@ -2,23 +2,11 @@ let lastTimestamp = 0;
 const DISPLAY_DURATION = 5000; // Anzeigedauer in Millisekunden (5 Sekunden)
 let hideTimeout = null;
 
-async function checkActivePlace() {
-    try {
-        // Cache-Busting (?t=...) damit der Browser nicht die alte Datei lädt
-        const response = await fetch('active.json?t=' + new Date().getTime());
-        if (!response.ok) return;
-
-        const data = await response.json();
-
-        // Prüfen, ob Daten da sind UND ob sie neu sind (Timestamp Vergleich)
-        if (data.timestamp && data.timestamp > lastTimestamp) {
-            lastTimestamp = data.timestamp;
-            showOverlay(data.user_name, data.place);
-        }
-
-    } catch (e) {
-        // Fehler ignorieren (z.B. wenn Datei gerade geschrieben wird)
-        console.log("Warte auf Daten...");
+function checkActivePlace(data) {
+    // Prüfen, ob Daten da sind UND ob sie neu sind (Timestamp Vergleich)
+    if (data && data.timestamp && data.timestamp > lastTimestamp) {
+        lastTimestamp = data.timestamp;
+        showOverlay(data.user_name, data.place);
     }
 }
 
@@ -55,5 +43,6 @@ function showOverlay(user, place) {
     }, DISPLAY_DURATION);
 }
 
-// Alle 1 Sekunde prüfen, ob ein neuer Befehl da ist
-setInterval(checkActivePlace, 1000);
\ No newline at end of file
+// Neue !place Ergebnisse kommen per Socket.IO (kein Polling der active.json mehr)
+const socket = io();
+socket.on('place_result', checkActivePlace);
\ No newline at end of file
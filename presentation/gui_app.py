@@ -18,15 +18,15 @@ from presentation.settings_windows import (
     TwitchSubathonSettingsWindow,
     WheelSettingsWindow
 )
-from services.service_provider import like_service_instance, twitch_service_instance
 
 from config import (
     Style, BASE_HOST, BASE_PORT, BASE_URL,
     RESET_WISHES_ENDPOINT, WISHES_ENDPOINT,
     get_path, COMMANDS_TRIGGER_ENDPOINT
 )
-from utils import server_log
-from presentation.web_api import app as flask_app
+from utils import server_log, shutdown_logging
+from external.settings_manager import flush_all as flush_all_settings
+from database.db_connector import close_all_connections
 from presentation.ui_elements import show_toast, start_hotkey_listener
 
 # --- TEXTE FÜR INFO SCREENS ---
@@ -360,6 +360,12 @@ class StreamForgeGUI:
         return canvas
 
     def update_status_loop(self):
+        from services.service_provider import is_created
+        if not (is_created("like_service_instance") and is_created("twitch_service_instance")):
+            # Services werden erst nach dem Start der GUI gebaut (siehe main.py)
+            self.root.after(1000, self.update_status_loop)
+            return
+        from services.service_provider import like_service_instance, twitch_service_instance
         tt_color = "#444444"
         if hasattr(like_service_instance, 'api_client') and like_service_instance.api_client:
             tt_color = Style.SUCCESS if like_service_instance.api_client.is_connected else Style.DANGER
@@ -454,7 +460,13 @@ class StreamForgeGUI:
     def start_webserver(self):
         if self.is_server_running[0]: return
         def r():
-            try: flask_app.run(host=BASE_HOST, port=BASE_PORT, debug=False, use_reloader=False)
+            try:
+                # Flask/Socket.IO erst laden, wenn die Kern-Services (im Autostart) stehen,
+                # damit sie nicht nebenbei im Flask-Thread gebaut werden
+                from services.service_provider import wait_core_services
+                wait_core_services()
+                from presentation.web_api import app as flask_app
+                flask_app.run(host=BASE_HOST, port=BASE_PORT, debug=False, use_reloader=False)
             except: self.status_canvas.itemconfig(self.status_indicator, fill=Style.DANGER)
         threading.Thread(target=r, daemon=True).start()
         self.is_server_running[0] = True
@@ -464,15 +476,28 @@ class StreamForgeGUI:
         self.root.protocol("WM_DELETE_WINDOW", self.on_app_close)
 
     def on_app_close(self):
-        if hasattr(like_service_instance, 'api_client') and like_service_instance.api_client:
-            try: like_service_instance.api_client.stop()
-            except: pass
+        from services import service_provider
+        if service_provider.is_created("like_service_instance"):
+            like_service_instance = service_provider.like_service_instance
+            if hasattr(like_service_instance, 'api_client') and like_service_instance.api_client:
+                try: like_service_instance.api_client.stop()
+                except: pass
+        try: flush_all_settings()
+        except Exception as e: server_log.error(f"Settings Flush Fehler: {e}")
+        if service_provider.is_created("subathon_service_instance"):
+            try: service_provider.subathon_service_instance.journal.shutdown()
+            except Exception as e: server_log.error(f"Timer-Journal Fehler: {e}")
+        if service_provider.is_created("currency_service_instance"):
+            try: service_provider.currency_service_instance.shutdown()
+            except Exception as e: server_log.error(f"Currency Flush Fehler: {e}")
+        try: close_all_connections()
+        except Exception as e: server_log.error(f"DB Shutdown Fehler: {e}")
+        shutdown_logging()
         self.root.destroy()
         sys.exit(0)
 
     def start(self):
-        from database.db_setup import setup_database
-        setup_database()
+        # Datenbank wurde bereits in main.py eingerichtet
         self.root.after(100, self.start_webserver)
         self.root.mainloop()
 
@@ -489,6 +514,7 @@ class GlobalSettingsWindow(tk.Toplevel):
         y = master.winfo_y() + (master.winfo_height() // 2) - (h // 2)
         self.geometry(f'+{x}+{y}')
 
+        from services.service_provider import like_service_instance, twitch_service_instance
         self.tiktok_mgr = like_service_instance.settings_manager
         self.tiktok_settings = self.tiktok_mgr.load_settings()
         self.twitch_settings = twitch_service_instance.get_settings() or {}
@@ -531,6 +557,7 @@ class GlobalSettingsWindow(tk.Toplevel):
     def update_status_loop(self):
         if not self.winfo_exists(): return
         try:
+            from services.service_provider import twitch_service_instance
             status = twitch_service_instance.get_status()
             if status.get("connected"): self.status_lbl.config(text=f"✅ VERBUNDEN als: {status.get('username')}", fg=Style.SUCCESS)
             else: self.status_lbl.config(text="❌ NICHT VERBUNDEN", fg=Style.DANGER)
@@ -540,12 +567,14 @@ class GlobalSettingsWindow(tk.Toplevel):
     def save_tiktok(self):
         self.tiktok_settings["tiktok_unique_id"] = self.tt_user.get()
         self.tiktok_mgr.save_settings(self.tiktok_settings)
+        from services.service_provider import like_service_instance
         like_service_instance.update_and_restart(self.tt_user.get())
         show_toast(self.master, "TikTok gespeichert!")
 
     def do_twitch_login(self):
         cid = self.entry_cid.get().strip() or "gp762nuuoqcoxypju8c569th9wz7q5"
         self.twitch_settings["twitch_client_id"] = cid
+        from services.service_provider import twitch_service_instance
         twitch_service_instance.save_settings(self.twitch_settings)
         url = f"https://id.twitch.tv/oauth2/authorize?response_type=token&client_id={cid}&redirect_uri=http://localhost:5000/auth/twitch/callback&scope=chat:read+chat:edit+channel:read:subscriptions+bits:read"
         webbrowser.open(url)
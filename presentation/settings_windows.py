@@ -3,9 +3,6 @@ from tkinter import messagebox, font, ttk, colorchooser
 import sys
 import uuid
 
-# Importiere alle benötigten Services
-from services.service_provider import like_service_instance, subathon_service_instance, command_service_instance, \
-    twitch_service_instance
 from config import Style
 from presentation.ui_elements import show_toast
 
@@ -36,6 +33,7 @@ class BaseSettingsWindow(tk.Toplevel):
 class SubathonSettingsWindow(BaseSettingsWindow):
     def __init__(self, master):
         super().__init__(master, "TikTok Trigger Konfiguration", 600, 500)
+        from services.service_provider import subathon_service_instance
         self.service = subathon_service_instance
         self.settings = self.service.get_current_settings()
 
@@ -97,6 +95,7 @@ class TwitchSubathonSettingsWindow(BaseSettingsWindow):
     def __init__(self, master):
         super().__init__(master, "Twitch Konfiguration", 600, 600)
 
+        from services.service_provider import subathon_service_instance, twitch_service_instance
         self.service = subathon_service_instance
         self.twitch_service = twitch_service_instance
         # Lade frische Settings
@@ -187,6 +186,7 @@ class TwitchSubathonSettingsWindow(BaseSettingsWindow):
 class CurrencySettingsWindow(BaseSettingsWindow):
     def __init__(self, master):
         super().__init__(master, "Währungs-Einstellungen", 500, 550)
+        from services.service_provider import like_service_instance
         self.service = like_service_instance  # Nutzt denselben SettingsManager
         self.settings = self.service.settings_manager.load_settings()
 
@@ -279,6 +279,7 @@ class CurrencySettingsWindow(BaseSettingsWindow):
 class TimerGambitSettingsWindow(BaseSettingsWindow):
     def __init__(self, master):
         super().__init__(master, "Timer & Gambit Einstellungen", 800, 700)
+        from services.service_provider import subathon_service_instance
         self.service = subathon_service_instance
         self.settings = self.service.get_current_settings()
 
@@ -571,6 +572,7 @@ class WheelSettingsWindow(BaseSettingsWindow):
 class LikeChallengeSettingsWindow(BaseSettingsWindow):
     def __init__(self, master):
         super().__init__(master, "Like Challenge Einstellungen", 600, 450)
+        from services.service_provider import like_service_instance
         self.service = like_service_instance
         tk.Label(self, text="Like Challenge Konfiguration", font=("Segoe UI", 14, "bold"), **self.label_style).pack(
             pady=(20, 10))
@@ -622,6 +624,7 @@ class LikeChallengeSettingsWindow(BaseSettingsWindow):
 class CommandsSettingsWindow(BaseSettingsWindow):
     def __init__(self, master):
         super().__init__(master, "Command Overlay Einstellungen", 800, 650)
+        from services.service_provider import command_service_instance
         self.service = command_service_instance
         tk.Label(self, text="Command Overlay Konfiguration", font=("Segoe UI", 14, "bold"), **self.label_style).pack(
             pady=(15, 10))
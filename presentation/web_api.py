@@ -1,5 +1,5 @@
 from flask import Flask, jsonify, send_from_directory, request, render_template_string
-from flask_socketio import SocketIO
+from flask_socketio import SocketIO, emit
 import os
 import requests
 
@@ -10,8 +10,13 @@ from services.service_provider import (
     subathon_service_instance,
     command_service_instance,
     twitch_service_instance,
-    wheel_service_instance
+    wheel_service_instance,
+    state_broadcaster_instance,
+    scheduler_service_instance,
+    chat_metrics_instance,
+    event_bus_instance
 )
+from services.event_bus import EventType
 
 # Importiere Infrastruktur
 
@@ -20,12 +25,50 @@ from config import (
     WISHES_ENDPOINT, NEXT_WISH_ENDPOINT, RESET_WISHES_ENDPOINT,
     LIKE_CHALLENGE_ENDPOINT, COMMANDS_ENDPOINT, COMMANDS_TRIGGER_ENDPOINT
 )
-from utils import server_log
+from utils import server_log, get_log_stats
 
 app = Flask(__name__)
 
 socketio = SocketIO(app, async_mode='threading', cors_allowed_origins="*")
 
+# Service-Zustände werden per Socket.IO an die Overlays gepusht (statt HTTP-Polling)
+state_broadcaster_instance.attach(lambda topic, data: socketio.emit(topic, data))
+
+
+@socketio.on('subscribe')
+def handle_overlay_subscribe(topics):
+    """Overlay meldet sich an und bekommt sofort den letzten Stand der gewünschten Zustände."""
+    for topic in topics or []:
+        state = state_broadcaster_instance.get_state(topic)
+        if state is not None:
+            emit(topic, state)
+
+@socketio.on('replay_events')
+def handle_replay_events(data):
+    """
+    Overlay holt nach einem (Re-)Connect verpasste Ereignisse nach.
+    Antwort (Ack): {'events': [...], 'last_id': n}. Ohne 'after' gibt es nur die aktuelle ID,
+    damit ein frisch geladenes Overlay keine alten Animationen abspielt.
+    """
+    channels = {state_broadcaster_instance.GAMBIT_EVENT: subathon_service_instance.gambit_channel}
+    data = data if isinstance(data, dict) else {}
+    channel = channels.get(data.get('topic'))
+    if channel is None:
+        return {'events': [], 'last_id': 0}
+    after = data.get('after')
+    if after is None:
+        return {'events': [], 'last_id': channel.last_id, 'epoch': channel.epoch}
+    try:
+        after = int(after)
+    except (TypeError, ValueError):
+        return {'error': "'after' muss eine Zahl sein", 'events': [], 'last_id': channel.last_id,
+                'epoch': channel.epoch}
+    # Nach einem App-Neustart (andere Epoch) beginnt der Client wieder am Anfang
+    after = channel.resolve_after(after, data.get('epoch'))
+    events = channel.since(after)
+    return {'events': events, 'last_id': events[-1]['id'] if events else after, 'epoch': channel.epoch}
+
+
 # --- HILFSFUNKTION FÜR OVERLAYS ---
 def serve_overlay_file(folder_name, filename):
     """
@@ -195,6 +238,43 @@ def get_like_challenge_data():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/api/v1/tiktok/listener_stats', methods=['GET'])
+def get_tiktok_listener_stats():
+    api_client = getattr(like_service_instance, 'api_client', None)
+    if not api_client:
+        return jsonify({})
+    return jsonify(api_client.get_listener_stats())
+
+
+@app.route('/api/v1/tiktok/leaderboard', methods=['GET'])
+def get_tiktok_leaderboard():
+    api_client = getattr(like_service_instance, 'api_client', None)
+    if not api_client:
+        return jsonify([])
+    limit = request.args.get('limit', default=10, type=int)
+    return jsonify(api_client.get_leaderboard(max(1, min(limit, 50))))
+
+
+@app.route('/api/v1/metrics/chat', methods=['GET'])
+def get_chat_metrics():
+    return jsonify(chat_metrics_instance.get_stats())
+
+
+@app.route('/api/v1/metrics/events', methods=['GET'])
+def get_event_metrics():
+    return jsonify(event_bus_instance.get_stats())
+
+
+@app.route('/api/v1/metrics/logging', methods=['GET'])
+def get_logging_metrics():
+    return jsonify(get_log_stats())
+
+
+@app.route('/api/v1/twitch/outbox_stats', methods=['GET'])
+def get_twitch_outbox_stats():
+    return jsonify(twitch_service_instance.get_outbox_stats())
+
+
 # --- COMMANDS API ---
 @app.route(COMMANDS_ENDPOINT, methods=['GET'])
 def get_commands_data():
@@ -226,6 +306,24 @@ def get_next_gambit():
         return jsonify({})
 
 
+@app.route('/api/v1/events/gambler/poll', methods=['GET'])
+def poll_gambit_events():
+    """
+    Long-Poll: ?after=<letzte ID>&epoch=<Epoch>&timeout=<Sekunden>.
+    Ohne 'after' nur die aktuelle ID (Startpunkt). Passt die Epoch nicht (App neu gestartet),
+    wird ab dem Anfang der aktuellen Epoch geliefert.
+    """
+    channel = subathon_service_instance.gambit_channel
+    if request.args.get('after') is None:
+        return jsonify({'events': [], 'last_id': channel.last_id, 'epoch': channel.epoch})
+    after = request.args.get('after', type=int)
+    if after is None:
+        return jsonify({'error': "'after' muss eine Zahl sein"}), 400
+    after = channel.resolve_after(after, request.args.get('epoch'))
+    events = channel.wait(after, request.args.get('timeout', default=25.0, type=float))
+    return jsonify({'events': events, 'last_id': events[-1]['id'] if events else after, 'epoch': channel.epoch})
+
+
 @app.route('/api/v1/gambit/options', methods=['GET'])
 def get_gambit_options():
     try:
@@ -241,8 +339,9 @@ def trigger_streamerbot_event():
     if not request.json:
         return jsonify({'error': 'JSON Body fehlt'}), 400
     try:
-        subathon_service_instance.handle_streamerbot_event(request.json)
-        return jsonify({'message': 'Event verarbeitet'}), 200
+        # Asynchron über den Bus, der Subathon-Service hat streamerbot-Events abonniert
+        event_bus_instance.publish(EventType.STREAMERBOT, "streamerbot", data=dict(request.json))
+        return jsonify({'message': 'Event angenommen'}), 200
     except Exception as e:
         server_log.error(f"Streamerbot API Fehler: {e}")
         return jsonify({'error': str(e)}), 500
@@ -265,6 +364,11 @@ def timer_control():
 @app.route('/api/v1/timer/state', methods=['GET'])
 def get_timer_state():
     return jsonify(subathon_service_instance.get_state())
+
+
+@app.route('/api/v1/scheduler/jobs', methods=['GET'])
+def get_scheduler_jobs():
+    return jsonify(scheduler_service_instance.pending())
 # In web_api.py
 @app.route('/assets/videos/<path:filename>')
 def serve_video(filename):
@@ -1,23 +1,32 @@
 import threading
 import os
 import time
-import pygame
 from config import get_path
 from utils import server_log
 
 class AudioService:
     def __init__(self):
+        # pygame wird erst beim ersten Sound geladen (spart Startzeit, wenn nie etwas abgespielt wird)
         self.mixer_initialized = False
-        try:
-            pygame.mixer.init()
-            self.mixer_initialized = True
-            server_log.info("Pygame Mixer erfolgreich initialisiert.")
-        except Exception as e:
-            server_log.error(f"Pygame Mixer konnte nicht initialisiert werden: {e}")
+        self._mixer_attempted = False
+        self._mixer_lock = threading.Lock()
+
+    def _ensure_mixer(self):
+        with self._mixer_lock:
+            if not self._mixer_attempted:
+                self._mixer_attempted = True
+                try:
+                    import pygame
+                    pygame.mixer.init()
+                    self.mixer_initialized = True
+                    server_log.info("Pygame Mixer erfolgreich initialisiert.")
+                except Exception as e:
+                    server_log.error(f"Pygame Mixer konnte nicht initialisiert werden: {e}")
+        return self.mixer_initialized
 
     def _play_file_thread(self, relative_path):
         """Spielt eine spezifische Datei in einem Thread ab."""
-        if not self.mixer_initialized:
+        if not self._ensure_mixer():
             server_log.error("Mixer nicht initialisiert.")
             return
 
@@ -26,6 +35,7 @@ class AudioService:
             server_log.error(f"Audiodatei nicht gefunden: {full_path}")
             return
 
+        import pygame
         try:
             pygame.mixer.music.load(full_path)
             pygame.mixer.music.play()
@@ -0,0 +1,96 @@
+import time
+
+# Standard-Fenster für die Rate in Sekunden (ein Bucket pro Sekunde)
+DEFAULT_WINDOW = 60
+
+
+class RateCounter:
+    """
+    Zählt Ereignisse in einem Ringpuffer aus Sekunden-Buckets.
+
+    Speicher ist fest (ein Zähler + Zeitstempel pro Sekunde im Fenster), egal wie viele
+    Nachrichten kommen. increment() nimmt keinen Lock: Im Extremfall geht beim Wechsel
+    auf eine neue Sekunde ein einzelner Zähler verloren, für Metriken ist das unkritisch.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, clock=time.monotonic):
+        self.window = max(1, int(window))
+        self._clock = clock
+        self._stamps = [-1] * self.window
+        self._counts = [0] * self.window
+        self.total = 0
+        self.peak_per_second = 0
+        self.peak_per_window = 0
+
+    def increment(self, n=1):
+        sec = int(self._clock())
+        idx = sec % self.window
+        if self._stamps[idx] != sec:
+            # Neue Sekunde: Bucket wiederverwenden. Einmal pro Sekunde die Fenstersumme für den Peak prüfen.
+            window_total = self._sum(sec - 1)
+            if window_total > self.peak_per_window:
+                self.peak_per_window = window_total
+            self._counts[idx] = 0
+            self._stamps[idx] = sec
+        count = self._counts[idx] + n
+        self._counts[idx] = count
+        self.total += n
+        if count > self.peak_per_second:
+            self.peak_per_second = count
+
+    def _sum(self, newest_sec):
+        """Summe aller Buckets aus (newest_sec - window, newest_sec]."""
+        oldest = newest_sec - self.window
+        return sum(c for s, c in zip(self._stamps, self._counts) if oldest < s <= newest_sec)
+
+    def count_in_window(self):
+        return self._sum(int(self._clock()))
+
+    def last_second(self):
+        """Anzahl in der letzten abgeschlossenen Sekunde."""
+        sec = int(self._clock()) - 1
+        idx = sec % self.window
+        return self._counts[idx] if self._stamps[idx] == sec else 0
+
+    def snapshot(self):
+        in_window = self.count_in_window()
+        if in_window > self.peak_per_window:
+            self.peak_per_window = in_window
+        return {
+            "window_seconds": self.window,
+            "in_window": in_window,
+            "per_minute": round(in_window * 60.0 / self.window, 1),
+            "per_second": round(in_window / self.window, 2),
+            "last_second": self.last_second(),
+            "peak_per_second": self.peak_per_second,
+            "peak_per_minute": round(self.peak_per_window * 60.0 / self.window, 1),
+            "total": self.total
+        }
+
+
+class ChatMetricsService:
+    """
+    Chat-Raten pro Plattform (Twitch, TikTok), unabhängig von Reconnects der Verbindungen.
+    Gezählt wird im EventBus (twitch.message / tiktok.comment), hier liegt nur die Sicht pro Plattform.
+    Das Zeitfenster bestimmt der EventBus (EventBus(window=...)).
+    """
+
+    TWITCH = "twitch"
+    TIKTOK = "tiktok"
+
+    def __init__(self):
+        from services.event_bus import EventType
+        from services.service_provider import event_bus_instance
+        self._counters = {
+            self.TWITCH: event_bus_instance.counter(EventType.TWITCH_MESSAGE),
+            self.TIKTOK: event_bus_instance.counter(EventType.TIKTOK_COMMENT)
+        }
+
+    def get_per_minute(self, platform):
+        counter = self._counters.get(platform)
+        if counter is None:
+            return 0
+        return int(round(counter.count_in_window() * 60.0 / counter.window))
+
+    def get_stats(self):
+        return {platform: counter.snapshot() for platform, counter in list(self._counters.items())}
@@ -1,6 +1,4 @@
 import uuid
-import threading
-import time
 from external.settings_manager import SettingsManager
 from utils import server_log
 
@@ -54,22 +52,36 @@ class CommandService:
     def get_active_command(self):
         return self.active_command
 
+    def _publish_active_command(self):
+        """Pusht den aktiven Command an das Overlay."""
+        try:
+            from services.service_provider import state_broadcaster_instance
+            state_broadcaster_instance.publish(state_broadcaster_instance.ACTIVE_COMMAND, self.active_command or {})
+        except Exception as e:
+            server_log.error(f"Command Broadcast Fehler: {e}")
+
     def trigger_command_loop(self):
         if self._loop_active: return
-        threading.Thread(target=self._run_loop, daemon=True).start()
-
-    def _run_loop(self):
         self._loop_active = True
         cmds = self.get_all_commands()
         settings = self.get_settings()
         duration = int(settings.get("display_duration_seconds", 5))
 
         server_log.info(f"▶ Starte Command Loop ({len(cmds)} Commands, je {duration}s)")
+        self._show_command(cmds, 0, duration)
 
-        for cmd in cmds:
-            self.active_command = cmd
-            time.sleep(duration)
+    def _show_command(self, cmds, index, duration):
+        """Zeigt Command Nr. 'index' und plant den nächsten Schritt im Scheduler (kein schlafender Thread)."""
+        from services.service_provider import scheduler_service_instance
 
-        self.active_command = None
-        self._loop_active = False
-        server_log.info("⏹ Command Loop beendet.")
\ No newline at end of file
+        if index >= len(cmds):
+            self.active_command = None
+            self._publish_active_command()
+            self._loop_active = False
+            server_log.info("⏹ Command Loop beendet.")
+            return
+
+        self.active_command = cmds[index]
+        self._publish_active_command()
+        scheduler_service_instance.schedule(duration, self._show_command, cmds, index + 1, duration,
+                                            key="command_loop")
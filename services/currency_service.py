@@ -1,57 +1,180 @@
-import sqlite3
-from config import DATABASE_PATH
+import threading
+from database.db_connector import get_db_connection
 from utils import server_log
 
+# Group-Commit: Ausstehende Buchungen werden spätestens nach FLUSH_INTERVAL Sekunden
+# oder ab FLUSH_MAX_ENTRIES betroffenen Usern in einer Transaktion geschrieben.
+FLUSH_INTERVAL = 0.25
+FLUSH_MAX_ENTRIES = 500
+
+_UPSERT_SQL = """
+              INSERT INTO currency (user_id, user_name, amount)
+              VALUES (?, ?, ?) ON CONFLICT(user_id) DO
+              UPDATE SET
+                  amount = amount + ?,
+                  user_name = CASE WHEN ? THEN excluded.user_name ELSE user_name END
+              """
+
 
 class CurrencyService:
     def __init__(self):
         self.settings = {}  # Wird vom SettingsManager gefüllt
 
+        # Ausstehende Deltas: user_id -> [user_name, delta, name_aktualisieren, delta_bestehender_user]
+        self._pending = {}
+        # Batch, der gerade geschrieben wird (zählt bis zum Commit noch zum Kontostand)
+        self._inflight = None
+        # Wird bei jedem Commit/Reset erhöht; Kontostände werden ohne Lock gelesen und nur
+        # verwendet, wenn sich die DB seitdem nicht geändert hat
+        self._db_version = 0
+        self._lock = threading.RLock()
+        # Serialisiert Flush und Reset; wird vor _lock genommen
+        self._flush_lock = threading.Lock()
+        self._flush_wakeup = threading.Event()
+        self._running = True
+        threading.Thread(target=self._flush_loop, daemon=True, name="CurrencyFlush").start()
+
     def _get_conn(self):
-        return sqlite3.connect(DATABASE_PATH)
+        # Gepoolte Verbindung (Context-Manager), Commits erfolgen explizit
+        return get_db_connection()
+
+    # --- LEDGER ---
+    def _book(self, user_id, user_name, delta, rename=True, existing_delta=None):
+        """
+        Verbucht ein Delta im Speicher (Lock wird vom Aufrufer gehalten).
+        existing_delta: abweichendes Delta, falls der User schon in der DB steht (sonst = delta).
+        """
+        if existing_delta is None:
+            existing_delta = delta
+        entry = self._pending.get(user_id)
+        if entry is None:
+            self._pending[user_id] = [user_name, delta, rename, existing_delta]
+            if len(self._pending) >= FLUSH_MAX_ENTRIES:
+                self._flush_wakeup.set()
+        else:
+            entry[1] += delta
+            entry[3] += existing_delta
+            if rename:
+                entry[0] = user_name
+                entry[2] = True
+
+    def _db_balance(self, conn, user_id):
+        """Kontostand in der DB oder None, falls der User noch nicht existiert."""
+        cur = conn.cursor()
+        cur.execute("SELECT amount FROM currency WHERE user_id = ?", (user_id,))
+        row = cur.fetchone()
+        return row[0] if row else None
+
+    def _with_balance(self, user_id, action):
+        """
+        Liest den DB-Kontostand ohne Lock und ruft action(kontostand) unter dem Lock auf.
+        Hat ein Flush oder Reset dazwischen committet, wird neu gelesen.
+        """
+        while True:
+            with self._lock:
+                version = self._db_version
+            with self._get_conn() as conn:
+                db_balance = self._db_balance(conn, user_id)
+            with self._lock:
+                if version == self._db_version:
+                    return action(self._balance_locked(user_id, db_balance))
+
+    def _balance_locked(self, user_id, balance):
+        """
+        DB-Kontostand (None = kein User) plus geschriebene (inflight) und ausstehende Deltas
+        (Lock wird vom Aufrufer gehalten).
+        """
+        exists = balance is not None
+        balance = balance or 0
+        for ledger in (self._inflight, self._pending):
+            entry = ledger.get(user_id) if ledger else None
+            if entry:
+                balance += entry[3] if exists else entry[1]
+                exists = True
+        return balance
 
+    def flush(self):
+        """
+        Schreibt alle ausstehenden Deltas in einer einzigen Transaktion.
+        Die Buchungen werden unter dem Lock nur ausgetauscht, geschrieben wird ohne Lock.
+        Nur der Commit (WAL, ohne fsync) und das Entfernen des Inflight-Batches passieren
+        gemeinsam unter dem Lock, damit Leser den Batch nie doppelt oder gar nicht sehen.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                batch = self._inflight = self._pending
+                self._pending = {}
+            try:
+                with self._get_conn() as conn:
+                    try:
+                        conn.executemany(_UPSERT_SQL, [(uid, e[0], e[1], e[3], e[2]) for uid, e in batch.items()])
+                        with self._lock:
+                            conn.commit()
+                            self._inflight = None
+                            self._db_version += 1
+                    except Exception:
+                        conn.rollback()
+                        raise
+            except Exception as e:
+                # Nichts verlieren: Batch kommt vor die neueren Buchungen für den nächsten Versuch
+                with self._lock:
+                    self._inflight = None
+                    newer = self._pending
+                    self._pending = batch
+                    for uid, (name, delta, rename, existing_delta) in newer.items():
+                        self._book(uid, name, delta, rename, existing_delta)
+                server_log.error(f"DB Error (currency flush): {e}")
+
+    def _flush_loop(self):
+        while self._running:
+            self._flush_wakeup.wait(FLUSH_INTERVAL)
+            self._flush_wakeup.clear()
+            self.flush()
+
+    def shutdown(self):
+        """Shutdown-Hook: Beendet den Flush-Thread und schreibt den Rest."""
+        self._running = False
+        self._flush_wakeup.set()
+        self.flush()
+
+    # --- PUBLIC API ---
     def add_points(self, user_name, amount):
         """Fügt einem User Punkte hinzu (oder erstellt ihn)."""
         if amount == 0: return
         user_id = user_name.lower()
-        try:
-            with self._get_conn() as conn:
-                if user_id== "scriptedbynic":
-                    cursor = conn.cursor()
-                    cursor.execute("""
-                                   INSERT INTO currency (user_id, user_name, amount)
-                                   VALUES (?, ?, ?) ON CONFLICT(user_id) DO
-                                   UPDATE SET
-                                       amount = amount + ?,
-                                       user_name = ?
-                                   """, (user_id, user_name, amount, amount*2, user_name))
-                    conn.commit()
-                else:
-                    cursor = conn.cursor()
-                    cursor.execute("""
-                                   INSERT INTO currency (user_id, user_name, amount)
-                                   VALUES (?, ?, ?) ON CONFLICT(user_id) DO
-                                   UPDATE SET
-                                       amount = amount + ?,
-                                       user_name = ?
-                                   """, (user_id, user_name, amount, amount, user_name))
-                    conn.commit()
-                    # Optional: Log bei großen Mengen
-                    if amount > 100:
-                        server_log.info(f"💰 {user_name} erhält {amount} Punkte.")
+        # Wie bisher: bestehender Account von scriptedbynic bekommt doppelte Punkte, ein neuer nicht
+        existing_amount = amount * 2 if user_id == "scriptedbynic" else amount
 
+        with self._lock:
+            self._book(user_id, user_name, amount, existing_delta=existing_amount)
+
+        # Optional: Log bei großen Mengen
+        if amount > 100:
+            server_log.info(f"💰 {user_name} erhält {amount} Punkte.")
+
+    def remove_points(self, user_name, amount):
+        """Zieht Punkte ab, falls genug vorhanden sind. Gibt True bei Erfolg zurück."""
+        if amount <= 0: return False
+        user_id = user_name.lower()
+        def book(balance):
+            if balance < amount:
+                return False
+            self._book(user_id, user_name, -amount, rename=False)
+            return True
+
+        try:
+            return self._with_balance(user_id, book)
         except Exception as e:
-            server_log.error(f"DB Error (add_points): {e}")
+            server_log.error(f"DB Error (remove_points): {e}")
+            return False
 
     def get_balance(self, user_name):
-        """Gibt den Kontostand zurück."""
+        """Gibt den Kontostand zurück (inkl. noch nicht geschriebener Buchungen)."""
         user_id = user_name.lower()
         try:
-            with self._get_conn() as conn:
-                cur = conn.cursor()
-                cur.execute("SELECT amount FROM currency WHERE user_id = ?", (user_id,))
-                row = cur.fetchone()
-                return row[0] if row else 0
+            return self._with_balance(user_id, lambda balance: balance)
         except:
             return 0
 
@@ -63,38 +186,29 @@ class CurrencyService:
         if amount <= 0: return False, "Betrag muss positiv sein."
         if sender_id == recipient_id: return False, "Du kannst dir nicht selbst senden."
 
-        try:
-            with self._get_conn() as conn:
-                cur = conn.cursor()
-
-                # Check Balance
-                cur.execute("SELECT amount FROM currency WHERE user_id = ?", (sender_id,))
-                row = cur.fetchone()
-                balance = row[0] if row else 0
-
-                if balance < amount:
-                    return False, f"Nicht genug Punkte ({balance})."
-
-                # Abziehen
-                cur.execute("UPDATE currency SET amount = amount - ? WHERE user_id = ?", (amount, sender_id))
+        def book(balance):
+            # Check Balance
+            if balance < amount:
+                return False, f"Nicht genug Punkte ({balance})."
 
-                # Gutschreiben (User erstellen falls nicht existent)
-                cur.execute("""
-                            INSERT INTO currency (user_id, user_name, amount)
-                            VALUES (?, ?, ?) ON CONFLICT(user_id) DO
-                            UPDATE SET amount = amount + ?
-                            """, (recipient_id, recipient, amount, amount))
+            # Abziehen & Gutschreiben (User wird beim Flush erstellt, falls nicht existent)
+            self._book(sender_id, sender, -amount, rename=False)
+            self._book(recipient_id, recipient, amount, rename=False)
+            return True, f"Erfolgreich {amount} an {recipient} gesendet."
 
-                conn.commit()
-                return True, f"Erfolgreich {amount} an {recipient} gesendet."
+        try:
+            return self._with_balance(sender_id, book)
         except Exception as e:
             server_log.error(f"Transfer Error: {e}")
             return False, "Datenbankfehler."
 
     def reset_all(self):
         try:
-            with self._get_conn() as conn:
-                conn.execute("DELETE FROM currency")
-                conn.commit()
+            with self._flush_lock, self._lock:
+                self._pending.clear()
+                with self._get_conn() as conn:
+                    conn.execute("DELETE FROM currency")
+                    conn.commit()
+                self._db_version += 1
         except Exception as e:
-            server_log.error(f"Reset Error: {e}")
\ No newline at end of file
+            server_log.error(f"Reset Error: {e}")
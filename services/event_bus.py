@@ -0,0 +1,222 @@
+import copy
+import threading
+import time
+
+from external.event_dispatcher import EventDispatcher, OverflowPolicy
+from services.chat_metrics_service import RateCounter, DEFAULT_WINDOW
+
+# Worker für alle Abonnenten zusammen (ein Abonnent läuft nie parallel mit sich selbst)
+BUS_WORKERS = 4
+# Standardgröße der Queue pro Abonnent
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+
+class EventType:
+    """Typen der normalisierten Events ('quelle.art')."""
+    TIKTOK_LIKE = "tiktok.like"
+    TIKTOK_GIFT = "tiktok.gift"
+    TIKTOK_FOLLOW = "tiktok.follow"
+    TIKTOK_SHARE = "tiktok.share"
+    TIKTOK_SUBSCRIBE = "tiktok.subscribe"
+    TIKTOK_COMMENT = "tiktok.comment"
+    TIKTOK_TREASURE = "tiktok.treasure"
+    TIKTOK_OTHER = "tiktok.other"
+    TWITCH_MESSAGE = "twitch.message"
+    TWITCH_SUB = "twitch.sub"
+    TWITCH_BITS = "twitch.bits"
+    STREAMERBOT = "streamerbot"
+
+    TIKTOK = (TIKTOK_LIKE, TIKTOK_GIFT, TIKTOK_FOLLOW, TIKTOK_SHARE, TIKTOK_SUBSCRIBE,
+              TIKTOK_COMMENT, TIKTOK_TREASURE, TIKTOK_OTHER)
+    TWITCH = (TWITCH_MESSAGE, TWITCH_SUB, TWITCH_BITS)
+    # Events mit Gegenwert (Gifts, Subs, Bits, ...), die bei Überlast nie verworfen werden dürfen
+    PROTECTED = frozenset((TIKTOK_GIFT, TIKTOK_FOLLOW, TIKTOK_SHARE, TIKTOK_SUBSCRIBE, TIKTOK_TREASURE,
+                           TWITCH_SUB, TWITCH_BITS, STREAMERBOT))
+
+
+# Klassenname des TikTokLive-Events -> EventType (ohne TikTokLive importieren zu müssen)
+_TIKTOK_TYPES = {
+    "LikeEvent": EventType.TIKTOK_LIKE,
+    "GiftEvent": EventType.TIKTOK_GIFT,
+    "FollowEvent": EventType.TIKTOK_FOLLOW,
+    "ShareEvent": EventType.TIKTOK_SHARE,
+    "SuperFanEvent": EventType.TIKTOK_SUBSCRIBE,
+    "CommentEvent": EventType.TIKTOK_COMMENT,
+    "EnvelopeEvent": EventType.TIKTOK_TREASURE,
+    "EnvelopePortalEvent": EventType.TIKTOK_TREASURE,
+}
+
+
+class BusEvent:
+    """
+    Normalisiertes Event auf dem Bus.
+
+    type/source/user/amount sind für alle Quellen gleich aufgebaut, 'data' enthält
+    zusätzliche Felder (z.B. is_gift) und 'raw' das Original-Objekt der Quelle
+    (TikTokLive-Event, Streamer.bot-JSON), falls ein Abonnent mehr Details braucht.
+    """
+    __slots__ = ("type", "source", "user", "amount", "data", "raw", "ts")
+
+    def __init__(self, type, source, user="", amount=1, data=None, raw=None, ts=None):
+        self.type = type
+        self.source = source
+        self.user = user
+        self.amount = amount
+        self.data = data if data is not None else {}
+        self.raw = raw
+        self.ts = ts if ts is not None else time.time()
+
+    def __repr__(self):
+        return f"BusEvent({self.type}, user={self.user!r}, amount={self.amount})"
+
+
+def coalesce_likes(old, new):
+    """
+    Fasst zwei tiktok.like Events zusammen (für OverflowPolicy.COALESCE).
+    Mengen werden addiert, das Roh-Event bekommt die Summe als calculated_diff.
+    """
+    if old.type != EventType.TIKTOK_LIKE or new.type != EventType.TIKTOK_LIKE:
+        return None
+    raw = new.raw
+    if raw is not None:
+        # Kopie, da dasselbe Roh-Event auch bei anderen Abonnenten liegt
+        raw = copy.copy(raw)
+        raw.calculated_diff = old.amount + new.amount
+    return BusEvent(new.type, new.source, new.user, old.amount + new.amount, new.data, raw, new.ts)
+
+
+def is_protected(event):
+    """keep_fn für Abonnenten: True für EventType.PROTECTED (nie verwerfen, nie blockieren)."""
+    return event.type in EventType.PROTECTED
+
+
+def keep_latest(old, new):
+    """Behält nur das neueste Event (für Abonnenten, die nur den aktuellen Stand brauchen)."""
+    return new if old.type == new.type else None
+
+
+class EventBus:
+    """
+    Ein gemeinsamer Event-Bus für TikTok, Twitch, Streamer.bot und HTTP-Trigger.
+
+    Quellen rufen nur publish() auf und kennen die Services nicht. Services abonnieren
+    einmalig die Typen, die sie interessieren; jeder Abonnent hat eine eigene, begrenzte
+    Queue mit Overflow-Policy (EventDispatcher). Events anderer Typen werden für ihn
+    gar nicht erst eingereiht. Raten pro Typ und Queue-Zähler gibt es an einer Stelle (get_stats).
+    """
+
+    def __init__(self, workers=BUS_WORKERS, window=DEFAULT_WINDOW):
+        self.window = window
+        self.dispatcher = EventDispatcher(workers=workers, max_queue=SUBSCRIBER_QUEUE_SIZE,
+                                          policy=OverflowPolicy.BLOCK, name="EventBus")
+        self.dispatcher.start()
+        self._counters = {}
+        self._lock = threading.Lock()  # Nur für das Anlegen neuer Zähler
+        self._tiktok_types = {}  # Event-Klasse -> EventType (Cache)
+
+    # --- ABONNIEREN ---
+    def subscribe(self, callback, types=None, name=None, max_queue=None, policy=None, coalesce_fn=None,
+                  **options):
+        """
+        Registriert einen Abonnenten.
+        :param types: Iterable von EventType-Werten, None = alle Events.
+        :param policy: OverflowPolicy für die eigene Queue (Standard BLOCK).
+        :param options: Weitere Optionen für EventDispatcher.add_listener (z.B. keep_fn=is_protected
+                        für Abonnenten, die keine Gifts/Subs/Bits verlieren dürfen).
+        """
+        filter_fn = None
+        if types is not None:
+            wanted = frozenset(types)
+            filter_fn = lambda event: event.type in wanted
+        return self.dispatcher.add_listener(callback, max_queue=max_queue, policy=policy,
+                                            coalesce_fn=coalesce_fn, name=name, filter_fn=filter_fn, **options)
+
+    def unsubscribe(self, callback):
+        self.dispatcher.remove_listener(callback)
+
+    # --- VERÖFFENTLICHEN ---
+    def publish(self, type, source, user="", amount=1, data=None, raw=None):
+        """Erzeugt ein BusEvent, zählt es und verteilt es an die passenden Abonnenten."""
+        event = BusEvent(type, source, user, amount, data, raw)
+        self.counter(type).increment()
+        self.dispatcher.dispatch(event)
+        return event
+
+    def publish_tiktok(self, event):
+        """Normalisiert ein TikTokLive-Event (als Listener am TikTokLive_API registriert)."""
+        event_class = type(event)
+        event_type = self._tiktok_types.get(event_class)
+        if event_type is None:
+            event_type = next((_TIKTOK_TYPES[base.__name__] for base in event_class.__mro__
+                               if base.__name__ in _TIKTOK_TYPES), EventType.TIKTOK_OTHER)
+            self._tiktok_types[event_class] = event_type
+
+        user = getattr(event, "user", None) or getattr(event, "user_info", None)
+        name = getattr(user, "unique_id", None) or ""
+        if event_type == EventType.TIKTOK_LIKE:
+            amount = getattr(event, "calculated_diff", getattr(event, "count", 1))
+        elif event_type == EventType.TIKTOK_GIFT:
+            amount = getattr(getattr(event, "gift", None), "diamond_count", 1)
+        else:
+            amount = 1
+        return self.publish(event_type, "tiktok", name, amount, raw=event)
+
+    # --- METRIKEN ---
+    def counter(self, type):
+        """RateCounter eines Event-Typs (wird beim ersten Zugriff angelegt)."""
+        counter = self._counters.get(type)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(type, RateCounter(self.window))
+        return counter
+
+    def get_stats(self):
+        """Raten pro Event-Typ plus Queue-Tiefe/Verluste pro Abonnent."""
+        types = {t: counter.snapshot() for t, counter in list(self._counters.items())}
+        return {
+            "published": sum(t["total"] for t in types.values()),
+            "types": types,
+            "subscribers": self.dispatcher.get_stats()
+        }
+
+
+if __name__ == "__main__":
+    # Durchsatz: Events/s über den Bus mit drei Abonnenten (gefiltert, alle, COALESCE).
+    # Aufruf aus dem Projektordner: python -m services.event_bus
+    COUNT = 200_000
+    bus = EventBus()
+    received = {"twitch": 0, "all": 0, "likes": 0}
+    done = threading.Event()
+
+    def on_twitch(e):
+        received["twitch"] += 1
+
+    def on_all(e):
+        received["all"] += 1
+        if received["all"] == COUNT:
+            done.set()
+
+    def on_likes(e):
+        received["likes"] += e.amount
+
+    bus.subscribe(on_twitch, types=EventType.TWITCH, name="twitch")
+    bus.subscribe(on_all, name="all", max_queue=COUNT)
+    bus.subscribe(on_likes, types=(EventType.TIKTOK_LIKE,), name="likes", max_queue=100,
+                  policy=OverflowPolicy.COALESCE, coalesce_fn=coalesce_likes)
+
+    start = time.perf_counter()
+    for i in range(COUNT):
+        if i % 2:
+            bus.publish(EventType.TWITCH_MESSAGE, "twitch", "user")
+        else:
+            bus.publish(EventType.TIKTOK_LIKE, "tiktok", "user", amount=3)
+    done.wait(60)
+    elapsed = time.perf_counter() - start
+    time.sleep(0.2)
+
+    print(f"{COUNT:,} Events in {elapsed:.2f}s -> {COUNT / elapsed:,.0f} Events/s")
+    print(f"twitch={received['twitch']:,} (erwartet {COUNT // 2:,}), "
+          f"likes={received['likes']:,} (erwartet {3 * (COUNT // 2):,}), all={received['all']:,}")
+    for sub in bus.get_stats()["subscribers"]["listeners"]:
+        print(f"  {sub['name']:<8} processed={sub['processed']:,} coalesced={sub['coalesced']:,} "
+              f"dropped={sub['dropped']}")
@@ -0,0 +1,80 @@
+import threading
+import uuid
+from collections import deque
+
+# Anzahl Ereignisse, die für Replay/Long-Poll vorgehalten werden
+DEFAULT_HISTORY = 50
+# Obergrenze für Long-Poll Wartezeiten (Sekunden)
+MAX_WAIT = 30.0
+
+
+class EventChannel:
+    """
+    Thread-safe Kanal für einmalige Overlay-Ereignisse (z.B. Gambit-Ergebnisse).
+
+    Jedes Ereignis bekommt eine fortlaufende 'id'. Die letzten 'history' Ereignisse bleiben
+    in einer deque (älteste fallen automatisch heraus). Overlays können damit:
+    - per Long-Poll auf neue Ereignisse warten (wait),
+    - nach einem Reconnect alles seit ihrer letzten ID nachholen (since),
+    - oder wie früher einzeln abholen (pop_next, ein gemeinsamer Lese-Cursor).
+
+    Die IDs beginnen bei jedem App-Start wieder bei 1. Damit ein Overlay, das den Neustart
+    überlebt hat, nicht mit seiner alten ID hängen bleibt, trägt jedes Ereignis die 'epoch'
+    des Kanals (zufällig pro Prozess). Eine fremde Epoch oder eine ID über last_id gilt als
+    veraltet, es wird ab dem Anfang der aktuellen Epoch geliefert (resolve_after).
+    """
+
+    def __init__(self, history=DEFAULT_HISTORY):
+        self.epoch = uuid.uuid4().hex[:12]
+        self._events = deque(maxlen=history)
+        self._cond = threading.Condition()
+        self._last_id = 0
+        self._pop_cursor = 0
+
+    @property
+    def last_id(self):
+        return self._last_id
+
+    def publish(self, data):
+        """Hängt ein Ereignis an und weckt wartende Long-Polls. Gibt das Ereignis (mit 'id') zurück."""
+        with self._cond:
+            self._last_id += 1
+            event = dict(data, id=self._last_id, epoch=self.epoch)
+            self._events.append(event)
+            self._cond.notify_all()
+        return event
+
+    def _since_locked(self, after_id):
+        if not self._events or after_id >= self._last_id:
+            return []
+        # IDs sind lückenlos -> Startposition direkt berechnen statt zu suchen
+        first_id = self._events[0]["id"]
+        start = max(0, after_id + 1 - first_id)
+        return [self._events[i] for i in range(start, len(self._events))]
+
+    def resolve_after(self, after_id, epoch=None):
+        """Cursor des Clients prüfen: veraltet (andere Epoch, ID zu groß) -> 0 = alles Vorgehaltene."""
+        if (epoch is not None and epoch != self.epoch) or after_id > self._last_id:
+            return 0
+        return max(0, after_id)
+
+    def since(self, after_id):
+        """Alle noch vorgehaltenen Ereignisse mit id > after_id (Replay nach Reconnect)."""
+        with self._cond:
+            return self._since_locked(after_id)
+
+    def wait(self, after_id, timeout):
+        """Long-Poll: Wartet bis zu 'timeout' Sekunden auf Ereignisse mit id > after_id."""
+        timeout = max(0.0, min(float(timeout), MAX_WAIT))
+        with self._cond:
+            self._cond.wait_for(lambda: self._last_id > after_id, timeout=timeout)
+            return self._since_locked(after_id)
+
+    def pop_next(self):
+        """Nächstes Ereignis für den gemeinsamen Lese-Cursor (alte /next Schnittstelle) oder None."""
+        with self._cond:
+            events = self._since_locked(self._pop_cursor)
+            if not events:
+                return None
+            self._pop_cursor = events[0]["id"]
+            return events[0]
@@ -0,0 +1,129 @@
+import ast
+import bisect
+import operator
+
+# Fallback, wenn die Formel fehlt, ungültig ist oder nicht wächst
+DEFAULT_STEP = 10000
+# Anzahl vorausberechneter Formel-Stufen oberhalb der Start-Ziele
+MAX_RECURRING_STEPS = 100
+# Schutz gegen Formeln wie "x ** 999" bzw. Leitern, die ins Unendliche wachsen
+MAX_EXPONENT = 10
+MAX_GOAL = 10 ** 12
+
+_BIN_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+_UNARY_OPS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+_FUNCTIONS = {
+    "min": min,
+    "max": max,
+    "abs": abs,
+    "round": round,
+    "int": int,
+}
+
+
+def compile_goal_expression(expression):
+    """
+    Übersetzt eine Ziel-Formel (z.B. "x * 1.5 + 500") einmalig in eine Funktion f(x).
+
+    Erlaubt sind nur Zahlen, die Variable x, + - * / // % **, Klammern sowie
+    min/max/abs/round/int. Alles andere (Attribute, Importe, Namen, ...) löst ValueError aus.
+    """
+    try:
+        tree = ast.parse(str(expression).strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Ungültige Formel: {expression}") from e
+    return _compile_node(tree.body)
+
+
+def _compile_node(node):
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        value = node.value
+        return lambda x: value
+
+    if isinstance(node, ast.Name) and node.id == "x":
+        return lambda x: x
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+        op = _BIN_OPS[type(node.op)]
+        left = _compile_node(node.left)
+        right = _compile_node(node.right)
+        if op is operator.pow:
+            def power(x):
+                exponent = right(x)
+                if abs(exponent) > MAX_EXPONENT:
+                    raise ValueError(f"Exponent zu groß: {exponent}")
+                return left(x) ** exponent
+            return power
+        return lambda x: op(left(x), right(x))
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        op = _UNARY_OPS[type(node.op)]
+        operand = _compile_node(node.operand)
+        return lambda x: op(operand(x))
+
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+            and node.func.id in _FUNCTIONS and not node.keywords):
+        func = _FUNCTIONS[node.func.id]
+        args = [_compile_node(arg) for arg in node.args]
+        return lambda x: func(*(arg(x) for arg in args))
+
+    raise ValueError(f"Nicht erlaubter Ausdruck: {ast.dump(node)}")
+
+
+class GoalLadder:
+    """
+    Alle Like-Ziele als sortiertes Array: Start-Ziele + vorausberechnete Formel-Stufen.
+    Das passende Ziel für eine Like-Zahl wird per bisect gefunden statt die Formel
+    bei jeder Abfrage erneut auszuwerten.
+    """
+
+    def __init__(self, initial_goals, expression):
+        self.initial_goals = list(initial_goals)
+        self.expression = expression
+        try:
+            self._formula = compile_goal_expression(expression)
+        except ValueError:
+            self._formula = None
+
+        ladder = sorted(int(g) for g in self.initial_goals)
+        current = ladder[-1] if ladder else 0
+        for _ in range(MAX_RECURRING_STEPS):
+            next_goal = self._apply(current)
+            if next_goal <= current:  # Verhindert Stillstand
+                next_goal = current + DEFAULT_STEP
+            current = next_goal
+            ladder.append(current)
+            if current > MAX_GOAL:
+                break
+        self._ladder = ladder
+
+    def _apply(self, goal):
+        """Formel auf ein Ziel anwenden (Fallback: + DEFAULT_STEP)."""
+        if self._formula is None:
+            return goal + DEFAULT_STEP
+        try:
+            return int(self._formula(goal))
+        except Exception:
+            return goal + DEFAULT_STEP
+
+    def goal_for(self, current_likes):
+        """Kleinstes Ziel, das über den aktuellen Likes liegt (oder das höchste bekannte)."""
+        idx = bisect.bisect_right(self._ladder, current_likes)
+        return self._ladder[min(idx, len(self._ladder) - 1)]
+
+    def goals_between(self, low, high):
+        """Alle Ziele im Bereich [low, high], aufsteigend und ohne Duplikate."""
+        lo = bisect.bisect_left(self._ladder, low)
+        hi = bisect.bisect_right(self._ladder, high)
+        return sorted(set(self._ladder[lo:hi]))
@@ -0,0 +1,64 @@
+import threading
+
+_NO_GOAL = float("inf")
+
+
+class LikeAggregator:
+    """
+    Erkennt das Überschreiten von Like-Zielen.
+
+    Hält das nächste Ziel im Speicher, der Hot-Path pro LikeEvent ist ein einziger Vergleich
+    ohne Lock. Erst wenn ein Ziel erreicht ist, wird gelockt und alle übersprungenen Ziele
+    werden aus der Ziel-Leiter geholt. Dadurch wird jedes Ziel genau einmal gemeldet, auch
+    wenn ein einzelnes Event mehrere Ziele auf einmal überspringt.
+
+    Callbacks (außerhalb des Locks):
+    - on_goals_reached(goals, total): Liste der erreichten Ziele (aufsteigend)
+    - on_goal_changed(goal): Das neue nächste Ziel (z.B. zum Speichern)
+    """
+
+    def __init__(self, on_goals_reached=None, on_goal_changed=None):
+        self.on_goals_reached = on_goals_reached
+        self.on_goal_changed = on_goal_changed
+        self._lock = threading.Lock()
+        self._ladder = None
+        self._threshold = _NO_GOAL
+
+    @property
+    def ladder(self):
+        return self._ladder
+
+    @property
+    def goal(self):
+        """Das aktuell nächste Ziel (None, solange keine Ziel-Leiter gesetzt ist)."""
+        threshold = self._threshold
+        return None if threshold == _NO_GOAL else threshold
+
+    def configure(self, ladder, total):
+        """Setzt Ziel-Leiter und Stand (neue Verbindung / geänderte Einstellungen), ohne Ziele zu melden."""
+        with self._lock:
+            self._ladder = ladder
+            goal = ladder.goal_for(total)
+            self._threshold = goal if goal > total else _NO_GOAL
+        if self.on_goal_changed:
+            self.on_goal_changed(goal)
+
+    def observe(self, total):
+        """Neuer Like-Stand. Gibt die dabei erreichten Ziele zurück."""
+        if total < self._threshold:
+            return ()
+
+        with self._lock:
+            threshold = self._threshold
+            if total < threshold:
+                return ()  # Ein anderer Thread hat das Ziel gerade schon verbucht
+            reached = self._ladder.goals_between(threshold, total)
+            goal = self._ladder.goal_for(total)
+            # Oberhalb der höchsten Stufe gibt es kein weiteres Ziel mehr
+            self._threshold = goal if goal > total else _NO_GOAL
+
+        if reached and self.on_goals_reached:
+            self.on_goals_reached(reached, total)
+        if self.on_goal_changed:
+            self.on_goal_changed(goal)
+        return reached
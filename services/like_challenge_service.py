@@ -1,9 +1,11 @@
 import threading
 import time
-# Wir brauchen LikeEvent, um live zu reagieren
-from TikTokLive.events import LikeEvent
 from external.TikTokLive_API import TikTokLive_API
+from external.event_dispatcher import OverflowPolicy
 from external.settings_manager import SettingsManager
+from services.event_bus import EventType, keep_latest
+from services.goal_ladder import GoalLadder
+from services.like_aggregator import LikeAggregator
 from utils import server_log
 
 
@@ -11,20 +13,40 @@ class LikeChallengeService:
     def __init__(self):
         # Pfad zur JSON-Datei. SettingsManager kümmert sich um das Laden/Speichern.
         self.settings_file = 'like_overlay/settings.json'
-        self.settings_manager = SettingsManager(self.settings_file)
+        # Write-Behind: Ziel-Updates aus dem Like-Hotpath werden gebündelt gespeichert
+        self.settings_manager = SettingsManager(self.settings_file, write_delay=2.0)
         self.api_client = None
         self.is_running = False
+        # Vorberechnete Ziel-Leiter; wird nur neu gebaut, wenn sich Start-Ziele oder Formel ändern
+        self._goal_ladder = None
+        self._goal_ladder_key = None
+        # Ziel-Erkennung im Speicher (ein Vergleich pro LikeEvent)
+        self.aggregator = LikeAggregator(on_goals_reached=self._on_goals_reached,
+                                         on_goal_changed=self._on_goal_changed)
+        self._get_goal_ladder(self.settings_manager.get_snapshot())
+
+        # Einmal am Bus anmelden (gilt auch für spätere Reconnects). Für die Ziele zählt nur
+        # der neueste Raum-Stand -> bei Stau wird das wartende Like-Event ersetzt.
+        from services.service_provider import event_bus_instance
+        self.event_bus = event_bus_instance
+        self.event_bus.subscribe(self._on_like_event, types=(EventType.TIKTOK_LIKE,), name="LikeChallenge",
+                                 max_queue=50, policy=OverflowPolicy.COALESCE, coalesce_fn=keep_latest)
 
     def start_tiktok_connection(self):
+        # Erst die Bus-Abonnenten (Subathon, ...), sonst gehen frühe Gifts ins Leere
+        from services.service_provider import start_core_services
+        start_core_services()
         settings = self.settings_manager.load_settings()
         tiktok_id = settings.get("tiktok_unique_id", "")
 
         if tiktok_id:
             server_log.info(f"Starte TikTok-Verbindung zu @{tiktok_id}...")
             self.api_client = TikTokLive_API(tiktok_id)
+            # Neue Verbindung zählt wieder ab 0
+            self.aggregator.configure(self._get_goal_ladder(self.settings_manager.get_snapshot()), 0)
 
-            # WICHTIG: Listener registrieren, damit wir Likes mitbekommen!
-            self.api_client.add_listener(self._on_tiktok_event)
+            # Alle TikTok-Events normalisiert auf den Bus (Subathon, Like-Challenge, ... haben dort abonniert)
+            self.api_client.add_listener(self.event_bus.publish_tiktok)
 
             self.api_client.start()
             self.is_running = True
@@ -41,21 +63,16 @@ class LikeChallengeService:
         self.settings_manager.save_settings(s)
         self.start_tiktok_connection()
 
-    def get_challenge_status(self):
-        current_likes = 0
-        if self.api_client:
-            current_likes = self.api_client.current_likes
+    def _current_likes(self):
+        return self.api_client.get_current_likes() if self.api_client else 0
 
-        settings = self.settings_manager.load_settings()
+    def get_challenge_status(self):
+        current_likes = self._current_likes()
+        settings = self.settings_manager.get_snapshot()
 
-        # NEU: Das passende Ziel basierend auf den Likes ermitteln
+        # Das passende Ziel basierend auf den Likes (Ziel-Leiter per bisect)
         goal = self._get_appropriate_goal(current_likes, settings)
 
-        # Optional: Das Ziel in der settings.json synchronisieren,
-        # damit es auch in der Datei aktuell bleibt
-        if settings.get("like_goal") != goal:
-            self._save_new_goal(goal)
-
         fmt = settings.get("displayTextFormat", "{current} / {goal}")
         likes_needed = max(0, goal - current_likes)
 
@@ -77,56 +94,58 @@ class LikeChallengeService:
 
     def add_test_likes(self, amount):
         if self.api_client:
-            self.api_client.current_likes += amount
+            total = self.api_client.add_likes(amount)
             # Auch bei Test-Likes prüfen wir das Ziel!
-            self._check_goal_progression(self.api_client.current_likes)
+            self.aggregator.observe(total)
+            self._publish_progress()
+
+    def _publish_progress(self):
+        """Pusht den Like-Fortschritt an die Overlays (nur bei Änderung)."""
+        try:
+            from services.service_provider import state_broadcaster_instance
+            state_broadcaster_instance.publish(state_broadcaster_instance.LIKE_PROGRESS, self.get_challenge_status())
+        except Exception as e:
+            server_log.error(f"Like Broadcast Fehler: {e}")
 
     # --- INTERNE LOGIK ---
 
-    def _on_tiktok_event(self, event):
-        """Wird bei JEDEM TikTok Event aufgerufen."""
-        if isinstance(event, LikeEvent):
-            # Prüfen, ob Ziel erreicht wurde
-            self._check_goal_progression(self.api_client.current_likes)
+    def _on_like_event(self, event):
+        """tiktok.like vom Bus: Prüfen, ob Ziel(e) erreicht wurden (Stand zum Zeitpunkt des Events)."""
+        self.aggregator.observe(getattr(event.raw, "custom_room_total", 0))
+        self._publish_progress()
 
-    def _check_goal_progression(self, current_likes):
-        settings = self.settings_manager.load_settings()
-        current_goal = int(settings.get("like_goal", 10000))
-
-        # Wenn Ziel erreicht ist...
-        if current_likes >= current_goal:
-            server_log.info(f"🎉 ZIEL ERREICHT: {current_likes} >= {current_goal}")
-
-            # 1. Sound abspielen
-            try:
-                # Import innerhalb der Funktion, um Zirkelbezüge zu vermeiden
-                from services.service_provider import audio_service_instance
-                audio_service_instance.play_goal_sound()
-            except Exception as e:
-                server_log.error(f"Sound Fehler: {e}")
-
-            # 2. Neues Ziel berechnen
-            next_goal = self._calculate_next_goal(current_goal, settings)
-            server_log.info(f"➡ Neues Ziel: {next_goal}")
-
-            # 3. Neues Ziel speichern
-            self._save_new_goal(next_goal)
-
-    def _calculate_next_goal(self, current_goal, settings):
-        initial_goals = settings.get("initialGoals", [])
-
-        # Wenn wir noch in der Start-Liste sind, nimm das nächste
-        if current_goal in initial_goals:
-            idx = initial_goals.index(current_goal)
-            if idx + 1 < len(initial_goals):
-                return initial_goals[idx + 1]
-
-        # Sonst Formel anwenden (z.B. x + 10000)
-        expression = settings.get("recurringGoalExpression", "x + 10000")
+    def _on_goals_reached(self, goals, current_likes):
+        for goal in goals:
+            server_log.info(f"🎉 ZIEL ERREICHT: {current_likes} >= {goal}")
+
+        # Sound einmal pro Sprung, auch wenn mehrere Ziele auf einmal erreicht wurden
+        try:
+            # Import innerhalb der Funktion, um Zirkelbezüge zu vermeiden
+            from services.service_provider import audio_service_instance
+            audio_service_instance.play_goal_sound()
+        except Exception as e:
+            server_log.error(f"Sound Fehler: {e}")
+
+    def _on_goal_changed(self, goal):
+        """Speichert das neue Ziel asynchron (mehrere Änderungen kurz hintereinander = ein Schreibvorgang)."""
+        if self.settings_manager.get_snapshot().get("like_goal") == goal:
+            return
+        server_log.info(f"➡ Neues Ziel: {goal}")
         try:
-            return int(eval(str(expression), {"x": current_goal}))
-        except:
-            return current_goal + 10000
+            from services.service_provider import scheduler_service_instance
+            scheduler_service_instance.schedule(0, self._save_new_goal, goal, key="like_goal_save")
+        except Exception:
+            # Beim Start existiert der Scheduler evtl. noch nicht
+            self._save_new_goal(goal)
+
+    def _get_goal_ladder(self, settings):
+        key = (tuple(settings.get("initialGoals", ())), settings.get("recurringGoalExpression", "x + 10000"))
+        if self._goal_ladder is None or self._goal_ladder_key != key:
+            self._goal_ladder = GoalLadder(*key)
+            self._goal_ladder_key = key
+            # Geänderte Ziele: Erkennung auf den aktuellen Stand setzen (ohne alte Ziele nachzumelden)
+            self.aggregator.configure(self._goal_ladder, self._current_likes())
+        return self._goal_ladder
 
     def _save_new_goal(self, new_goal):
         s = self.settings_manager.load_settings()
@@ -135,30 +154,4 @@ class LikeChallengeService:
 
     def _get_appropriate_goal(self, current_likes, settings):
         """Findet das kleinste Ziel, das über den aktuellen Likes liegt."""
-        initial_goals = settings.get("initialGoals", [])
-
-        # 1. Sortierte Liste der initialen Ziele prüfen
-        sorted_goals = sorted([int(g) for g in initial_goals])
-        for goal in sorted_goals:
-            if goal > current_likes:
-                return goal
-
-        # 2. Falls wir über allen initialen Zielen liegen, Formel anwenden
-        current_g = sorted_goals[-1] if sorted_goals else 0
-        expression = settings.get("recurringGoalExpression", "x + 10000")
-
-        # Wir wenden die Formel an, bis wir ein Ziel finden, das > current_likes ist
-        # (Sicherheitshalber auf 100 Iterationen begrenzt)
-        for _ in range(100):
-            try:
-                next_g = int(eval(str(expression), {"x": current_g}))
-                if next_g <= current_g:  # Verhindert Endlosschleife
-                    next_g = current_g + 10000
-                current_g = next_g
-            except:
-                current_g += 10000
-
-            if current_g > current_likes:
-                return current_g
-
-        return current_g
\ No newline at end of file
+        return self._get_goal_ladder(settings).goal_for(current_likes)
@@ -0,0 +1,118 @@
+import heapq
+import itertools
+import threading
+import time
+from utils import server_log
+
+
+class _Job:
+    __slots__ = ("job_id", "key", "due", "func", "args", "cancelled")
+
+    def __init__(self, job_id, key, due, func, args):
+        self.job_id = job_id
+        self.key = key
+        self.due = due
+        self.func = func
+        self.args = args
+        self.cancelled = False
+
+
+class SchedulerService:
+    """
+    Ein einziger Thread für alle verzögerten Aufgaben (Event-Enden, Overlay ausblenden, Command-Loop).
+    Ersetzt einzelne threading.Timer-Instanzen, die pro Aufruf einen schlafenden Thread erzeugen.
+
+    Jobs mit gleichem 'key' ersetzen sich gegenseitig (Reschedule). Jobs laufen im Scheduler-Thread
+    und sollten daher kurz sein.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._jobs = {}  # job_id -> _Job (nur aktive)
+        self._keys = {}  # key -> job_id
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def _ensure_thread(self):
+        # Lock wird vom Aufrufer gehalten
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, daemon=True, name="Scheduler")
+            self._thread.start()
+
+    def schedule(self, delay, func, *args, key=None):
+        """Führt func(*args) nach 'delay' Sekunden aus. Gibt die Job-ID zurück."""
+        with self._cond:
+            if key is not None:
+                self._cancel_locked(self._keys.get(key))
+            job = _Job(next(self._ids), key, time.monotonic() + max(0.0, delay), func, args)
+            self._jobs[job.job_id] = job
+            if key is not None:
+                self._keys[key] = job.job_id
+            heapq.heappush(self._heap, (job.due, job.job_id, job))
+            self._ensure_thread()
+            self._cond.notify()
+            return job.job_id
+
+    def reschedule(self, key, delay):
+        """Verschiebt einen bestehenden Job (per key). Gibt False zurück, falls keiner existiert."""
+        with self._cond:
+            job = self._jobs.get(self._keys.get(key))
+            if job is None:
+                return False
+            func, args = job.func, job.args
+        self.schedule(delay, func, *args, key=key)
+        return True
+
+    def cancel(self, job_id=None, key=None):
+        """Bricht einen Job per ID oder key ab. Gibt True zurück, falls einer aktiv war."""
+        with self._cond:
+            if job_id is None and key is not None:
+                job_id = self._keys.get(key)
+            return self._cancel_locked(job_id)
+
+    def _cancel_locked(self, job_id):
+        job = self._jobs.pop(job_id, None) if job_id is not None else None
+        if job is None:
+            return False
+        job.cancelled = True  # Wird lazy aus dem Heap entfernt
+        if job.key is not None and self._keys.get(job.key) == job_id:
+            del self._keys[job.key]
+        return True
+
+    def pending(self):
+        """Liste der wartenden Jobs (für Diagnose / API)."""
+        now = time.monotonic()
+        with self._cond:
+            jobs = sorted(self._jobs.values(), key=lambda j: j.due)
+            return [{
+                "id": j.job_id,
+                "key": j.key,
+                "task": getattr(j.func, "__qualname__", repr(j.func)),
+                "due_in": round(max(0.0, j.due - now), 3)
+            } for j in jobs]
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    # Abgebrochene Jobs oben vom Heap entfernen
+                    while self._heap and self._heap[0][2].cancelled:
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0][0] - time.monotonic()
+                    if delay > 0:
+                        self._cond.wait(timeout=delay)
+                        continue
+                    _, _, job = heapq.heappop(self._heap)
+                    self._jobs.pop(job.job_id, None)
+                    if job.key is not None and self._keys.get(job.key) == job.job_id:
+                        del self._keys[job.key]
+                    break
+
+            try:
+                job.func(*job.args)
+            except Exception as e:
+                server_log.error(f"Scheduler Job Fehler ({job.key or job.job_id}): {e}")
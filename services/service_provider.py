@@ -2,22 +2,111 @@
 
 """
 Stellt globale Singleton-Instanzen der Services bereit.
+
+Die Instanzen werden erst beim ersten Zugriff gebaut (lazy), z.B. durch
+`from services.service_provider import twitch_service_instance`. Damit werden
+schwere Abhängigkeiten (pygame, TikTokLive, ...) erst geladen, wenn ein Service
+wirklich gebraucht wird, und nicht schon beim Import dieses Moduls.
 """
 
-from services.like_challenge_service import LikeChallengeService
-from services.subathon_service import SubathonService
-from services.wish_service import WishService
-from services.audio_service import AudioService
-from services.command_service import CommandService
-from services.twitch_service import TwitchService
-from services.currency_service import CurrencyService
-from services.wheel_service import WheelService
-# Globale Singleton-Instanzen
-like_service_instance = LikeChallengeService()
-subathon_service_instance = SubathonService()
-wish_service_instance = WishService()
-audio_service_instance = AudioService()
-command_service_instance = CommandService()
-twitch_service_instance = TwitchService()
-currency_service_instance = CurrencyService()
-wheel_service_instance = WheelService()
\ No newline at end of file
+import importlib
+import threading
+import time
+
+# Name der Instanz -> (Modul, Klasse)
+_REGISTRY = {
+    "event_bus_instance": ("services.event_bus", "EventBus"),
+    "state_broadcaster_instance": ("services.state_broadcaster", "StateBroadcaster"),
+    "scheduler_service_instance": ("services.scheduler_service", "SchedulerService"),
+    "chat_metrics_instance": ("services.chat_metrics_service", "ChatMetricsService"),
+    "like_service_instance": ("services.like_challenge_service", "LikeChallengeService"),
+    "subathon_service_instance": ("services.subathon_service", "SubathonService"),
+    "wish_service_instance": ("services.wish_service", "WishService"),
+    "audio_service_instance": ("services.audio_service", "AudioService"),
+    "command_service_instance": ("services.command_service", "CommandService"),
+    "twitch_service_instance": ("services.twitch_service", "TwitchService"),
+    "currency_service_instance": ("services.currency_service", "CurrencyService"),
+    "wheel_service_instance": ("services.wheel_service", "WheelService"),
+}
+
+# Services mit Hintergrund-Threads, Journal oder Bus-Abonnements. Sie werden beim Start einmal
+# in dieser Reihenfolge gebaut (start_core_services), bevor TikTok, Twitch oder Flask Events
+# liefern können, und nicht nebenbei von dem Thread, der sie zufällig als erster anfasst.
+# Alle anderen (Wünsche, Wheel, Audio, ...) bleiben lazy.
+CORE_SERVICES = (
+    "event_bus_instance",
+    "state_broadcaster_instance",
+    "scheduler_service_instance",
+    "chat_metrics_instance",
+    "currency_service_instance",
+    "subathon_service_instance",
+    "like_service_instance",
+)
+_core_ready = threading.Event()
+
+# RLock: Ein Service darf in seinem __init__ andere Services anfordern
+_lock = threading.RLock()
+_building = set()
+# Name -> Sekunden für Import + Konstruktion (inkl. der dabei gebauten Abhängigkeiten)
+_build_times = {}
+
+
+def get_service(name):
+    """Gibt die Instanz zurück und baut sie beim ersten Aufruf."""
+    instance = globals().get(name)
+    if instance is not None:
+        return instance
+    if name not in _REGISTRY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    with _lock:
+        instance = globals().get(name)
+        if instance is not None:
+            return instance
+        if name in _building:
+            raise RuntimeError(f"Zyklische Service-Abhängigkeit beim Erstellen von {name}")
+        _building.add(name)
+        try:
+            start = time.perf_counter()
+            module_name, class_name = _REGISTRY[name]
+            instance = getattr(importlib.import_module(module_name), class_name)()
+            _build_times[name] = time.perf_counter() - start
+        finally:
+            _building.discard(name)
+        # Ab jetzt normales Modul-Attribut, spätere Zugriffe gehen nicht mehr über __getattr__
+        globals()[name] = instance
+        return instance
+
+
+def __getattr__(name):
+    return get_service(name)
+
+
+def is_created(name):
+    return name in globals()
+
+
+def get_build_times():
+    """Bau-Zeiten der bisher erstellten Services in ms (für den Startup-Report)."""
+    return {name: round(seconds * 1000, 1) for name, seconds in _build_times.items()}
+
+
+def start_core_services():
+    """Baut die CORE_SERVICES der Reihe nach (einmalig, danach ohne Wirkung)."""
+    if _core_ready.is_set():
+        return
+    from utils import server_log
+    try:
+        for name in CORE_SERVICES:
+            try:
+                get_service(name)
+            except Exception as e:
+                server_log.error(f"Service {name} konnte nicht gestartet werden: {e}")
+    finally:
+        # Auch nach einem Fehler freigeben, sonst warten Webserver & Co. für immer
+        _core_ready.set()
+
+
+def wait_core_services(timeout=None):
+    """Blockiert, bis start_core_services() durchgelaufen ist. True, wenn fertig."""
+    return _core_ready.wait(timeout)
@@ -0,0 +1,64 @@
+import threading
+from utils import server_log
+
+
+class StateBroadcaster:
+    """
+    Schiebt Overlay-Zustände per Socket.IO an die Browser-Quellen, statt sie pollen zu lassen.
+
+    - publish(): Zustand (Timer, Like-Fortschritt, aktiver Command, ...). Wird nur gesendet,
+      wenn er sich seit dem letzten Mal geändert hat, und neuen Clients beim Abonnieren nachgereicht.
+    - publish_event(): Einmalige Ereignisse (Wheel-Ergebnis, Gambit, !place). Werden immer
+      gesendet, aber nicht nachgereicht (sonst würde ein Reload die Animation erneut abspielen).
+    """
+
+    # Topics (= Socket.IO Eventnamen)
+    TIMER_STATE = "timer_state"
+    LIKE_PROGRESS = "like_progress"
+    ACTIVE_COMMAND = "active_command"
+    WHEEL_RESULT = "wheel_result"
+    GAMBIT_EVENT = "gambit_event"
+    PLACE_RESULT = "place_result"
+
+    def __init__(self):
+        self._emit = None
+        self._lock = threading.Lock()
+        # Serialisiert das Senden: Reihenfolge beim Client = Reihenfolge der publish()-Aufrufe
+        self._send_lock = threading.Lock()
+        self._last_states = {}
+        self.sent_count = 0
+        self.skipped_count = 0
+
+    def attach(self, emit_func):
+        """Verbindet den Broadcaster mit dem Transport (z.B. socketio.emit)."""
+        self._emit = emit_func
+
+    def publish(self, topic, state):
+        """Sendet einen Zustand nur, wenn er sich geändert hat. Gibt True zurück, falls gesendet."""
+        with self._send_lock:
+            with self._lock:
+                if self._last_states.get(topic) == state:
+                    self.skipped_count += 1
+                    return False
+                self._last_states[topic] = state
+            self._send(topic, state)
+        return True
+
+    def publish_event(self, topic, data):
+        """Sendet ein einmaliges Ereignis an alle verbundenen Overlays."""
+        with self._send_lock:
+            self._send(topic, data)
+
+    def get_state(self, topic):
+        with self._lock:
+            return self._last_states.get(topic)
+
+    def _send(self, topic, data):
+        # Aufrufer hält _send_lock
+        if self._emit is None:
+            return
+        try:
+            self._emit(topic, data)
+            self.sent_count += 1
+        except Exception as e:
+            server_log.error(f"Broadcast Fehler ({topic}): {e}")
@@ -0,0 +1,205 @@
+from collections.abc import Mapping
+
+from TikTokLive.events import GiftEvent, FollowEvent, ShareEvent, CommentEvent, LikeEvent
+from TikTokLive.events.custom_events import SuperFanEvent
+
+# Twitch-Ereignisse (Settings-Key = Art des Ereignisses)
+TWITCH_MSG = "twitch_msg"
+TWITCH_SUB = "twitch_sub"
+TWITCH_GIFT = "twitch_gift"
+TWITCH_BITS = "twitch_bits"
+TWITCH_KINDS = (TWITCH_MSG, TWITCH_SUB, TWITCH_GIFT, TWITCH_BITS)
+
+
+def parse_number(value, default=0.0):
+    """Wandelt Strings sicher in Floats um ("2,5" -> 2.5)."""
+    try:
+        return float(str(value).strip().replace(',', '.'))
+    except (ValueError, TypeError):
+        return default
+
+
+def read_rule(settings, key):
+    """
+    Holt eine Regel aus den Einstellungen.
+    1. Neue Struktur: settings[key] = {'value': 10, 'active': True}
+    2. Alte Struktur (Fallback): settings[key + '_value'] / settings[key + '_active']
+    """
+    if key in settings and isinstance(settings[key], Mapping):
+        return settings[key]
+    return {
+        "value": settings.get(f"{key}_value", 0),
+        "active": settings.get(f"{key}_active", False)
+    }
+
+
+# --- Menge + Grund pro TikTok-Event (Sekunden = Menge * Wert der Regel) ---
+def _gift_units(event):
+    diamonds = event.gift.diamond_count
+    return diamonds, f"Gift ({diamonds})"
+
+
+def _like_units(event):
+    diff = getattr(event, 'calculated_diff', event.count)
+    return diff, f"{diff} Likes (Total Diff)"
+
+
+def _comment_units(event):
+    if event.comment.startswith("!"):
+        return 0, ""
+    return 1, "Chat"
+
+
+def _single(reason):
+    return lambda event: (1, reason)
+
+
+# Event-Klasse -> (Settings-Key, Menge/Grund)
+TIKTOK_RULES = {
+    GiftEvent: ("coins", _gift_units),
+    FollowEvent: ("follow", _single("Follow")),
+    ShareEvent: ("share", _single("Share")),
+    SuperFanEvent: ("subscribe", _single("SuperFanAbo")),
+    LikeEvent: ("like", _like_units),
+    CommentEvent: ("chat", _comment_units),
+}
+
+
+class SubathonRuleTable:
+    """
+    Die Subathon-Einstellungen, einmal vorübersetzt: Pro Event-Klasse bzw. Twitch-Art
+    nur noch (Sekunden pro Einheit, Menge/Grund), Werte schon als float geparst.
+    Inaktive Regeln und Regeln ohne positiven Wert sind None bzw. fehlen.
+
+    Gehört zu genau einem Settings-Snapshot ('snapshot'). Ändern sich die Einstellungen,
+    entsteht ein neuer Snapshot und damit eine neue Tabelle.
+    """
+
+    def __init__(self, settings):
+        self.snapshot = settings
+        self._tiktok = {}
+        for event_class, (key, units) in TIKTOK_RULES.items():
+            seconds = self._compile(settings, key)
+            self._tiktok[event_class] = (seconds, units) if seconds else None
+        self.twitch = {}
+        for kind in TWITCH_KINDS:
+            seconds = self._compile(settings, kind)
+            if seconds:
+                self.twitch[kind] = seconds
+
+    @staticmethod
+    def _compile(settings, key):
+        rule = read_rule(settings, key)
+        if not rule.get("active", False):
+            return None
+        seconds = parse_number(rule.get("value", 0))
+        return seconds if seconds > 0 else None
+
+    def _resolve(self, event_class):
+        """Unbekannte Klasse (z.B. Unterklasse eines Events): einmal über die MRO auflösen und merken."""
+        for base in event_class.__mro__[1:]:
+            if base in TIKTOK_RULES:
+                rule = self._tiktok.get(base)
+                break
+        else:
+            rule = None
+        self._tiktok[event_class] = rule
+        return rule
+
+    def tiktok_seconds(self, event):
+        """Gibt (Sekunden, Grund) für ein TikTok-Event zurück, (0, "") wenn es nichts bringt."""
+        event_class = type(event)
+        try:
+            rule = self._tiktok[event_class]
+        except KeyError:
+            rule = self._resolve(event_class)
+        if rule is None:
+            return 0, ""
+        seconds, units = rule
+        amount, reason = units(event)
+        return amount * seconds, reason
+
+    def twitch_seconds(self, kind):
+        """Sekunden pro Einheit für eine Twitch-Art (0, wenn inaktiv)."""
+        return self.twitch.get(kind, 0)
+
+
+if __name__ == "__main__":
+    # Benchmark: alte if/elif-Kette (pro Event Settings + Parsen) gegen die vorübersetzte Tabelle.
+    # Aufruf aus dem Projektordner: python -m services.subathon_rules [event_samples.json]
+    import json
+    import sys
+    import time
+    from types import MappingProxyType, SimpleNamespace
+
+    path = sys.argv[1] if len(sys.argv) > 1 else "event_samples.json"
+    classes = {cls.__name__: cls for cls in TIKTOK_RULES}
+
+    def make_event(entry):
+        cls = classes.get(entry["event"])
+        if cls is None:
+            return None
+        data = entry.get("dict_data", {})
+        event = object.__new__(cls)
+        if cls is CommentEvent:
+            event.__dict__["content"] = data.get("content", "")
+            if not isinstance(getattr(cls, "comment", None), property):
+                event.__dict__["comment"] = data.get("content", "")
+        elif cls is LikeEvent:
+            event.__dict__["count"] = int(data.get("count", 1))
+        elif cls is GiftEvent:
+            event.__dict__["gift"] = SimpleNamespace(diamond_count=int(data.get("diamond_count", 1)))
+        return event
+
+    with open(path, encoding="utf-8") as f:
+        samples = [e for e in (make_event(json.loads(line)) for line in f if line.strip()) if e is not None]
+    # Geschenke kommen in den Samples nicht vor, damit auch dieser Zweig gemessen wird
+    gift = object.__new__(GiftEvent)
+    gift.__dict__["gift"] = SimpleNamespace(diamond_count=5)
+    samples.append(gift)
+
+    settings = MappingProxyType({
+        "coins": MappingProxyType({"value": "1,5", "active": True}),
+        "follow": MappingProxyType({"value": "30", "active": True}),
+        "share": MappingProxyType({"value": 10, "active": True}),
+        "subscribe": MappingProxyType({"value": 300, "active": True}),
+        "like": MappingProxyType({"value": "0.1", "active": True}),
+        "chat": MappingProxyType({"value": 2, "active": True}),
+    })
+
+    def legacy_seconds(event):
+        s = settings  # wie vorher: pro Event Snapshot holen, Regel lesen, Wert parsen
+        if isinstance(event, GiftEvent):
+            c = read_rule(s, "coins")
+            if c.get("active"): return event.gift.diamond_count * parse_number(c["value"])
+        elif isinstance(event, FollowEvent):
+            c = read_rule(s, "follow")
+            if c.get("active"): return parse_number(c["value"])
+        elif isinstance(event, ShareEvent):
+            c = read_rule(s, "share")
+            if c.get("active"): return parse_number(c["value"])
+        elif isinstance(event, SuperFanEvent):
+            c = read_rule(s, "subscribe")
+            if c.get("active"): return parse_number(c["value"])
+        elif isinstance(event, LikeEvent):
+            c = read_rule(s, "like")
+            if c.get("active"): return getattr(event, 'calculated_diff', event.count) * parse_number(c["value"])
+        elif isinstance(event, CommentEvent):
+            if not event.comment.startswith("!"):
+                c = read_rule(s, "chat")
+                if c.get("active"): return parse_number(c["value"])
+        return 0
+
+    table = SubathonRuleTable(settings)
+    for event in samples:
+        assert abs(legacy_seconds(event) - table.tiktok_seconds(event)[0]) < 1e-9
+
+    rounds = 200_000 // len(samples)
+    for name, func in (("vorher (if/elif)", legacy_seconds),
+                       ("nachher (Tabelle)", table.tiktok_seconds)):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for event in samples:
+                func(event)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<20} {rounds * len(samples) / elapsed:>12,.0f} Events/s")
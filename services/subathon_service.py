@@ -2,14 +2,21 @@ import time
 import threading
 import random
 import os
-import logging
-
-from TikTokLive.events.custom_events import SuperFanEvent
 
 from external.settings_manager import SettingsManager
-from utils import server_log
-from config import get_path
-from TikTokLive.events import GiftEvent, FollowEvent, ShareEvent, SubscribeEvent, CommentEvent, LikeEvent
+from services.timer_engine import TimerEngine
+from external.timer_journal import TimerJournal
+from services.event_channel import EventChannel
+from services.event_bus import EventType, coalesce_likes, is_protected
+from external.event_dispatcher import OverflowPolicy
+from utils import server_log, setup_logging
+from config import get_path, get_persistent_path
+from TikTokLive.events import GiftEvent
+from services.subathon_rules import SubathonRuleTable, parse_number, TWITCH_MSG, TWITCH_SUB, TWITCH_GIFT, TWITCH_BITS
+
+
+# Journal der Timer-Änderungen (übersteht Absturz/Neustart mitten im Subathon)
+JOURNAL_FILENAME = "subathon_journal.jsonl"
 
 
 class SubathonService:
@@ -20,49 +27,121 @@ class SubathonService:
         self.end_sound_played = False
         self.settings_manager = SettingsManager('subathon_overlay/settings.json')
 
-        self.timer_seconds = 0
-        self.is_paused = True
-
-        # Status
-        self.speed_multiplier = 1.0
-        self.add_multiplier = 1.0
-        self.is_frozen = False
-        self.is_blind = False
+        # Timer-Engine: unveränderlicher Zustand (Zeit, Pause, Freeze, Warp, Hype, Blind) hinter einem Lock.
+        # Ihre Condition weckt den Timer-Thread nur bei Übergängen.
+        self._engine = TimerEngine(0)
+        self._timer_cond = self._engine.cond
+        self.journal = TimerJournal(get_persistent_path(JOURNAL_FILENAME), self._journal_snapshot, self._timer_cond)
 
-        self._event_timers = {}
-        self.current_api_ref = None
-        self.gambit_queue = []
+        # Gambit-Ergebnisse: begrenzte Historie mit IDs (Socket.IO, Long-Poll, Replay nach Reconnect)
+        self.gambit_channel = EventChannel()
+        self._rule_table = None
 
-        self._load_initial_state()
+        self._load_initial_state(restore=True)
+        self._engine.journal = self.journal
+        self.journal.start()
         self._initialize_gambler_file()
 
-        self.thread = threading.Thread(target=self._timer_loop, daemon=True)
+        self.thread = threading.Thread(target=self._timer_loop, daemon=True, name="SubathonTimer")
         self.thread.start()
 
-        threading.Thread(target=self._process_gambit_queue, daemon=True).start()
+        # Einmal am Bus anmelden: TikTok, Twitch und Streamer.bot kommen alle über dieselbe Queue.
+        # Bei Stau werden wartende Likes addiert, Chat und Kommentare verdrängen die ältesten ihrer Art.
+        # Gifts, Subs, Bits und Streamer.bot (EventType.PROTECTED) werden nie verdrängt und lassen den
+        # Produzenten nie warten: notfalls landen sie über max_queue hinaus in der Queue ('overflow' + Warnung).
+        self._bus_handlers = {event_type: self._on_bus_tiktok for event_type in EventType.TIKTOK}
+        self._bus_handlers.update({
+            EventType.TWITCH_MESSAGE: lambda e: self.on_twitch_message(e.user),
+            EventType.TWITCH_SUB: lambda e: self.on_twitch_subs(e.user, e.amount, e.data.get("is_gift", False)),
+            EventType.TWITCH_BITS: lambda e: self.on_twitch_bits(e.user, e.amount),
+            EventType.STREAMERBOT: lambda e: self.handle_streamerbot_event(e.data),
+        })
+        from services.service_provider import event_bus_instance
+        event_bus_instance.subscribe(self._on_bus_event, types=self._bus_handlers, name="Subathon",
+                                     max_queue=2000, policy=OverflowPolicy.COALESCE, coalesce_fn=coalesce_likes,
+                                     fallback=OverflowPolicy.DROP_OLDEST, keep_fn=is_protected)
+
+    # --- TIMER ZUSTAND (alles im TimerState der Engine, Lesen ohne Lock) ---
+    @property
+    def timer_seconds(self):
+        return self._engine.remaining()
+
+    @timer_seconds.setter
+    def timer_seconds(self, value):
+        self._engine.set(value)
+
+    @property
+    def is_paused(self):
+        return self._engine.state.paused
+
+    @is_paused.setter
+    def is_paused(self, value):
+        self._engine.update(paused=bool(value))
+
+    @property
+    def is_frozen(self):
+        return self._engine.state.frozen
+
+    @is_frozen.setter
+    def is_frozen(self, value):
+        self._engine.update(frozen=bool(value))
+
+    @property
+    def speed_multiplier(self):
+        return self._engine.state.speed
+
+    @speed_multiplier.setter
+    def speed_multiplier(self, value):
+        self._engine.update(speed=float(value))
+
+    @property
+    def add_multiplier(self):
+        return self._engine.state.add_multiplier
+
+    @add_multiplier.setter
+    def add_multiplier(self, value):
+        self._engine.update(add_multiplier=float(value))
+
+    @property
+    def is_blind(self):
+        return self._engine.state.is_blind
+
+    @is_blind.setter
+    def is_blind(self, value):
+        self._engine.update(is_blind=bool(value))
+
+    def _adjust_time(self, delta, apply_multiplier=False, cause=""):
+        """Addiert/subtrahiert Zeit atomar (Restzeit bleibt >= 0). Gibt (neuer Zustand, addierte Sekunden) zurück."""
+        state, added = self._engine.add(delta, apply_multiplier, cause)
+        if state.value > 0:
+            # Zeit wurde nachgelegt -> End-Sound darf beim nächsten Ablauf wieder spielen
+            self.end_sound_played = False
+        return state, added
 
     # --- SETUP & HELPERS ---
     def _setup_timer_logger(self):
-        logger = logging.getLogger("TimerLog")
-        logger.setLevel(logging.INFO)
-        logger.propagate = False
-        if not logger.handlers:
-            try:
-                h = logging.FileHandler(get_path("timer.log"), mode='a', encoding='utf-8')
-                h.setFormatter(logging.Formatter('%(asctime)s - %(message)s', datefmt='%H:%M:%S'))
-                logger.addHandler(h)
-            except:
-                pass
-        return logger
-
-    def _load_initial_state(self):
+        # timer.log wird zentral in utils.configure_logging eingerichtet (asynchron, rotierend)
+        return setup_logging("TimerLog")
+
+    def _journal_snapshot(self):
+        state, remaining = self._engine.snapshot()
+        return remaining, state.rate
+
+    def _load_initial_state(self, restore=False):
         try:
             s = self.settings_manager.load_settings()
 
-            # FIX: Nutze denselben Key wie die GUI ("start_time_seconds")
-            # Falls nicht vorhanden, Fallback auf "initial_seconds" (alt) oder 3600
-            val = s.get("start_time_seconds", s.get("initial_seconds", 3600))
-            self.timer_seconds = int(float(val))
+            # Nach Absturz/Neustart: Restzeit aus dem Journal statt wieder bei der Startzeit anzufangen.
+            # Der Timer bleibt pausiert, bis der Streamer ihn wieder startet.
+            restored = TimerJournal.replay(self.journal.path) if restore else None
+            if restored is not None:
+                self._engine.set(restored, cause="restore")
+                server_log.info(f"♻️ Subathon-Timer aus Journal wiederhergestellt: {restored:.0f}s")
+            else:
+                # FIX: Nutze denselben Key wie die GUI ("start_time_seconds")
+                # Falls nicht vorhanden, Fallback auf "initial_seconds" (alt) oder 3600
+                val = s.get("start_time_seconds", s.get("initial_seconds", 3600))
+                self._engine.set(int(float(val)), cause="reset")
 
             # Initiale Gambit-Werte setzen, falls leer
             if not s.get("gambit_outcomes"):
@@ -78,15 +157,12 @@ class SubathonService:
 
         except Exception as e:
             server_log.error(f"Fehler beim Laden der Startzeit: {e}")
-            self.timer_seconds = 3600
+            self._engine.set(3600, cause="reset")
 
     # --- HELPER: SICHERE ZAHLEN ---
     def _safe_float(self, value, default=0.0):
         """Wandelt Strings sicher in Floats um."""
-        try:
-            return float(str(value).strip().replace(',', '.'))
-        except (ValueError, TypeError):
-            return default
+        return parse_number(value, default)
 
     def _safe_int(self, value, default=0):
         """Wandelt Strings sicher in Ints um."""
@@ -95,88 +171,33 @@ class SubathonService:
         except (ValueError, TypeError):
             return default
 
-    # --- HELPER: EINSTELLUNGEN HOLEN (Kombiniert neue & alte Struktur) ---
-    def _get_cfg(self, settings, key):
-        """
-        Holt Einstellungen sicher ab.
-        Unterstützt:
-        1. Neue Struktur: settings[key] = {'value': 10, 'active': True}
-        2. Alte Struktur (Fallback): settings[key + '_value']
-        """
-        # Versuch 1: Nested Object (Das ist das Ziel!)
-        if key in settings and isinstance(settings[key], dict):
-            return settings[key]
-
-        # Versuch 2: Fallback auf flache Keys
-        return {
-            "value": settings.get(f"{key}_value", 0),
-            "active": settings.get(f"{key}_active", False)
-        }
-
-    # --- API HOOK (Unverändert wichtig) ---
-    def _ensure_api_hook(self):
-        try:
-            from services.service_provider import like_service_instance
-            current_api = getattr(like_service_instance, 'api_client', None)
-            if current_api is not None and current_api != self.current_api_ref:
-                server_log.info(f"🔌 Subathon: Klinke mich in TikTok-API ein...")
-                current_api.add_listener(self.on_tiktok_event)
-                self.current_api_ref = current_api
-        except:
-            pass
+    # --- REGEL-TABELLE ---
+    def _rules(self):
+        """Vorübersetzte Regeln zum aktuellen Settings-Snapshot (neu gebaut nur nach Änderungen)."""
+        snapshot = self.settings_manager.get_snapshot()
+        table = self._rule_table
+        if table is None or table.snapshot is not snapshot:
+            table = SubathonRuleTable(snapshot)
+            self._rule_table = table
+        return table
 
     # --- EVENT HANDLER ---
+    def _on_bus_event(self, event):
+        """Alle abonnierten Bus-Events landen hier (ein Worker zur Zeit, Reihenfolge bleibt erhalten)."""
+        handler = self._bus_handlers.get(event.type)
+        if handler:
+            handler(event)
+
+    def _on_bus_tiktok(self, event):
+        self.on_tiktok_event(event.raw)
+
     def on_tiktok_event(self, event):
         try:
             if self.is_frozen and not isinstance(event, GiftEvent): return
 
-            settings = self.get_current_settings()
-            added = 0
-            reason = ""
-
-            def get_cfg(key):
-                return self._get_cfg(settings, key)
-
-            if isinstance(event, GiftEvent):
-                c = get_cfg("coins")
-                if c.get("active"):
-                    added = event.gift.diamond_count * self._safe_float(c["value"])
-                    reason = f"Gift ({event.gift.diamond_count})"
-
-            elif isinstance(event, FollowEvent):
-                c = get_cfg("follow")
-                if c.get("active"): added = self._safe_float(c["value"]); reason = "Follow"
-
-            elif isinstance(event, ShareEvent):
-                c = get_cfg("share")
-                if c.get("active"): added = self._safe_float(c["value"]); reason = "Share"
-
-            elif isinstance(event, SuperFanEvent):
-                c = get_cfg("subscribe")
-                if c.get("active"): added = self._safe_float(c["value"]); reason = "SuperFanAbo"
-
-
-            # In services/subathon_service.py
-
-            elif isinstance(event, LikeEvent):
-
-                c = get_cfg("like")
-
-                if c.get("active"):
-                    diff = getattr(event, 'calculated_diff', event.count)
-
-                    added = diff * self._safe_float(c["value"])
-
-                    if added > 0:
-                        reason = f"{diff} Likes (Total Diff)"
-
-            elif isinstance(event, CommentEvent):
-                if not event.comment.startswith("!"):
-                    c = get_cfg("chat")
-                    if c.get("active"): added = self._safe_float(c["value"]); reason = "Chat"
-
+            added, reason = self._rules().tiktok_seconds(event)
             if added > 0:
-                self.add_time(added)
+                self.add_time(added, reason)
                 self.timer_logger.info(f"EVENT: {reason} -> +{added}s")
 
         except Exception as e:
@@ -185,7 +206,7 @@ class SubathonService:
     # --- GAMBLER LOGIK (DYNAMISCH) ---
     def get_gambit_options(self):
         """Gibt die Liste der möglichen Ergebnisse zurück (für Frontend)."""
-        s = self.get_current_settings()
+        s = self.settings_manager.get_snapshot()
         return s.get("gambit_outcomes", [])
 
     def trigger_gambler(self):
@@ -203,15 +224,13 @@ class SubathonService:
 
         # Effekt anwenden
         if rtype == "time_add":
-            self.add_time(rval)
+            self.add_time(rval, f"Gambit {result_text}")
         elif rtype == "time_sub":
-            self.timer_seconds = max(0, self.timer_seconds - rval)
+            self._adjust_time(-rval, cause=f"Gambit {result_text}")
         elif rtype == "time_multi_add":  # Prozent dazu
-            add = int(self.timer_seconds * rval)
-            self.timer_seconds += add
+            self._adjust_time(int(self.timer_seconds * rval), cause=f"Gambit {result_text}")
         elif rtype == "time_multi_sub":  # Prozent weg
-            rem = int(self.timer_seconds * rval)
-            self.timer_seconds = max(0, self.timer_seconds - rem)
+            self._adjust_time(-int(self.timer_seconds * rval), cause=f"Gambit {result_text}")
         elif rtype == "event_freezer":
             self.trigger_freezer(int(rval))
         elif rtype == "event_warp":
@@ -223,51 +242,58 @@ class SubathonService:
 
         server_log.info(f"🎲 GAMBIT: {result_text} ({rtype})")
 
-        # In Queue packen
-        self.gambit_queue.append({
+        gambit_event = {
             "title": "GAMBIT ROULETTE",
             "chamber": result_text,
             "result": result_text,
             "color": color,
             "timestamp": time.time()
-        })
+        }
+
+        # In den Kanal (ID + Historie für Long-Poll/Replay) und direkt an verbundene Overlays pushen
+        gambit_event = self.gambit_channel.publish(gambit_event)
+        try:
+            from services.service_provider import state_broadcaster_instance
+            state_broadcaster_instance.publish_event(state_broadcaster_instance.GAMBIT_EVENT, gambit_event)
+        except Exception as e:
+            server_log.error(f"Gambit Broadcast Fehler: {e}")
+        self._publish_state()
         return result_text
 
     # --- RESTLICHE LOGIK (Timer Loop etc.) ---
     def _timer_loop(self):
-        """Haupt-Loop des Timers."""
+        """
+        Wartet nur auf geplante Übergänge (Ablauf bei 0) statt jede Sekunde zu zählen.
+        Jede Änderung an Zeit oder Rate weckt den Thread, der dann neu plant.
+        Audio und Overlay-Push laufen außerhalb des Locks.
+        """
         while True:
-            self._ensure_api_hook()
-
-            # Nur verarbeiten, wenn nicht pausiert und nicht eingefroren
-            if not self.is_paused and not self.is_frozen:
-                if self.timer_seconds > 0:
-                    # Normaler Countdown
-                    # Wir ziehen die Zeit ab (unter Berücksichtigung des Multiplikators)
-                    self.timer_seconds -= (1 * self.speed_multiplier)
-
-                    # Falls wir jetzt 0 oder weniger erreicht haben:
-                    if self.timer_seconds <= 0:
-                        self.timer_seconds = 0
-                        self.is_paused = True  # WICHTIG: Timer pausieren, damit er bei 0 bleibt!
-
-                        if not self.end_sound_played:
-                            self.end_sound_played = True
-                            self._trigger_end_audio()
-                else:
-                    # Der Timer ist bereits 0, aber der Sound wurde vielleicht noch nicht gespielt
-                    # (Falls der Timer z.B. manuell auf 0 gesetzt wurde)
-                    if not self.end_sound_played:
-                        self.end_sound_played = True
-                        self.is_paused = True
-                        self._trigger_end_audio()
-
-            # Falls der Streamer manuell Zeit hinzufügt (z.B. durch ein Gift),
-            # setzen wir die Sound-Sperre zurück, damit er beim nächsten Ablauf wieder spielt.
-            if self.timer_seconds > 0:
-                self.end_sound_played = False
-
-            time.sleep(1)
+            with self._timer_cond:
+                delay = self._engine.seconds_until_zero()
+                if delay is None:
+                    # Pausiert/eingefroren: Schlafen bis sich etwas ändert
+                    self._timer_cond.wait()
+                    continue
+                if delay > 0:
+                    self._timer_cond.wait(timeout=delay)
+                    continue
+
+                # Timer hat 0 erreicht -> pausieren, damit er bei 0 bleibt
+                self._engine.update(value=0, paused=True)
+                play_end_sound = not self.end_sound_played
+                self.end_sound_played = True
+
+            if play_end_sound:
+                self._trigger_end_audio()
+            self._publish_state()
+
+    def _publish_state(self):
+        """Pusht den Timer-Zustand an die Overlays (nur bei Änderung)."""
+        try:
+            from services.service_provider import state_broadcaster_instance
+            state_broadcaster_instance.publish(state_broadcaster_instance.TIMER_STATE, self.get_state())
+        except Exception:
+            pass
 
     def _trigger_end_audio(self):
         """Löst das Abspielen des Paulchen Panther Sounds aus."""
@@ -279,24 +305,18 @@ class SubathonService:
         except Exception as e:
             server_log.error(f"Fehler beim Starten des End-Audios: {e}")
 
-    def _process_gambit_queue(self):
-        while True:
-            # Einfaches Polling - Queue wird von Frontend via pop_next_gambit_event geleert
-            time.sleep(0.5)
-
     def pop_next_gambit_event(self):
-        if self.gambit_queue: return self.gambit_queue.pop(0)
-        return None
+        return self.gambit_channel.pop_next()
 
-    def add_time(self, seconds):
-        # Last Stand Logik
-        final = seconds * self.add_multiplier
-        self.timer_seconds += final
-        server_log.info(f"ADD: +{final:.1f}s (Base:{seconds}, Hype:x{self.add_multiplier})")
+    def add_time(self, seconds, cause=""):
+        # Last Stand Logik (Multiplikator und Addition aus demselben Zustand)
+        state, final = self._adjust_time(seconds, apply_multiplier=True, cause=cause)
+        server_log.info(f"ADD: +{final:.1f}s (Base:{seconds}, Hype:x{state.add_multiplier})")
+        self._publish_state()
 
     # --- TRIGGER METHODEN FÜR EVENTS (Konfigurierbar) ---
     def _get_duration(self, key, default):
-        s = self.get_current_settings()
+        s = self.settings_manager.get_snapshot()
         # FIX: Sicheres Int-Parsing für Strings aus GUI
         return self._safe_int(s.get(f"duration_{key}", default), default)
 
@@ -332,79 +352,78 @@ class SubathonService:
 
     def set_paused(self, p):
         self.is_paused = p
+        self._publish_state()
 
     def reset_timer(self):
         self._load_initial_state()
+        self._publish_state()
 
     def _reset_event(self, a, d, k):
         setattr(self, a, d);
         server_log.info(f"Event {k} end.")
+        self._publish_state()
 
     def _start_event_timer(self, a, v, d, dur, k):
+        from services.service_provider import scheduler_service_instance
         setattr(self, a, v)
-        if k in self._event_timers: self._event_timers[k].cancel()
-        t = threading.Timer(dur, self._reset_event, [a, d, k])
-        t.start();
-        self._event_timers[k] = t
+        # Gleicher Key -> ein laufendes Event wird verlängert statt doppelt geplant
+        scheduler_service_instance.schedule(dur, self._reset_event, a, d, k, key=f"subathon_{k}")
+        self._publish_state()
 
     def get_state(self):
-        h, r = divmod(int(self.timer_seconds), 3600);
+        # Ein einziger, in sich stimmiger Zustand (kein Lock, blockiert keine Schreiber)
+        state, remaining = self._engine.snapshot()
+        rate = state.rate
+        h, r = divmod(int(remaining), 3600);
         m, s = divmod(r, 60)
-        return {"hours": h, "minutes": m, "seconds": s, "total_seconds": int(self.timer_seconds),
-                "is_paused": self.is_paused, "is_frozen": self.is_frozen, "is_blind": self.is_blind,
-                "is_hype": self.add_multiplier > 1.0, "is_warp": self.speed_multiplier > 1.0}
+        # 'remaining' + 'rate' erlauben dem Overlay, zwischen zwei Pushes selbst herunterzuzählen
+        return {"hours": h, "minutes": m, "seconds": s, "total_seconds": int(remaining),
+                "remaining": round(remaining, 3), "rate": rate,
+                "is_paused": state.paused, "is_frozen": state.frozen, "is_blind": state.is_blind,
+                "is_hype": state.add_multiplier > 1.0, "is_warp": state.speed > 1.0}
 
     def handle_streamerbot_event(self, d):
         if self.is_frozen: return
         if d.get("event") == "add":
-            self.add_time(int(d.get("seconds", 0)))
+            self.add_time(int(d.get("seconds", 0)), "Streamer.bot")
         elif d.get("event") == "sub":
             self.trigger_hype_mode()
 
     # --- TWITCH EVENTS (KORRIGIERT & VEREINHEITLICHT) ---
     def on_twitch_message(self, username):
         """Wird bei jeder Chat-Nachricht aufgerufen."""
-        s = self.get_current_settings()
-        cfg = self._get_cfg(s, "twitch_msg")
-
-        # Check ob aktiv
-        if not cfg.get("active", False): return
-
-        val = self._safe_float(cfg.get("value", 0))
+        val = self._rules().twitch_seconds(TWITCH_MSG)
         if val > 0:
-            self.add_time(val)
+            self.add_time(val, "Twitch Msg")
             self.timer_logger.info(f"TWITCH: Msg ({username}) -> +{val}s")
 
     def on_twitch_sub(self, username, is_gift=False):
         """Wird bei Sub oder Gift-Sub aufgerufen."""
-        s = self.get_current_settings()
-
-        if is_gift:
-            # Gift Sub
-            cfg = self._get_cfg(s, "twitch_gift")
-            if cfg.get("active", False):
-                val = self._safe_float(cfg.get("value", 0))
-                self.add_time(val)
-                self.timer_logger.info(f"TWITCH: Gift Sub ({username}) -> +{val}s")
+        self.on_twitch_subs(username, 1, is_gift)
+
+    def on_twitch_subs(self, username, count, is_gift=False):
+        """Verbucht 'count' Subs auf einmal (z.B. Gift-Bomb): eine Zeitgutschrift, eine Logzeile."""
+        if count <= 0: return
+
+        # Gift Sub bzw. normaler Sub (Prime, Tier 1-3)
+        val = self._rules().twitch_seconds(TWITCH_GIFT if is_gift else TWITCH_SUB)
+        if val <= 0: return
+
+        total = val * count
+        label = "Gift Sub" if is_gift else "Sub"
+        self.add_time(total, f"Twitch {count}x {label}")
+        if count == 1:
+            self.timer_logger.info(f"TWITCH: {label} ({username}) -> +{val}s")
         else:
-            # Normaler Sub (Prime, Tier 1-3)
-            cfg = self._get_cfg(s, "twitch_sub")
-            if cfg.get("active", False):
-                val = self._safe_float(cfg.get("value", 0))
-                self.add_time(val)
-                self.timer_logger.info(f"TWITCH: Sub ({username}) -> +{val}s")
+            self.timer_logger.info(f"TWITCH: {count}x {label} ({username}) -> +{total}s")
 
     def on_twitch_bits(self, username, amount):
         """Wird bei Bits aufgerufen."""
-        s = self.get_current_settings()
-        cfg = self._get_cfg(s, "twitch_bits")
-
-        if cfg.get("active", False):
-            factor = self._safe_float(cfg.get("value", 0))  # Zeit pro 1 Bit
-            total_time = amount * factor
-            if total_time > 0:
-                self.add_time(total_time)
-                self.timer_logger.info(f"TWITCH: {amount} Bits ({username}) -> +{total_time}s")
+        factor = self._rules().twitch_seconds(TWITCH_BITS)  # Zeit pro 1 Bit
+        total_time = amount * factor
+        if total_time > 0:
+            self.add_time(total_time, f"Twitch {amount} Bits")
+            self.timer_logger.info(f"TWITCH: {amount} Bits ({username}) -> +{total_time}s")
 
     def get_time_string(self):
         # Helper für Overlay
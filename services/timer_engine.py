@@ -0,0 +1,168 @@
+import threading
+import time
+from typing import NamedTuple
+
+
+class TimerState(NamedTuple):
+    """
+    Unveränderlicher Zustand des Subathon-Timers.
+
+    'value' ist die Restzeit zum Zeitpunkt 'anchor' (monotone Uhr), 'rate' die abgezogenen
+    Sekunden pro echter Sekunde. Die Restzeit wird beim Lesen berechnet -> kein Drift,
+    keine Sekunden-Granularität. Pause, Freeze und Time-Warp sind nur Rate-Änderungen.
+    """
+    value: float
+    anchor: float
+    rate: float = 0.0
+    paused: bool = True
+    frozen: bool = False
+    speed: float = 1.0
+    add_multiplier: float = 1.0
+    is_blind: bool = False
+
+    def remaining_at(self, now):
+        return max(0.0, self.value - self.rate * (now - self.anchor))
+
+
+class TimerEngine:
+    """
+    Countdown auf Basis der monotonen Uhr, thread-safe.
+
+    Schreiber (Timer-Thread, TikTok-/Twitch-Listener, Flask, Scheduler) nehmen kurz die
+    Condition 'cond', bauen aus dem aktuellen TimerState einen neuen und tauschen die
+    Referenz aus. Leser holen sich nur die Referenz ('state', 'snapshot') und brauchen
+    keinen Lock: Ein TimerState ist immer in sich stimmig und ändert sich nie.
+    Jede Änderung weckt die Threads, die auf 'cond' warten und wird (falls gesetzt)
+    im 'journal' vorgemerkt.
+    """
+
+    def __init__(self, seconds=0.0, clock=time.monotonic):
+        self._clock = clock
+        self.cond = threading.Condition()
+        self._state = TimerState(max(0.0, float(seconds)), clock())
+        self.journal = None  # z.B. TimerJournal (record(event, delta, rate, cause))
+
+    @property
+    def state(self):
+        return self._state
+
+    @property
+    def rate(self):
+        return self._state.rate
+
+    def remaining(self):
+        """Exakte Restzeit in Sekunden (float)."""
+        return self._state.remaining_at(self._clock())
+
+    def snapshot(self):
+        """(TimerState, Restzeit) aus demselben Zustand, ohne Lock."""
+        state = self._state
+        return state, state.remaining_at(self._clock())
+
+    def _commit(self, value=None, delta=0.0, cause="", **changes):
+        """Neuer Zustand ab exakt jetzt (Aufrufer hält 'cond')."""
+        now = self._clock()
+        old = self._state
+        base = old.remaining_at(now) if value is None else float(value)
+        state = old._replace(value=max(0.0, base + delta), anchor=now, **changes)
+        # 0 = angehalten (Pause/Freeze), 1 = normal, 2 = Time-Warp
+        state = state._replace(rate=0.0 if (state.paused or state.frozen) else max(0.0, float(state.speed)))
+        self._state = state
+
+        journal = self.journal
+        if journal is not None:
+            if value is not None:
+                journal.record("set", state.value, state.rate, cause)
+            elif delta:
+                journal.record("add", delta, state.rate, cause)
+            elif state.rate != old.rate:
+                journal.record("rate", 0.0, state.rate, cause)
+        self.cond.notify_all()
+        return state
+
+    def update(self, **changes):
+        """Ändert Felder (paused, frozen, speed, add_multiplier, is_blind, value) atomar."""
+        with self.cond:
+            return self._commit(**changes)
+
+    def set(self, seconds, cause=""):
+        return self.update(value=seconds, cause=cause)
+
+    def add(self, seconds, apply_multiplier=False, cause=""):
+        """
+        Addiert (oder subtrahiert) Zeit, die Restzeit fällt nie unter 0.
+        Mit apply_multiplier wird der Hype-Multiplikator desselben Zustands angewendet.
+        Gibt (neuer Zustand, tatsächlich addierte Sekunden) zurück.
+        """
+        with self.cond:
+            if apply_multiplier:
+                seconds = seconds * self._state.add_multiplier
+            return self._commit(delta=seconds, cause=cause), seconds
+
+    def seconds_until_zero(self):
+        """Echte Sekunden bis der Timer 0 erreicht, None falls er gerade nicht läuft."""
+        state = self._state
+        if state.rate <= 0:
+            return None
+        return state.remaining_at(self._clock()) / state.rate
+
+
+if __name__ == "__main__":
+    # Stresstest: 100k gleichzeitige add()-Aufrufe aus vielen Threads auf einen laufenden Timer,
+    # die Summe muss stimmen und kein Leser darf einen zerrissenen Zustand sehen.
+    # Aufruf aus dem Projektordner: python -m services.timer_engine
+    import itertools
+    import sys
+
+    THREADS = 50
+    CALLS_PER_THREAD = 2000
+    SPEED = 1.5
+    TICK = 1e-6  # Künstliche Uhr: jeder Aufruf rückt sie um TICK vor -> reproduzierbar, ohne Sleep
+    sys.setswitchinterval(1e-6)  # Thread-Wechsel provozieren
+
+    ticks = itertools.count()
+    clock = lambda: next(ticks) * TICK
+    engine = TimerEngine(1_000_000, clock=clock)
+    engine.update(paused=False, speed=SPEED, add_multiplier=2.0)
+    start_anchor = engine.state.anchor
+    start_gate = threading.Barrier(THREADS)
+    stop = threading.Event()
+
+    def writer(n):
+        start_gate.wait()
+        for i in range(CALLS_PER_THREAD):
+            engine.add(1 + (i + n) % 3, apply_multiplier=True)
+
+    def reader():
+        torn = 0
+        reads = 0
+        while not stop.is_set():
+            before = clock()
+            state, remaining = engine.snapshot()
+            after = clock()
+            reads += 1
+            # Restzeit muss aus genau diesem (value, anchor, rate) zu einem Zeitpunkt
+            # zwischen 'before' und 'after' stammen; die Rate muss zu den Flags passen.
+            if (state.rate != SPEED or state.anchor > after
+                    or not state.remaining_at(after) <= remaining <= state.remaining_at(before)):
+                torn += 1
+        print(f"Leser: {torn} inkonsistente von {reads:,} Snapshots")
+        assert torn == 0, "Zerrissener Zustand gelesen!"
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(THREADS)]
+    reader_thread = threading.Thread(target=reader)
+    reader_thread.start()
+    t0 = time.perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    reader_thread.join()
+
+    added = 2.0 * sum(1 + (i + n) % 3 for n in range(THREADS) for i in range(CALLS_PER_THREAD))
+    now = clock()
+    expected = 1_000_000 + added - SPEED * (now - start_anchor)
+    total = engine.state.remaining_at(now)
+    print(f"{THREADS * CALLS_PER_THREAD:,} add()-Aufrufe in {elapsed:.2f}s -> {total:.3f}s (erwartet {expected:.3f}s)")
+    assert abs(total - expected) < 1e-3, "Sekunden verloren!"
+    print("OK")
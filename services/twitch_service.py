@@ -1,24 +1,67 @@
-import socket
-import threading
 import time
-from collections import deque
+from collections import OrderedDict
 
-from external.Twitch_API import twitch_log
-from utils import server_log
+from external.chat_outbox import ChatOutbox, Priority
+from external.event_dispatcher import EventDispatcher, OverflowPolicy
+from external.irc_parser import parse_line
+from external.twitch_irc import TwitchIrcClient
+from utils import server_log, setup_logging
 from config import APP_VERSION
 from external.settings_manager import SettingsManager
+from services.event_bus import EventType
+
+# Gleicher Logger wie im alten twitchio-Wrapper, ohne twitchio beim Start zu importieren
+twitch_log = setup_logging("TwitchAPI")
+
+# Maximal wartende Chat-Zeilen, bevor die ältesten normalen Chat-Zeilen verworfen werden
+# (Lese-Pfad blockiert nie; Subs und Bits werden nie verworfen, siehe _is_paid_line)
+HANDLER_QUEUE_SIZE = 2000
+# Anzahl gemerkter Gift-Bombs (origin-id), deren einzelne subgift-Notices noch erwartet werden
+MAX_TRACKED_GIFT_BOMBS = 64
 
 
 class TwitchService:
     def __init__(self):
-        self.sock = None
+        self.irc = None
         self.running = False
         self.username = ""
         self.oauth_token = ""
         self.channel = ""
 
-        self.message_timestamps = deque()
-        self.connected = False
+        # Gift-Bomb Korrelation: origin-id -> noch erwartete subgift-Notices.
+        # Nur der Handler-Worker greift darauf zu, daher ohne Lock.
+        self._gift_bombs = OrderedDict()
+
+        # Verarbeitung der Zeilen läuft in einem eigenen Worker, getrennt vom Socket-Lesen.
+        # Ein Worker = Reihenfolge der Chat-Nachrichten bleibt erhalten.
+        # Bei Überlast wird nur normaler Chat verworfen, USERNOTICE und Bits-Nachrichten nie.
+        self.handler = EventDispatcher(workers=1, max_queue=HANDLER_QUEUE_SIZE,
+                                       policy=OverflowPolicy.DROP_OLDEST, name="TwitchHandler")
+        self.handler.add_listener(self._process_line, name="TwitchService._process_line",
+                                  keep_fn=self._is_paid_line)
+
+        # Chat, Subs und Bits gehen als Events auf den Bus; wer sie braucht (Subathon, Metriken), hat dort abonniert
+        from services.service_provider import event_bus_instance
+        self.event_bus = event_bus_instance
+
+        # Dispatch-Tabellen: IRC-Command -> Handler, Chat-Command -> Handler
+        self._irc_handlers = {
+            "PRIVMSG": self._handle_message,
+            "USERNOTICE": self._handle_usernotice,
+            "USERSTATE": self._handle_userstate,
+        }
+        self._chat_commands = {
+            "!version": self._cmd_version,
+            "!score": self._cmd_score,
+            "!points": self._cmd_score,
+            "!cash": self._cmd_score,
+            "!send": self._cmd_send,
+            "!spin": self._cmd_spin,
+            "!place": self._cmd_place,
+        }
+
+        # Ausgehende Nachrichten laufen über einen Token-Bucket (Twitch Limit pro 30s)
+        self.outbox = ChatOutbox(self._send_raw, name="TwitchOutbox")
 
         # ÄNDERUNG: Speichert API-Daten jetzt im 'external' Ordner!
         self.settings_manager = SettingsManager("external/twitch_settings.json")
@@ -60,29 +103,49 @@ class TwitchService:
         if self.username and "oauth:" in self.oauth_token:
             self.start()
 
+    @property
+    def connected(self):
+        return self.irc is not None and self.irc.connected
+
     def start(self):
+        # Erst die Bus-Abonnenten (Subathon, ...), sonst gehen frühe Subs/Bits ins Leere
+        from services.service_provider import start_core_services
+        start_core_services()
         self.running = True
-        threading.Thread(target=self._connection_loop, daemon=True, name="TwitchBot").start()
-        threading.Thread(target=self._metrics_loop, daemon=True, name="TwitchMetrics").start()
+        self.handler.start()
+        # Der Bot schreibt im eigenen Kanal -> Broadcaster-Limits, bis USERSTATE etwas anderes sagt
+        self.outbox.set_moderator(self.username == self.channel)
+        self.outbox.start()
+        self.irc = TwitchIrcClient(self.username, self.oauth_token, self.channel, on_line=self.handler.dispatch)
+        self.irc.start()
 
     def stop(self):
         self.running = False
-        if self.sock:
-            try:
-                self.sock.close()
-            except:
-                pass
-        self.connected = False
+        if self.irc:
+            self.irc.stop()
+            self.irc = None
+        self.handler.stop()
+        self.outbox.stop()
         server_log.info("Twitch Service gestoppt.")
 
-    def send_message(self, message):
-        if not self.connected or not self.sock: return
-        try:
-            cmd = f"PRIVMSG #{self.channel} :{message}\r\n"
-            self.sock.send(cmd.encode("utf-8"))
-            server_log.info(f"🤖 Bot: {message}")
-        except:
-            pass
+    def send_message(self, message, priority=Priority.REPLY, key=None):
+        """
+        Reiht eine Chat-Nachricht in die Outbox ein (thread-safe).
+        Danke-Nachrichten mit Priority.THANKS senden, damit Command-Antworten Vorrang haben.
+        """
+        if not self.connected: return
+        self.outbox.enqueue(message, priority=priority, key=key)
+
+    def _send_raw(self, message):
+        """Wird vom Outbox-Thread aufgerufen, sobald der Token-Bucket es erlaubt."""
+        irc = self.irc
+        if irc is None or not irc.send(f"PRIVMSG #{self.channel} :{message}"):
+            return False
+        server_log.info(f"🤖 Bot: {message}")
+        return True
+
+    def get_outbox_stats(self):
+        return self.outbox.get_stats()
 
     def get_currency_name(self):
         """Holt den aktuellen Währungsnamen sicher aus dem CurrencyService."""
@@ -96,71 +159,34 @@ class TwitchService:
             pass
         return self.settings.get("currency_name", "Whieties")
 
-    def _connection_loop(self):
-        host = "irc.chat.twitch.tv"
-        port = 6667
-        while self.running:
-            try:
-                self.sock = socket.socket()
-                self.sock.connect((host, port))
-                self.sock.send(f"PASS {self.oauth_token}\r\n".encode("utf-8"))
-                self.sock.send(f"NICK {self.username}\r\n".encode("utf-8"))
-                self.sock.send("CAP REQ :twitch.tv/tags twitch.tv/commands twitch.tv/membership\r\n".encode("utf-8"))
-                self.sock.send(f"JOIN #{self.channel}\r\n".encode("utf-8"))
-                self.connected = True
-                server_log.info(f"Twitch Connected als {self.username}")
-
-                buffer = ""
-                while self.running:
-                    data = self.sock.recv(2048).decode("utf-8")
-                    if not data: break
-                    buffer += data
-                    lines = buffer.split("\r\n")
-                    buffer = lines.pop()
-                    for line in lines: self._process_line(line)
-            except:
-                self.connected = False
-                time.sleep(5)
+    @staticmethod
+    def _is_paid_line(line):
+        """True für Zeilen, die nicht verloren gehen dürfen: USERNOTICE (Subs, Gifts) und Bits."""
+        # Nur Tags, Prefix und Command prüfen, nicht den Chat-Text (sonst könnte Chat sich "schützen")
+        parts = line.split(" ", 3)
+        tags = parts[0][1:] if line.startswith("@") else ""
+        head = parts[1:3] if tags else parts[:2]
+        if "USERNOTICE" in head:
+            return True
+        return tags.startswith("bits=") or ";bits=" in tags
 
     def _process_line(self, line):
-        if line.startswith("PING"):
-            payload = line.split(" ", 1)[1] if " " in line else ":tmi.twitch.tv"
-            try:
-                self.sock.send(f"PONG {payload}\r\n".encode("utf-8"))
-            except:
-                pass
-            return
-
+        """Läuft im Handler-Worker (PING/PONG erledigt bereits der IRC-Client)."""
         try:
-            tags = {}
-            if line.startswith("@"):
-                parts = line.split(" ", 1)
-                tag_str = parts[0][1:]
-                line = parts[1]
-                for item in tag_str.split(";"):
-                    if "=" in item:
-                        k, v = item.split("=", 1)
-                        tags[k] = v
-            if "PRIVMSG" in line: self._handle_message(line, tags)
-            if "USERNOTICE" in line: self._handle_usernotice(tags)
+            msg = parse_line(line)
+            if msg is None: return
+            handler = self._irc_handlers.get(msg.command)
+            if handler: handler(msg)
         except Exception as e:
             server_log.error(f"Parse Error: {e}")
 
-    def _handle_message(self, line, tags):
-        from services.service_provider import (
-            currency_service_instance,
-            subathon_service_instance,
-            wheel_service_instance,
-            wish_service_instance
-        )
+    def _handle_message(self, msg):
+        from services.service_provider import currency_service_instance
 
-        c_name = self.get_currency_name()
-
-        self.message_timestamps.append(time.time())
-        user = tags.get("display-name", "Unknown")
+        user = msg.tag("display-name") or "Unknown"
 
-        # 1. Subathon Timer (Chat Aktivität)
-        subathon_service_instance.on_twitch_message(user)
+        # 1. Auf den Bus (Subathon Timer, Chat-Rate)
+        self.event_bus.publish(EventType.TWITCH_MESSAGE, "twitch", user)
 
         # 2. Punkte für Nachricht
         pts_msg = int(self.settings.get("currency_per_message", 0))
@@ -168,103 +194,126 @@ class TwitchService:
             currency_service_instance.add_points(user, pts_msg)
 
         # 3. Bits handling
-        if "bits" in tags:
+        bits_tag = msg.tag("bits")
+        if bits_tag is not None:
             try:
-                bits = int(tags["bits"])
+                bits = int(bits_tag)
                 server_log.info(f"💎 BITS: {user} - {bits} Bits")
-                subathon_service_instance.on_twitch_bits(user, bits)
+                self.event_bus.publish(EventType.TWITCH_BITS, "twitch", user, bits)
                 factor = float(self.settings.get("currency_per_bit", 0))
                 if factor > 0:
                     amount = int(bits * factor)
                     currency_service_instance.add_points(user, amount)
-                    self.send_message(f"Danke {user} für {bits} Bits! (+{amount} {c_name})")
+                    c_name = self.get_currency_name()
+                    self.send_message(f"Danke {user} für {bits} Bits! (+{amount} {c_name})", Priority.THANKS)
             except Exception as e:
                 server_log.error(f"Bits Error: {e}")
 
-        # 4. Commands Parsing
-        parts = line.split("PRIVMSG", 1)
-        if len(parts) > 1:
-            msg_content = parts[1].split(":", 1)[1].strip()
-            args = msg_content.split(" ")
-            cmd = args[0].lower()
-
-            if cmd == "!version":
-                self.send_message(f"StreamForge Version: {APP_VERSION} 🛠️")
-
-            elif cmd in ["!score", "!points", "!cash"]:
-                if self.settings.get("currency_cmd_score_active", True):
-                    bal = currency_service_instance.get_balance(user)
-                    self.send_message(f"@{user}, du hast {bal} {c_name}.")
-
-            elif cmd == "!send":
-                if self.settings.get("currency_cmd_send_active", True):
-                    if len(args) < 3:
-                        self.send_message(f"@{user}, Nutzung: !send <Name> <Menge>")
-                    else:
-                        recipient = args[1].replace("@", "")
-                        try:
-                            amount = int(args[2])
-                            success, msg = currency_service_instance.transfer(user, recipient, amount)
-                            self.send_message(f"@{user}: {msg}")
-                        except ValueError:
-                            self.send_message("Bitte eine gültige Zahl eingeben.")
-
-            # --- WHEEL COMMAND (!spin) ---
-
-            elif cmd == "!spin":
-                        spin_args = args[1:]
-                        server_log.info(f"🎰 !spin von {user}")
-                        # ÄNDERUNG: Rückgabewerte auffangen und senden
-                        success, msg = wheel_service_instance.handle_spin(user, spin_args)
-                        if msg:
-                            self.send_message(msg)
-
-            # --- PLACE COMMAND (!place) ---
-            elif cmd == "!place":
-                server_log.info(f"📍 !place von {user}")
-                wish_service_instance.check_user_place(user)
-
-    def _handle_usernotice(self, tags):
-        from services.service_provider import currency_service_instance, subathon_service_instance
+        # 4. Commands (nur der Text nach ':' zählt, nicht Treffer irgendwo in der Zeile)
+        content = (msg.trailing or "").strip()
+        if not content.startswith("!"): return
+        args = content.split(" ")
+        command = self._chat_commands.get(args[0].lower())
+        if command:
+            command(user, args)
 
-        c_name = self.get_currency_name()
+    # --- CHAT COMMANDS ---
+    def _cmd_version(self, user, args):
+        self.send_message(f"StreamForge Version: {APP_VERSION} 🛠️")
 
-        msg_id = tags.get("msg-id")
-        user = tags.get("display-name", "Unknown")
+    def _cmd_score(self, user, args):
+        if self.settings.get("currency_cmd_score_active", True):
+            from services.service_provider import currency_service_instance
+            bal = currency_service_instance.get_balance(user)
+            self.send_message(f"@{user}, du hast {bal} {self.get_currency_name()}.")
+
+    def _cmd_send(self, user, args):
+        if not self.settings.get("currency_cmd_send_active", True): return
+        if len(args) < 3:
+            self.send_message(f"@{user}, Nutzung: !send <Name> <Menge>")
+            return
+        from services.service_provider import currency_service_instance
+        recipient = args[1].replace("@", "")
+        try:
+            amount = int(args[2])
+            success, msg = currency_service_instance.transfer(user, recipient, amount)
+            self.send_message(f"@{user}: {msg}")
+        except ValueError:
+            self.send_message("Bitte eine gültige Zahl eingeben.")
+
+    def _cmd_spin(self, user, args):
+        from services.service_provider import wheel_service_instance
+        server_log.info(f"🎰 !spin von {user}")
+        success, msg = wheel_service_instance.handle_spin(user, args[1:])
+        if msg:
+            self.send_message(msg)
+
+    def _cmd_place(self, user, args):
+        from services.service_provider import wish_service_instance
+        server_log.info(f"📍 !place von {user}")
+        wish_service_instance.check_user_place(user)
+
+    def _handle_userstate(self, msg):
+        """USERSTATE im Kanal verrät, ob der Bot Moderator/Broadcaster ist (höheres Nachrichtenlimit)."""
+        badges = msg.tag("badges", "")
+        self.outbox.set_moderator(msg.tag("mod") == "1" or "broadcaster/" in badges)
+
+    def _handle_usernotice(self, msg):
+        from services.service_provider import currency_service_instance
+
+        msg_id = msg.tag("msg-id")
+        # subgift als Teil einer Gift-Bomb? Dann wurde er mit dem Header schon komplett verbucht.
+        if msg_id == "subgift" and self._consume_gift_bomb(msg.tag("msg-param-origin-id")): return
+
+        c_name = self.get_currency_name()
+        user = msg.tag("display-name") or "Unknown"
         pts_sub = int(self.settings.get("currency_per_sub", 0))
 
         server_log.info(f"🔔 SUB EVENT: {msg_id} von {user}")
 
         if msg_id in ["sub", "resub"]:
-            subathon_service_instance.on_twitch_sub(user, is_gift=False)
+            self.event_bus.publish(EventType.TWITCH_SUB, "twitch", user, 1, {"is_gift": False})
             if pts_sub > 0:
                 currency_service_instance.add_points(user, pts_sub)
-                self.send_message(f"Danke für den Sub {user}! (+{pts_sub} {c_name})")
+                self.send_message(f"Danke für den Sub {user}! (+{pts_sub} {c_name})", Priority.THANKS)
 
         elif msg_id == "subgift":
-            subathon_service_instance.on_twitch_sub(user, is_gift=True)
+            self.event_bus.publish(EventType.TWITCH_SUB, "twitch", user, 1, {"is_gift": True})
             if pts_sub > 0:
                 currency_service_instance.add_points(user, pts_sub)
 
         elif msg_id == "submysterygift":
-            count = int(tags.get("msg-param-mass-gift-count", "1"))
+            count = int(msg.tag("msg-param-mass-gift-count", "1"))
             server_log.info(f"💣 GiftBomb von {user}: {count} Subs")
-            for _ in range(count):
-                subathon_service_instance.on_twitch_sub(user, is_gift=True)
+            self._track_gift_bomb(msg.tag("msg-param-origin-id"), count)
+            self.event_bus.publish(EventType.TWITCH_SUB, "twitch", user, count, {"is_gift": True})
 
             total = count * pts_sub
             if total > 0:
                 currency_service_instance.add_points(user, total)
-                self.send_message(f"WOW! {count} Gift-Subs von {user}! (+{total} {c_name})")
-
-    def _metrics_loop(self):
-        while True:
-            time.sleep(60)
-            while self.message_timestamps and self.message_timestamps[0] < time.time() - 60:
-                self.message_timestamps.popleft()
+                self.send_message(f"WOW! {count} Gift-Subs von {user}! (+{total} {c_name})", Priority.THANKS)
+
+    def _track_gift_bomb(self, origin_id, count):
+        """Merkt sich, wie viele subgift-Notices zu dieser Gift-Bomb noch folgen."""
+        if not origin_id or count <= 0: return
+        self._gift_bombs[origin_id] = count
+        while len(self._gift_bombs) > MAX_TRACKED_GIFT_BOMBS:
+            self._gift_bombs.popitem(last=False)
+
+    def _consume_gift_bomb(self, origin_id):
+        """True, falls der subgift zu einer bereits verbuchten Gift-Bomb gehört."""
+        remaining = self._gift_bombs.get(origin_id) if origin_id else None
+        if remaining is None: return False
+        if remaining <= 1:
+            del self._gift_bombs[origin_id]
+        else:
+            self._gift_bombs[origin_id] = remaining - 1
+        return True
 
     def get_chat_minute(self):
-        return len(self.message_timestamps)
+        """Twitch Chat-Nachrichten pro Minute (gleitendes Fenster)."""
+        from services.service_provider import chat_metrics_instance
+        return chat_metrics_instance.get_per_minute(chat_metrics_instance.TWITCH)
 
     def get_status(self):
         return {"connected": self.connected, "username": self.username}
@@ -38,7 +38,7 @@ class WheelService:
         # Wir entfernen den Import von twitch_service_instance hier drin!
 
         # 1. Cooldown Check (PRO USER)
-        settings = self.get_settings()
+        settings = self.settings_manager.get_snapshot()
         cooldown = settings.get("cooldown_seconds", 0)
 
         last_time = self.user_cooldowns.get(user, 0)
@@ -92,6 +92,13 @@ class WheelService:
         if win_amount > 0:
             currency_service_instance.add_points(user, win_amount)
 
+        # Ergebnis direkt ans Overlay pushen
+        try:
+            from services.service_provider import state_broadcaster_instance
+            state_broadcaster_instance.publish_event(state_broadcaster_instance.WHEEL_RESULT, self.current_state)
+        except Exception as e:
+            server_log.error(f"Wheel Broadcast Fehler: {e}")
+
         # Nachricht zurückgeben
         if multiplier > 1:
             return True, f"@{user} Glückwunsch! x{multiplier} -> +{win_amount} Coins! 🎉"
@@ -2,17 +2,31 @@ import json
 import os
 import time
 import threading
+from collections import OrderedDict
 from database.wish_repository import WishRepository
 from utils import wishes_log
 from config import get_path
 
+# Anzahl der Wünsche, die das Overlay gleichzeitig anzeigt
+HEAD_PAGE_SIZE = 2
+
+# Wiederholte !place Abfragen desselben Users innerhalb dieses Fensters werden aus dem Cache bedient
+PLACE_CACHE_TTL = 2.0
+# Maximal gecachte User (LRU), damit der Cache bei vielen verschiedenen Usern nicht wächst
+PLACE_CACHE_SIZE = 256
+
 
 class WishService:
     """Verwaltet die Geschäftslogik für Killerwünsche."""
 
     def __init__(self):
         self.repository = WishRepository()
-        self.offset_counter = 0
+        # Kopf der Queue für das Overlay; None = muss neu geladen werden
+        self._head_cache = None
+        # user_key -> (platz, anzeigename, zeitpunkt), LRU-Reihenfolge; wird bei jeder Änderung der Queue geleert
+        self._place_cache = OrderedDict()
+        self._cache_generation = 0
+        self._cache_lock = threading.Lock()
         self._initialize_overlay_file()
 
     def _initialize_overlay_file(self):
@@ -24,37 +38,59 @@ class WishService:
         except Exception as e:
             wishes_log.error(f"Fehler beim Initialisieren des Place-Overlays: {e}")
 
+    @staticmethod
+    def _public(rows):
+        """Nur die Felder, die das Overlay braucht (ohne Cursor-Spalten)."""
+        return [{"wunsch": row["wunsch"], "user_name": row["user_name"]} for row in rows]
+
     def get_current_wishes(self):
-        return self.repository.get_wishes(self.offset_counter)
+        """Kopf der Queue. Wird aus dem Speicher bedient, bis sich die Queue ändert."""
+        with self._cache_lock:
+            if self._head_cache is not None:
+                return list(self._head_cache)
+            generation = self._cache_generation
+
+        head = self._public(self.repository.get_wishes(HEAD_PAGE_SIZE))
+
+        with self._cache_lock:
+            if generation == self._cache_generation:
+                self._head_cache = head
+        return list(head)
+
+    def get_wishes_page(self, after=None, limit=HEAD_PAGE_SIZE):
+        """
+        Blättert durch die Queue. Gibt (wuensche, next_cursor) zurück;
+        next_cursor ist None, wenn es keine weiteren Einträge gibt.
+        """
+        rows = self.repository.get_wishes(limit, after)
+        next_cursor = (rows[-1]["datum"], rows[-1]["id"]) if len(rows) == limit else None
+        return self._public(rows), next_cursor
+
+    def _invalidate_caches(self):
+        with self._cache_lock:
+            self._head_cache = None
+            self._place_cache.clear()
+            self._cache_generation += 1
 
     def advance_offset(self):
+        """Entfernt den ältesten Wunsch. Der neue Kopf der Queue ist immer die erste Seite (Offset 0)."""
         self.repository.delete_oldest_wish()
-        total = self.repository.count_total_wishes()
-        if self.offset_counter >= total:
-            self.offset_counter = 0
-        return self.offset_counter
+        self._invalidate_caches()
+        return 0
 
     def add_new_wish(self, wunsch, user_name):
         self.repository.add_wish(wunsch, user_name)
+        self._invalidate_caches()
         wishes_log.info(f'Neuer Wunsch von {user_name}: {wunsch}')
 
     def reset_wishes(self):
         self.repository.delete_all_wishes()
-        self.offset_counter = 0
+        self._invalidate_caches()
 
     # --- !place Logik MIT AUTO-RESET ---
     def check_user_place(self, user_name):
         """Ermittelt Platz, schreibt Overlay und löscht es nach 8s."""
-        all_users = self.repository.get_all_user_names()
-
-        try:
-            user_lower = user_name.lower()
-            all_users_lower = [u.lower() for u in all_users]
-            place = all_users_lower.index(user_lower) + 1
-            display_name = all_users[place - 1]  # Original Name aus DB
-        except ValueError:
-            place = -1
-            display_name = user_name
+        place, display_name = self._lookup_place(user_name)
 
         wishes_log.info(f"CHECK PLACE für '{user_name}': Platz {place}")
 
@@ -65,16 +101,55 @@ class WishService:
                 "timestamp": time.time()
             }
             self._write_place_overlay(overlay_data)
+            self._publish_place(overlay_data)
 
-            # Timer starten: Nach 8 Sekunden Datei leeren
-            threading.Timer(8.0, self._clear_overlay).start()
+            # Nach 8 Sekunden Datei leeren (erneutes !place verschiebt den Job nur)
+            from services.service_provider import scheduler_service_instance
+            scheduler_service_instance.schedule(8.0, self._clear_overlay, key="place_overlay_clear")
             return place
         else:
             return None
 
+    def _lookup_place(self, user_name):
+        """Platz per Index-Abfrage, kurzzeitig gecacht. Gibt (platz, anzeigename) zurück, -1 falls unbekannt."""
+        user_key = user_name.lower()
+        now = time.monotonic()
+        with self._cache_lock:
+            cached = self._place_cache.get(user_key)
+            if cached:
+                if now - cached[2] < PLACE_CACHE_TTL:
+                    self._place_cache.move_to_end(user_key)
+                    return cached[0], cached[1]
+                del self._place_cache[user_key]  # Abgelaufen
+            generation = self._cache_generation
+
+        result = self.repository.get_user_place(user_name)
+        place, display_name = result if result else (-1, user_name)  # Original Name aus DB
+
+        with self._cache_lock:
+            # Nur cachen, wenn sich die Queue während der Abfrage nicht geändert hat
+            if generation == self._cache_generation:
+                cache = self._place_cache
+                cache[user_key] = (place, display_name, now)
+                cache.move_to_end(user_key)
+                # Abgelaufene Einträge vorne und alles über der Größe verwerfen
+                while cache and (len(cache) > PLACE_CACHE_SIZE
+                                 or now - next(iter(cache.values()))[2] >= PLACE_CACHE_TTL):
+                    cache.popitem(last=False)
+        return place, display_name
+
     def _clear_overlay(self):
         """Leert die active.json, damit das Overlay verschwindet."""
         self._write_place_overlay({})
+        self._publish_place({})
+
+    def _publish_place(self, data):
+        """Pusht das !place Ergebnis an das Overlay."""
+        try:
+            from services.service_provider import state_broadcaster_instance
+            state_broadcaster_instance.publish_event(state_broadcaster_instance.PLACE_RESULT, data)
+        except Exception as e:
+            wishes_log.error(f"Place Broadcast Fehler: {e}")
 
     def _write_place_overlay(self, data):
         try:
@@ -1,32 +1,64 @@
 const API_URL = '/api/v1/timer/state';
 const timerElement = document.getElementById('timer'); // Stelle sicher, dass du ein Element mit id="timer" in der HTML hast
 
+// Einmaliger Abruf beim Laden, danach kommen Updates per Socket.IO
 async function updateTimer() {
     try {
         const response = await fetch(API_URL);
         const data = await response.json();
+        // Ein Push, der vor der Antwort ankam, ist neuer als der abgerufene Stand
+        if (!pushReceived) renderTimer(data);
+    } catch (error) {
+        console.error("Timer API Fehler:", error);
+    }
+}
 
-        // Zeit formatieren
-        const h = String(data.hours).padStart(2, '0');
-        const m = String(data.minutes).padStart(2, '0');
-        const s = String(data.seconds).padStart(2, '0');
+// Letzter Stand vom Server; zwischen zwei Pushes zählt das Overlay lokal herunter
+let lastState = null;
+let receivedAt = 0;
+let pushReceived = false;
 
-        // Anzeige setzen
-        if (timerElement) {
-            timerElement.textContent = `${h}:${m}:${s}`;
+function renderTimer(data) {
+    if (!data) return;
+    lastState = data;
+    receivedAt = performance.now();
+    drawTimer();
+}
 
-            // Klassen für Effekte hinzufügen (Hype Train, Frozen etc.)
-            document.body.classList.toggle('hype-mode', data.is_hype);
-            document.body.classList.toggle('frozen-mode', data.is_frozen);
-            document.body.classList.toggle('blind-mode', data.is_blind);
-            document.body.classList.toggle('paused', data.is_paused);
-        }
+function drawTimer() {
+    if (!lastState) return;
+    const data = lastState;
 
-    } catch (error) {
-        console.error("Timer API Fehler:", error);
+    // Restzeit = Stand beim Push - Rate * vergangene Zeit (Rate 0 = pausiert/eingefroren)
+    const base = (data.remaining !== undefined) ? data.remaining : data.total_seconds;
+    const elapsed = (performance.now() - receivedAt) / 1000;
+    const total = Math.max(0, Math.floor(base - (data.rate || 0) * elapsed));
+
+    // Zeit formatieren
+    const h = String(Math.floor(total / 3600)).padStart(2, '0');
+    const m = String(Math.floor((total % 3600) / 60)).padStart(2, '0');
+    const s = String(total % 60).padStart(2, '0');
+
+    // Anzeige setzen
+    if (timerElement) {
+        timerElement.textContent = `${h}:${m}:${s}`;
+
+        // Klassen für Effekte hinzufügen (Hype Train, Frozen etc.)
+        document.body.classList.toggle('hype-mode', data.is_hype);
+        document.body.classList.toggle('frozen-mode', data.is_frozen);
+        document.body.classList.toggle('blind-mode', data.is_blind);
+        document.body.classList.toggle('paused', data.is_paused);
     }
 }
 
-// Schnell aktualisieren (jede Sekunde oder öfter für flüssige Anzeige)
-setInterval(updateTimer, 500);
-updateTimer();
\ No newline at end of file
+// Push-Updates: Der Server sendet den Zustand nur, wenn er sich ändert
+const socket = io();
+socket.on('connect', () => socket.emit('subscribe', ['timer_state']));
+socket.on('timer_state', (data) => {
+    pushReceived = true;
+    renderTimer(data);
+});
+updateTimer();
+
+// Lokale Anzeige-Aktualisierung (kein Netzwerk)
+setInterval(drawTimer, 250);
\ No newline at end of file
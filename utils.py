@@ -1,26 +1,214 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 import sys
-from config import LOG_FILE_SERVER, LOG_FILE_WISHES  # Importiere Pfade aus config
+import threading
+import time
+from contextlib import contextmanager
+from config import (  # Importiere Pfade aus config
+    LOG_FILE_SERVER, LOG_FILE_WISHES, LOG_FILE_TWITCH, LOG_FILE_TIKTOK, LOG_FILE_TIMER
+)
 
+# Rotation: max. Größe pro Datei und Anzahl alter Dateien
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
 
-def setup_logging(logger_name, log_file):
-    """Konfiguriert einen Logger und gibt ihn zurück."""
-    logger = logging.getLogger(logger_name)
-    logger.setLevel(logging.INFO)
+# Subsysteme: Logger-Name -> (Datei, Format, Datumsformat, Konsole, max. INFO-Zeilen pro Sekunde)
+# Warnungen und Fehler werden nie begrenzt. TimerLog ist das Protokoll der Zeitgutschriften
+# und wird deshalb auch bei Gift-/Like-Wellen nie gekürzt.
+LOG_SUBSYSTEMS = {
+    "server_logger": (LOG_FILE_SERVER, '%(asctime)s - %(levelname)s - %(message)s', None, False, 50),
+    "wishes_logger": (LOG_FILE_WISHES, '%(asctime)s - %(levelname)s - %(message)s', None, False, None),
+    "TimerLog": (LOG_FILE_TIMER, '%(asctime)s - %(message)s', '%H:%M:%S', False, None),
+    "TikTokAPI": (LOG_FILE_TIKTOK, '%(asctime)s [%(levelname)s] %(message)s', '%Y-%m-%d %H:%M:%S', True, 20),
+    "TwitchAPI": (LOG_FILE_TWITCH, '%(asctime)s [%(levelname)s] [TWITCH] %(message)s', '%Y-%m-%d %H:%M:%S', True, 20),
+}
 
-    # Verhindert doppelte Handler bei erneutem Aufruf
-    if not logger.handlers:
-        os.makedirs(os.path.dirname(log_file), exist_ok=True)
-        # KORREKTUR: Erzwinge UTF-8 für die Log-Dateien
-        handler = logging.FileHandler(log_file, encoding='utf-8')
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+_queue_listener = None
+_setup_lock = threading.Lock()
+# Referenzpunkt für den Startup-Report (utils wird als eines der ersten Module geladen)
+_IMPORT_TIME = time.perf_counter()
 
-    return logger
 
+class RateLimitFilter(logging.Filter):
+    """
+    Lässt pro Sekunde höchstens 'per_second' INFO/DEBUG-Zeilen durch.
+    Verworfene Zeilen werden gezählt und an der nächsten durchgelassenen Zeile vermerkt.
+    Läuft im aufrufenden Thread, bevor die Zeile in die Queue geht (verworfene Zeilen kosten fast nichts).
+    Mehrere Threads loggen gleichzeitig, Fenster und Zähler sind daher per Lock geschützt.
+    """
+
+    def __init__(self, per_second):
+        super().__init__()
+        self.per_second = per_second
+        self._lock = threading.Lock()
+        self._window = 0
+        self._count = 0
+        self.suppressed = 0
+        self._pending_note = 0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        now = int(time.monotonic())
+        with self._lock:
+            if now != self._window:
+                self._window = now
+                self._count = 0
+            self._count += 1
+            if self._count > self.per_second:
+                self.suppressed += 1
+                self._pending_note += 1
+                return False
+            note = self._pending_note
+            self._pending_note = 0
+        if note:
+            record.msg = f"{record.getMessage()} (+{note} Zeilen unterdrückt)"
+            record.args = None
+        return True
+
+
+class _RoutingHandler(logging.Handler):
+    """Verteilt Records im Listener-Thread anhand des Logger-Namens auf die Datei-Handler."""
+
+    def __init__(self, routes, default):
+        super().__init__()
+        self.routes = routes
+        self.default = default
+
+    def emit(self, record):
+        for handler in self.routes.get(record.name, self.default):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def close(self):
+        for handlers in list(self.routes.values()) + [self.default]:
+            for handler in handlers:
+                handler.close()
+        super().close()
+
+
+def _file_handler(log_file, fmt, datefmt):
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    # KORREKTUR: Erzwinge UTF-8 für die Log-Dateien
+    handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES,
+                                                   backupCount=LOG_BACKUP_COUNT, encoding='utf-8')
+    handler.setFormatter(logging.Formatter(fmt, datefmt=datefmt))
+    return handler
+
+
+def configure_logging():
+    """
+    Richtet das komplette Logging einmalig ein (weitere Aufrufe sind wirkungslos).
+
+    Alle Logger schreiben nur in eine Queue (QueueHandler). Ein einzelner Listener-Thread
+    übernimmt Formatieren und Datei-I/O, der Event-Hotpath wartet also nie auf die Festplatte.
+    Subsysteme aus LOG_SUBSYSTEMS bekommen eigene, rotierende Dateien; alles andere
+    (z.B. EventDispatcher, TwitchIRC) landet in der server.log und auf der Konsole.
+    """
+    global _queue_listener
+    with _setup_lock:
+        if _queue_listener is not None:
+            return
+        log_queue = queue.SimpleQueue()
+
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(name)s: %(message)s', '%H:%M:%S'))
+
+        routes = {}
+        for name, (log_file, fmt, datefmt, to_console, per_second) in LOG_SUBSYSTEMS.items():
+            routes[name] = [_file_handler(log_file, fmt, datefmt)] + ([console] if to_console else [])
+
+            queue_handler = logging.handlers.QueueHandler(log_queue)
+            if per_second:
+                queue_handler.addFilter(RateLimitFilter(per_second))
+            logger = logging.getLogger(name)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.handlers = [queue_handler]
+
+        default = [routes["server_logger"][0], console]
+        root = logging.getLogger()
+        root.setLevel(logging.INFO)
+        root.handlers = [logging.handlers.QueueHandler(log_queue)]
+
+        _queue_listener = logging.handlers.QueueListener(log_queue, _RoutingHandler(routes, default))
+        _queue_listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Schreibt alle wartenden Zeilen und beendet den Listener-Thread (Shutdown-Hook)."""
+    global _queue_listener
+    with _setup_lock:
+        listener = _queue_listener
+        _queue_listener = None
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+def get_log_stats():
+    """Anzahl der durch Rate-Limits unterdrückten Zeilen pro Subsystem."""
+    stats = {}
+    for name in LOG_SUBSYSTEMS:
+        for handler in logging.getLogger(name).handlers:
+            for f in handler.filters:
+                if isinstance(f, RateLimitFilter):
+                    stats[name] = {"per_second": f.per_second, "suppressed": f.suppressed}
+    return stats
+
+
+class StartupProfiler:
+    """
+    Misst die Startphasen (Datenbank, GUI, Autostarts, ...) und schreibt sie als Report
+    in die server.log. Gedacht zum Vergleichen der Kaltstart-Zeit der gebauten exe.
+    """
+
+    def __init__(self):
+        self._t0 = _IMPORT_TIME
+        self._lock = threading.Lock()
+        self.phases = []  # (Name, Dauer ms, Zeitpunkt seit Start ms)
+
+    def _since_start(self):
+        return round((time.perf_counter() - self._t0) * 1000, 1)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases.append((name, round((time.perf_counter() - start) * 1000, 1), self._since_start()))
+
+    def mark(self, name):
+        """Zeitpunkt ohne Dauer (z.B. 'GUI sichtbar')."""
+        with self._lock:
+            self.phases.append((name, None, self._since_start()))
+
+    def report(self, service_times=None):
+        lines = ["⏱️ Startup-Profil:"]
+        for name, duration, at in self.phases:
+            took = f"{duration:>8.1f} ms" if duration is not None else " " * 11
+            lines.append(f"   {name:<28}{took}  (bei {at:.1f} ms)")
+        for name, duration in sorted((service_times or {}).items(), key=lambda x: -x[1]):
+            lines.append(f"   {'Service ' + name:<28}{duration:>8.1f} ms")
+        server_log.info("\n".join(lines))
+
+
+def setup_logging(logger_name, log_file=None):
+    """Gibt einen Logger zurück (Konfiguration übernimmt configure_logging)."""
+    configure_logging()
+    return logging.getLogger(logger_name)
+
+
+# Ein Import von utils reicht, damit das Logging steht (main.py ruft configure_logging zusätzlich explizit auf)
+configure_logging()
 
 # Erstelle die globalen Logger-Instanzen, die Services nutzen können
-server_log = setup_logging('server_logger', LOG_FILE_SERVER)
-wishes_log = setup_logging('wishes_logger', LOG_FILE_WISHES)
\ No newline at end of file
+server_log = setup_logging('server_logger')
+wishes_log = setup_logging('wishes_logger')
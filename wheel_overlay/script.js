@@ -8,23 +8,15 @@ let isSpinning = false;
 let currentRotation = 0;
 let lastTimestamp = 0;
 
-// Polling Loop: Fragt jede Sekunde den Status beim Bot ab
-setInterval(checkState, 1000);
-
-async function checkState() {
-    try {
-        const res = await fetch('/api/v1/wheel/state');
-        const data = await res.json();
-
-        // Wenn Daten da sind (data.timestamp) und es ein NEUER Spin ist
-        if (data && data.timestamp && (!isSpinning || data.timestamp !== lastTimestamp)) {
-            if (data.timestamp !== lastTimestamp) {
-                lastTimestamp = data.timestamp;
-                startSpin(data);
-            }
-        }
-    } catch (e) {
-        console.error("Polling error", e);
+// Push statt Polling: Der Server sendet jedes neue Spin-Ergebnis per Socket.IO
+const socket = io();
+socket.on('wheel_result', checkState);
+
+function checkState(data) {
+    // Wenn Daten da sind (data.timestamp) und es ein NEUER Spin ist
+    if (data && data.timestamp && data.timestamp !== lastTimestamp) {
+        lastTimestamp = data.timestamp;
+        startSpin(data);
     }
 }
 